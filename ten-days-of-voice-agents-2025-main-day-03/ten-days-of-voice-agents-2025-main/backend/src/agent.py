@@ -1,5 +1,6 @@
-import json
+import asyncio
 import logging
+import os
 import traceback
 import time
 from datetime import datetime
@@ -19,10 +20,17 @@ from livekit.agents import (
     tokenize,
     function_tool,
     RunContext,
+    utils,
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
+from livekit.plugins import murf, google, deepgram
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
+from hedged_llm import HedgedLLM
+from persistence import get_persistence_queue, release_persistence_queue
+from vad_batcher import BatchedVAD
+from warmup import FirstTurnTimer, job_executor_type, prewarm_models, startup_timings, warm_turn_detector
+from wellness_store import DEFAULT_USER, create_wellness_store
+
 logger = logging.getLogger("agent")
 
 env_path = Path(__file__).parent.parent / ".env.local"
@@ -30,9 +38,14 @@ load_dotenv(dotenv_path=env_path)
 
 
 class Assistant(Agent):
-    def __init__(self) -> None:
+    def __init__(self, user_id: str = DEFAULT_USER) -> None:
+        self.user_id = user_id
+        # The wellness log lives in the project root, WELLNESS_STORE picks the format
+        self.store = create_wellness_store(Path(__file__).resolve().parent.parent.parent, user_id=user_id)
         # Load history to inject into context
         history_context = self._get_history_context()
+        # save_checkin only enqueues, a writer thread appends to the store in batches
+        self.checkin_queue = get_persistence_queue(f"wellness:{user_id}", self.store.append_many)
         
         super().__init__(
             instructions=f"""You are a supportive, grounded Health & Wellness Voice Companion.
@@ -59,22 +72,21 @@ class Assistant(Agent):
         )
 
     def _get_history_context(self) -> str:
-        """Reads the wellness_log.json and returns a summary of the last session."""
+        """Returns a summary of previous sessions from the wellness log."""
         try:
-            # wellness_log.json is in the project root
-            log_path = Path(__file__).resolve().parent.parent.parent / "wellness_log.json"
-            
-            if not log_path.exists():
-                return "No previous check-ins found. This is the first session."
+            # Partitioned stores keep a rolling summary, computed when check-ins are saved
+            if hasattr(self.store, "summary"):
+                summary = self.store.summary()
+                if summary:
+                    return self._format_summary(summary)
             
-            with open(log_path, "r") as f:
-                data = json.load(f)
+            latest = self.store.latest(1)
                 
-            if not data:
-                return "No previous check-ins found."
+            if not latest:
+                return "No previous check-ins found. This is the first session."
                 
             # Get the most recent entry
-            last_entry = data[-1]
+            last_entry = latest[0]
             return f"""
             Last Check-in ({last_entry.get('date', 'Unknown Date')}):
             - Mood: {last_entry.get('mood', 'Unknown')}
@@ -85,6 +97,22 @@ class Assistant(Agent):
             logger.error(f"Error reading history: {e}")
             return "Error retrieving past history."
 
+    @staticmethod
+    def _format_summary(summary: dict) -> str:
+        last_entry = summary.get("last_entry", {})
+        recurring_goals = ", ".join(
+            f"{goal} ({count}x)" for goal, count in list(summary.get("goal_counts", {}).items())[:3]
+        )
+        return f"""
+            History: {summary.get('sessions', 0)} check-ins since {summary.get('first_date', 'Unknown Date')}, current streak {summary.get('streak_days', 0)} day(s).
+            Recent moods (oldest first): {' -> '.join(m for m in summary.get('recent_moods', []) if m)}
+            Recurring goals: {recurring_goals or 'None yet'}
+            Last Check-in ({last_entry.get('date', 'Unknown Date')}):
+            - Mood: {last_entry.get('mood', 'Unknown')}
+            - Goals: {', '.join(last_entry.get('goals') or [])}
+            - Summary: {last_entry.get('summary', '')}
+            """
+
     @function_tool
     async def save_checkin(
         self,
@@ -105,6 +133,7 @@ class Assistant(Agent):
         logger.info(f"Saving check-in: Mood={mood}, Goals={goals}")
         
         entry = {
+            "user_id": self.user_id,
             "timestamp": int(time.time()),
             "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "mood": mood,
@@ -113,21 +142,8 @@ class Assistant(Agent):
         }
         
         try:
-            log_path = Path(__file__).resolve().parent.parent.parent / "wellness_log.json"
-            
-            data = []
-            if log_path.exists():
-                with open(log_path, "r") as f:
-                    try:
-                        data = json.load(f)
-                    except json.JSONDecodeError:
-                        data = []
-            
-            data.append(entry)
-            
-            with open(log_path, "w") as f:
-                json.dump(data, f, indent=2)
-                
+            # Returns immediately, the writer thread does the disk I/O
+            self.checkin_queue.submit(entry)
             return "Check-in saved successfully. I'll remember this for next time!"
             
         except Exception as e:
@@ -136,7 +152,8 @@ class Assistant(Agent):
 
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    # VAD and noise cancellation loaded and warmed, turn detector files checked, all timed
+    prewarm_models(proc)
 
 
 async def entrypoint(ctx: JobContext):
@@ -145,43 +162,70 @@ async def entrypoint(ctx: JobContext):
             "room": ctx.room.name,
         }
 
+        # Gemini TTFT swings from turn to turn, late first tokens are hedged with a lighter model
+        session_llm = HedgedLLM(
+            google.LLM(model="gemini-2.5-flash"),
+            google.LLM(model=os.getenv("LLM_HEDGE_MODEL", "gemini-2.5-flash-lite")),
+        )
+        # The turn detector's cold first inference runs now instead of on the user's first turn
+        turn_detector = MultilingualModel()
+        turn_detector_warmup = asyncio.create_task(warm_turn_detector(turn_detector))
+        ctx.add_shutdown_callback(lambda: utils.aio.cancel_and_wait(turn_detector_warmup))
         session = AgentSession(
             stt=deepgram.STT(model="nova-3"),
-            llm=google.LLM(
-                model="gemini-2.5-flash",
-            ),
+            llm=session_llm,
             tts=murf.TTS(
                     voice="en-US-matthew",
                     style="Conversation",
                     tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=1),
                 ),
-            turn_detection=MultilingualModel(),
+            turn_detection=turn_detector,
             vad=ctx.proc.userdata["vad"],
             preemptive_generation=True,
         )
 
         usage_collector = metrics.UsageCollector()
+        first_turn = FirstTurnTimer()
 
         @session.on("metrics_collected")
         def _on_metrics_collected(ev: MetricsCollectedEvent):
             metrics.log_metrics(ev.metrics)
             usage_collector.collect(ev.metrics)
+            first_turn.collect(ev.metrics)
 
         async def log_usage():
             summary = usage_collector.get_summary()
             logger.info(f"Usage: {summary}")
+            logger.info(f"LLM hedging: {session_llm.stats()}")
+            logger.info(f"Startup timings: {startup_timings.stats()}")
+            if isinstance(ctx.proc.userdata["vad"], BatchedVAD):
+                logger.info(f"VAD batching: {ctx.proc.userdata['vad'].batcher.stats()}")
 
         ctx.add_shutdown_callback(log_usage)
 
+        await ctx.connect()
+        # History is partitioned per participant, so find out who we are talking to first
+        participant = await ctx.wait_for_participant()
+        assistant = Assistant(user_id=participant.identity)
+
+        async def flush_checkins():
+            checkin_queue = assistant.checkin_queue
+            if not await checkin_queue.aflush(timeout=10):
+                logger.error("Timed out flushing queued check-ins")
+            await asyncio.to_thread(assistant.store.flush)
+            logger.info(f"Check-in persistence: {checkin_queue.metrics()}")
+            # The queue is per participant, its writer thread ends with the session
+            await asyncio.to_thread(release_persistence_queue, checkin_queue, 5)
+
+        ctx.add_shutdown_callback(flush_checkins)
+
         await session.start(
-            agent=Assistant(),
+            agent=assistant,
             room=ctx.room,
             room_input_options=RoomInputOptions(
-                noise_cancellation=noise_cancellation.BVC(),
+                noise_cancellation=ctx.proc.userdata["noise_cancellation"],
             ),
         )
-
-        await ctx.connect()
     
     except Exception as e:
         logger.error(f"Error in entrypoint: {e}")
@@ -190,4 +234,4 @@ async def entrypoint(ctx: JobContext):
 
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
+    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm, job_executor_type=job_executor_type()))
@@ -0,0 +1,160 @@
+"""
+Background persistence for agent tools.
+Tools enqueue records and return immediately; a writer thread drains the queue
+and hands each batch to a sink as one group commit, off the event loop.
+"""
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger("agent")
+
+_STOP = object()
+
+
+class PersistenceQueue:
+    """Queue of records written in batches by a single writer thread"""
+
+    def __init__(
+        self,
+        sink: Callable[[List[Dict[str, Any]]], None],
+        name: str = "persistence",
+        max_batch: int = 64,
+        batch_window: float = 0.005,
+        max_retries: int = 3,
+    ):
+        self.sink = sink
+        self.name = name
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.max_retries = max_retries
+
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._done = threading.Condition()
+        self._submitted = 0
+        self._processed = 0
+
+        self._commits = 0
+        self._failed = 0
+        self._latencies = deque(maxlen=256)
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, record: Dict[str, Any]) -> None:
+        """Enqueue a record for the writer thread. Never blocks on disk."""
+        self.start()
+        with self._done:
+            self._submitted += 1
+        self._queue.put(record)
+
+    def _next_batch(self) -> List[Any]:
+        batch = [self._queue.get()]
+        if batch[0] is _STOP:
+            return batch
+
+        # Group commit: collect whatever else arrives within the batch window
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            batch.append(item)
+            if item is _STOP:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            stop = batch[-1] is _STOP
+            records = [item for item in batch if item is not _STOP]
+
+            if records:
+                self._commit(records)
+                with self._done:
+                    self._processed += len(records)
+                    self._done.notify_all()
+
+            if stop:
+                return
+
+    def _commit(self, records: List[Dict[str, Any]]) -> None:
+        for attempt in range(1, self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                self.sink(records)
+                self._latencies.append(time.perf_counter() - start)
+                self._commits += 1
+                return
+            except Exception as e:
+                logger.error(f"{self.name}: commit of {len(records)} records failed (attempt {attempt}): {e}")
+                time.sleep(0.05 * attempt)
+
+        self._failed += len(records)
+        # Keep the data in the logs rather than losing it silently
+        logger.error(f"{self.name}: dropping {len(records)} records after {self.max_retries} attempts: {records}")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every record submitted so far has been committed. Returns False on timeout."""
+        with self._done:
+            target = self._submitted
+            return self._done.wait_for(lambda: self._processed >= target, timeout=timeout)
+
+    async def aflush(self, timeout: Optional[float] = None) -> bool:
+        return await asyncio.to_thread(self.flush, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        if self._thread and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+        self._thread = None
+
+    def metrics(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+
+        def pct(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3)
+
+        return {
+            "queue_depth": self._queue.qsize(),
+            "pending": self._submitted - self._processed,
+            "commits": self._commits,
+            "processed": self._processed,
+            "failed": self._failed,
+            "commit_latency_p50_ms": pct(0.5),
+            "commit_latency_p95_ms": pct(0.95),
+            "commit_latency_max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        }
+
+
+_queues: Dict[str, PersistenceQueue] = {}
+
+
+def get_persistence_queue(name: str, sink: Callable[[List[Dict[str, Any]]], None]) -> PersistenceQueue:
+    """Return the process-wide queue registered under `name`, creating it with `sink` on first use"""
+    persistence_queue = _queues.get(name)
+    if persistence_queue is None:
+        persistence_queue = PersistenceQueue(sink, name=name)
+        _queues[name] = persistence_queue
+    return persistence_queue
+
+
+def release_persistence_queue(persistence_queue: PersistenceQueue, timeout: Optional[float] = None) -> None:
+    """Stop a queue's writer thread and unregister it, for queues scoped to one session. Flush first."""
+    if _queues.get(persistence_queue.name) is persistence_queue:
+        del _queues[persistence_queue.name]
+    persistence_queue.close(timeout)
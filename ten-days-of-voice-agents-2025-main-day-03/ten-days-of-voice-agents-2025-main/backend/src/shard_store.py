@@ -0,0 +1,209 @@
+"""
+Per-process sharded storage.
+Every job process appends to its own shard file, so writers never contend.
+merge() folds the shards into a snapshot that records how far into each shard it
+has read; readers combine that snapshot with the shard tails past those offsets,
+which gives them a consistent view without taking a lock. Only merges are
+serialized, through a lock file.
+"""
+import json
+import logging
+import os
+import socket
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger("agent")
+
+
+def _default_sort_key(record: Dict[str, Any]):
+    timestamp = record.get("timestamp")
+    return (timestamp is None, timestamp)
+
+
+class ShardedLog:
+    """Append-only log split into one JSONL shard per writer process"""
+
+    def __init__(
+        self,
+        root: Path,
+        name: str,
+        shard_id: Optional[str] = None,
+        sort_key: Callable[[Dict[str, Any]], Any] = _default_sort_key,
+    ):
+        self.root = Path(root)
+        self.name = name
+        self.hostname = socket.gethostname()
+        self.shard_id = shard_id or f"{self.hostname}-{os.getpid()}"
+        self.sort_key = sort_key
+        self.shard_dir = self.root / f"{name}.shards"
+        self.snapshot_path = self.root / f"{name}.snapshot.json"
+
+    @property
+    def shard_path(self) -> Path:
+        return self.shard_dir / f"{self.shard_id}.jsonl"
+
+    def append(self, record: Dict[str, Any]) -> None:
+        self.append_many([record])
+
+    def append_many(self, records: List[Dict[str, Any]]) -> None:
+        """Append records to this process's shard with one write and one fsync"""
+        if not records:
+            return
+
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        fd = os.open(self.shard_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data.encode("utf-8"))
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _load_snapshot(self) -> Tuple[Dict[str, int], List[Dict[str, Any]]]:
+        if not self.snapshot_path.exists():
+            return {}, []
+        try:
+            with open(self.snapshot_path, "r") as f:
+                snapshot = json.load(f)
+            return snapshot.get("offsets", {}), snapshot.get("records", [])
+        except json.JSONDecodeError as e:
+            # Snapshots are replaced atomically, so this only happens if someone edited it by hand
+            logger.error(f"Corrupt snapshot {self.snapshot_path}: {e}")
+            return {}, []
+
+    @staticmethod
+    def _read_tail(path: Path, offset: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Read complete lines from `offset` on. Returns the records and the offset after the last full line."""
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+
+        # A writer may be in the middle of a line, leave it for the next reader
+        end = data.rfind(b"\n") + 1
+        records = []
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping corrupt line in {path}")
+        return records, offset + end
+
+    def _collect(self) -> Tuple[Dict[str, int], List[Dict[str, Any]]]:
+        offsets, records = self._load_snapshot()
+
+        tail = []
+        shards = sorted(self.shard_dir.glob("*.jsonl")) if self.shard_dir.exists() else []
+        live = {shard.stem for shard in shards}
+        # Offsets of pruned shards are no longer needed
+        offsets = {shard_id: offset for shard_id, offset in offsets.items() if shard_id in live}
+        for shard in shards:
+            shard_records, offsets[shard.stem] = self._read_tail(shard, offsets.get(shard.stem, 0))
+            tail.extend(shard_records)
+
+        # Snapshot records are already ordered, only the new tail has to be merged in
+        tail.sort(key=self.sort_key)
+        if tail and records and self.sort_key(tail[0]) < self.sort_key(records[-1]):
+            records = sorted(records + tail, key=self.sort_key)
+        else:
+            records = records + tail
+        return offsets, records
+
+    def read_merged(self) -> List[Dict[str, Any]]:
+        """Snapshot plus every shard tail, ordered by the sort key"""
+        return self._collect()[1]
+
+    def latest(self, n: int = 1) -> List[Dict[str, Any]]:
+        return self.read_merged()[-n:] if n > 0 else []
+
+    @contextmanager
+    def _merge_lock(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / f"{self.name}.merge.lock", "w") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def merge(self) -> int:
+        """Fold all shard tails into a new snapshot. Returns the number of records in it."""
+        with self._merge_lock():
+            previous_offsets, _ = self._load_snapshot()
+            if fcntl:
+                # Pruning is only safe while no other merge can run
+                self._prune(previous_offsets)
+            offsets, records = self._collect()
+
+            tmp_path = self.snapshot_path.with_name(f"{self.snapshot_path.name}.{self.shard_id}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({"offsets": offsets, "records": records}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            # Readers see either the previous snapshot or this one
+            os.replace(tmp_path, self.snapshot_path)
+
+        return len(records)
+
+    def migrate_legacy(self, legacy_path: Path) -> int:
+        """Seed an empty snapshot from a legacy JSON array. Returns the number of imported records."""
+        legacy_path = Path(legacy_path)
+        with self._merge_lock():
+            if self.snapshot_path.exists() or not legacy_path.exists():
+                return 0
+            try:
+                with open(legacy_path, "r") as f:
+                    records = json.load(f)
+            except json.JSONDecodeError:
+                logger.warning(f"Could not parse {legacy_path}, nothing to migrate")
+                return 0
+
+            tmp_path = self.snapshot_path.with_name(f"{self.snapshot_path.name}.{self.shard_id}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({"offsets": {}, "records": sorted(records, key=self.sort_key)}, f)
+            os.replace(tmp_path, self.snapshot_path)
+
+        logger.info(f"Migrated {len(records)} records from {legacy_path} to {self.snapshot_path}")
+        return len(records)
+
+    def _prune(self, merged_offsets: Dict[str, int]) -> None:
+        """
+        Remove shards of exited processes on this host that an earlier snapshot
+        already covers completely. Their offsets are dropped from the next
+        snapshot, so a recycled pid starts a fresh shard from offset 0.
+        """
+        if not self.shard_dir.exists():
+            return
+        for shard in self.shard_dir.glob("*.jsonl"):
+            host, _, pid = shard.stem.rpartition("-")
+            if host != self.hostname or shard.stem == self.shard_id or not pid.isdigit():
+                continue
+            if self._pid_alive(int(pid)) or shard.stat().st_size != merged_offsets.get(shard.stem):
+                continue
+            shard.unlink()
+
+    @staticmethod
+    def _pid_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def flush(self) -> None:
+        self.merge()
+
+    def close(self) -> None:
+        self.merge()
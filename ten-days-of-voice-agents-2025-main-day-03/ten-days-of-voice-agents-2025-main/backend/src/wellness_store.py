@@ -0,0 +1,376 @@
+"""
+Storage backends for the wellness check-in log.
+WELLNESS_STORE=partitioned (default) keeps one indexed log per participant under
+wellness/<user>/ plus a rolling summary that is updated on every save. The
+pre-partitioning log is imported once, by WELLNESS_LEGACY_USER if set, otherwise
+by the first participant to connect.
+WELLNESS_STORE=indexed appends to a single wellness_log.jsonl with a side index
+of entry offsets, so the latest entries are read by seeking from the end.
+WELLNESS_STORE=json keeps the original single wellness_log.json array, and
+WELLNESS_STORE=sharded gives every job process its own append-only shard that
+is merged into wellness_log.snapshot.json.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import struct
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from shard_store import ShardedLog
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger("agent")
+
+
+class JsonArrayLog:
+    """The original format: one JSON array, rewritten on every append"""
+
+    def __init__(self, log_path: Path):
+        self.log_path = Path(log_path)
+
+    def read_all(self) -> List[Dict[str, Any]]:
+        if not self.log_path.exists():
+            return []
+        with open(self.log_path, "r") as f:
+            return json.load(f)
+
+    def latest(self, n: int = 1) -> List[Dict[str, Any]]:
+        return self.read_all()[-n:] if n > 0 else []
+
+    def append_many(self, entries: List[Dict[str, Any]]) -> None:
+        data = []
+        if self.log_path.exists():
+            with open(self.log_path, "r") as f:
+                try:
+                    data = json.load(f)
+                except json.JSONDecodeError:
+                    data = []
+
+        data.extend(entries)
+
+        # Replace atomically so readers never see a half-written file
+        tmp_path = self.log_path.with_name(self.log_path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.log_path)
+
+    def flush(self) -> None:
+        pass
+
+
+class TailIndexedLog:
+    """
+    JSONL log plus a fixed-width index holding the byte offset of every entry.
+    The index is written after the log, so it never points past complete data.
+    """
+
+    OFFSET = struct.Struct(">Q")
+
+    def __init__(self, log_path: Path):
+        self.log_path = Path(log_path)
+        self.index_path = self.log_path.with_suffix(".idx")
+
+    @contextmanager
+    def _locked(self):
+        """Serialize writers, including writers in other job processes. Readers never lock."""
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.index_path, "ab") as index:
+            if fcntl:
+                fcntl.flock(index, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(index, fcntl.LOCK_UN)
+
+    def count(self) -> int:
+        try:
+            return self.index_path.stat().st_size // self.OFFSET.size
+        except FileNotFoundError:
+            return 0
+
+    def _read_offsets(self, start: int, stop: int) -> List[int]:
+        with open(self.index_path, "rb") as index:
+            index.seek(start * self.OFFSET.size)
+            data = index.read((stop - start) * self.OFFSET.size)
+        return [offset for (offset,) in self.OFFSET.iter_unpack(data)]
+
+    def _read_entries(self, offsets: List[int]) -> List[Dict[str, Any]]:
+        entries = []
+        with open(self.log_path, "rb") as log:
+            for offset in offsets:
+                log.seek(offset)
+                entries.append(json.loads(log.readline()))
+        return entries
+
+    def latest(self, n: int = 1) -> List[Dict[str, Any]]:
+        """The last n entries, oldest first. Cost depends on n, not on the size of the log."""
+        total = self.count()
+        if n <= 0 or not total:
+            return []
+        return self._read_entries(self._read_offsets(max(0, total - n), total))
+
+    def read_all(self) -> List[Dict[str, Any]]:
+        total = self.count()
+        return self._read_entries(self._read_offsets(0, total)) if total else []
+
+    def _repair_locked(self) -> None:
+        """Index entries that were logged before a crash cut off the index write, drop a torn last line."""
+        if not self.log_path.exists():
+            return
+
+        total = self.count()
+        # A torn index write leaves a partial offset at the end
+        with open(self.index_path, "r+b") as index:
+            index.truncate(total * self.OFFSET.size)
+
+        start = self._read_offsets(total - 1, total)[0] if total else 0
+        missing = []
+        with open(self.log_path, "r+b") as log:
+            log.seek(start)
+            if total:
+                log.readline()
+            while True:
+                offset = log.tell()
+                line = log.readline()
+                if not line:
+                    break
+                if not line.endswith(b"\n"):
+                    logger.warning(f"Dropping torn entry at the end of {self.log_path}")
+                    log.truncate(offset)
+                    break
+                missing.append(offset)
+
+        if missing:
+            logger.warning(f"Re-indexing {len(missing)} entries in {self.log_path}")
+            self._append_offsets(missing)
+
+    def _append_offsets(self, offsets: List[int]) -> None:
+        with open(self.index_path, "ab") as index:
+            index.write(b"".join(self.OFFSET.pack(offset) for offset in offsets))
+            index.flush()
+            os.fsync(index.fileno())
+
+    def append_many(self, entries: List[Dict[str, Any]]) -> None:
+        if not entries:
+            return
+
+        lines = [(json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8") for entry in entries]
+        with self._locked():
+            self._repair_locked()
+            with open(self.log_path, "ab") as log:
+                offset = log.seek(0, os.SEEK_END)
+                offsets = []
+                for line in lines:
+                    offsets.append(offset)
+                    offset += len(line)
+                log.write(b"".join(lines))
+                log.flush()
+                os.fsync(log.fileno())
+            self._append_offsets(offsets)
+
+    def migrate_legacy(self, legacy_path: Path) -> int:
+        """Convert a legacy wellness_log.json array once. Returns the number of migrated entries."""
+        legacy_path = Path(legacy_path)
+        if self.log_path.exists() or not legacy_path.exists():
+            return 0
+
+        try:
+            entries = JsonArrayLog(legacy_path).read_all()
+        except json.JSONDecodeError:
+            logger.warning(f"Could not parse {legacy_path}, nothing to migrate")
+            return 0
+
+        with self._locked():
+            # Another process may have migrated while we waited for the lock
+            if self.log_path.exists():
+                return 0
+            self.log_path.touch()
+        self.append_many(entries)
+        logger.info(f"Migrated {len(entries)} check-ins from {legacy_path} to {self.log_path}")
+        return len(entries)
+
+    def flush(self) -> None:
+        pass
+
+
+def fold_summary(summary: Optional[Dict[str, Any]], entry: Dict[str, Any], recent: int = 5, max_goals: int = 20) -> Dict[str, Any]:
+    """Fold one check-in into a rolling summary. Cost is independent of the history length."""
+    summary = dict(summary or {})
+    day = datetime.fromtimestamp(entry.get("timestamp", 0)).date()
+
+    last_day = date.fromisoformat(summary["last_day"]) if summary.get("last_day") else None
+    streak = summary.get("streak_days", 0)
+    if last_day is None or (day - last_day).days > 1:
+        streak = 1
+    elif (day - last_day).days == 1:
+        streak += 1
+    # Same day, or an entry older than the last one: the streak is unchanged
+
+    goal_counts = Counter(summary.get("goal_counts", {}))
+    goal_counts.update(goal.strip() for goal in entry.get("goals", []) if goal.strip())
+
+    return {
+        "sessions": summary.get("sessions", 0) + 1,
+        "first_date": summary.get("first_date") or entry.get("date"),
+        "last_day": max(day, last_day).isoformat() if last_day else day.isoformat(),
+        "streak_days": streak,
+        "last_entry": {key: entry.get(key) for key in ("date", "mood", "goals", "summary")},
+        "recent_moods": (summary.get("recent_moods", []) + [entry.get("mood")])[-recent:],
+        # Bounded, so the record stays small however long the history gets
+        "goal_counts": dict(goal_counts.most_common(max_goals)),
+    }
+
+
+class UserWellnessLog:
+    """One participant's check-ins: an indexed log plus a precomputed rolling summary"""
+
+    def __init__(self, root: Path, user_id: str):
+        self.user_id = user_id
+        slug = re.sub(r"[^A-Za-z0-9_.-]", "_", user_id)[:48]
+        # The hash keeps identities that sanitize to the same slug apart
+        digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:8]
+        self.user_dir = Path(root) / f"{slug}-{digest}"
+        self.log = TailIndexedLog(self.user_dir / "wellness_log.jsonl")
+        self.summary_path = self.user_dir / "summary.json"
+
+    @contextmanager
+    def _locked(self):
+        self.user_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.user_dir / "summary.lock", "w") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def summary(self) -> Optional[Dict[str, Any]]:
+        """The rolling summary, a single small read"""
+        try:
+            with open(self.summary_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def latest(self, n: int = 1) -> List[Dict[str, Any]]:
+        return self.log.latest(n)
+
+    def append_many(self, entries: List[Dict[str, Any]]) -> None:
+        if not entries:
+            return
+
+        with self._locked():
+            self.log.append_many(entries)
+            summary = self.summary()
+            for entry in entries:
+                summary = fold_summary(summary, entry)
+            tmp_path = self.summary_path.with_name(self.summary_path.name + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(summary, f, indent=2)
+            os.replace(tmp_path, self.summary_path)
+
+    def migrate_legacy(self, project_root: Path) -> int:
+        """
+        Import the global pre-partitioning log (wellness_log.jsonl, else wellness_log.json).
+        Legacy entries carry no identity, so only one user should import them, see claims_legacy_log.
+        """
+        if self.log.log_path.exists():
+            return 0
+
+        project_root = Path(project_root)
+        legacy_log = TailIndexedLog(project_root / "wellness_log.jsonl")
+        legacy_json = project_root / "wellness_log.json"
+        try:
+            if legacy_log.count():
+                entries = legacy_log.read_all()
+            elif legacy_json.exists():
+                entries = JsonArrayLog(legacy_json).read_all()
+            else:
+                return 0
+        except json.JSONDecodeError:
+            logger.warning(f"Could not parse the legacy wellness log in {project_root}, nothing to migrate")
+            return 0
+
+        self.append_many(entries)
+        logger.info(f"Migrated {len(entries)} check-ins into {self.user_dir}")
+        return len(entries)
+
+    def flush(self) -> None:
+        pass
+
+
+DEFAULT_USER = "default"
+
+_stores: Dict[Any, Any] = {}
+
+
+def claims_legacy_log(project_root: Path, user_id: str) -> bool:
+    """
+    Whether `user_id` imports the pre-partitioning log: WELLNESS_LEGACY_USER if set,
+    otherwise the first participant to connect. The claim is a marker file created
+    exclusively, so exactly one identity wins it across processes.
+    """
+    legacy_user = os.getenv("WELLNESS_LEGACY_USER")
+    if legacy_user:
+        return user_id == legacy_user
+    if not any((project_root / name).exists() for name in ("wellness_log.jsonl", "wellness_log.json")):
+        return False
+
+    marker = project_root / "wellness" / "legacy_owner"
+    marker.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        fd = os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w") as f:
+        f.write(user_id)
+    return True
+
+
+def create_wellness_store(project_root: Path, user_id: str = DEFAULT_USER, backend: Optional[str] = None):
+    """
+    Return the wellness store for the configured backend.
+    Every backend exposes append_many/latest/flush; only the partitioned one is per
+    user and also offers summary().
+    """
+    project_root = Path(project_root).resolve()
+    backend = (backend or os.getenv("WELLNESS_STORE", "partitioned")).lower()
+
+    if backend == "partitioned":
+        store = UserWellnessLog(project_root / "wellness", user_id)
+        if claims_legacy_log(project_root, user_id):
+            store.migrate_legacy(project_root)
+        return store
+
+    if backend == "indexed":
+        # Stateless like the json backend, migrating is a single stat once the log exists
+        store = TailIndexedLog(project_root / "wellness_log.jsonl")
+        store.migrate_legacy(project_root / "wellness_log.json")
+        return store
+
+    if backend == "json":
+        # Cheap to build and stateless, tests swap the file underneath it
+        return JsonArrayLog(project_root / "wellness_log.json")
+
+    if backend == "sharded":
+        key = (backend, project_root)
+        store = _stores.get(key)
+        if store is None:
+            store = ShardedLog(project_root, "wellness_log")
+            store.migrate_legacy(project_root / "wellness_log.json")
+            _stores[key] = store
+        return store
+
+    raise ValueError(f"Unknown WELLNESS_STORE backend: {backend}")
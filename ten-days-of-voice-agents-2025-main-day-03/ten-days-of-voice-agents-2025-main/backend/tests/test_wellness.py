@@ -1,6 +1,7 @@
 import pytest
 import json
 import os
+import shutil
 import sys
 from pathlib import Path
 from unittest.mock import MagicMock
@@ -14,15 +15,25 @@ from agent import Assistant
 # backend/tests/test_wellness.py -> backend/tests -> backend -> project_root
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 WELLNESS_LOG_PATH = PROJECT_ROOT / "wellness_log.json"
+# Single log of the indexed backend, also imported by the partitioned default as legacy history
+WELLNESS_JOURNAL_PATH = PROJECT_ROOT / "wellness_log.jsonl"
+WELLNESS_INDEX_PATH = PROJECT_ROOT / "wellness_log.idx"
+WELLNESS_FILES = [WELLNESS_LOG_PATH, WELLNESS_JOURNAL_PATH, WELLNESS_INDEX_PATH]
+# Per-participant partitions of the default store
+WELLNESS_PARTITIONS_DIR = PROJECT_ROOT / "wellness"
 
-# Helper to clean up test file
+# Helper to clean up test files
 @pytest.fixture
 def clean_wellness_log():
-    if WELLNESS_LOG_PATH.exists():
-        os.remove(WELLNESS_LOG_PATH)
+    for path in WELLNESS_FILES:
+        if path.exists():
+            os.remove(path)
+    shutil.rmtree(WELLNESS_PARTITIONS_DIR, ignore_errors=True)
     yield
-    if WELLNESS_LOG_PATH.exists():
-        os.remove(WELLNESS_LOG_PATH)
+    for path in WELLNESS_FILES:
+        if path.exists():
+            os.remove(path)
+    shutil.rmtree(WELLNESS_PARTITIONS_DIR, ignore_errors=True)
 
 @pytest.mark.asyncio
 async def test_save_checkin(clean_wellness_log):
@@ -38,14 +49,21 @@ async def test_save_checkin(clean_wellness_log):
     
     assert "saved" in result.lower()
     
+    # The tool only enqueues the entry, wait for the writer thread to commit it
+    assert agent.checkin_queue.flush(timeout=5)
+    
     # Verify file content
-    assert WELLNESS_LOG_PATH.exists()
-    with open(WELLNESS_LOG_PATH, "r") as f:
-        data = json.load(f)
+    assert agent.store.log.log_path.exists()
+    with open(agent.store.log.log_path, "r") as f:
+        data = [json.loads(line) for line in f]
         
     assert len(data) == 1
     assert data[0]["mood"] == "Feeling great"
     assert data[0]["goals"] == ["Run 5k", "Drink water"]
+    assert data[0]["user_id"] == "default"
+    
+    # The rolling summary is updated on save, not when the next session starts
+    assert agent.store.summary()["sessions"] == 1
 
 @pytest.mark.asyncio
 async def test_get_history_empty(clean_wellness_log):
@@ -71,3 +89,111 @@ async def test_get_history_with_data(clean_wellness_log):
     
     assert "User needs rest" in history
     assert "Tired" in history
+
+@pytest.mark.asyncio
+async def test_get_history_from_sharded_store(clean_wellness_log, tmp_path):
+    from wellness_store import create_wellness_store
+
+    store = create_wellness_store(tmp_path, backend="sharded")
+    store.append_many([
+        {"timestamp": 1, "date": "2025-01-01", "mood": "Tired", "goals": ["Sleep"], "summary": "User needs rest."},
+        {"timestamp": 2, "date": "2025-01-02", "mood": "Rested", "goals": ["Walk"], "summary": "User slept well."},
+    ])
+    
+    agent = Assistant()
+    agent.store = store
+    history = agent._get_history_context()
+    
+    assert "Rested" in history
+    assert "Tired" not in history
+
+
+def test_tail_index_reads_latest_entries(tmp_path):
+    from wellness_store import TailIndexedLog
+
+    log = TailIndexedLog(tmp_path / "wellness_log.jsonl")
+    log.append_many([{"timestamp": i, "mood": f"Mood {i}"} for i in range(100)])
+    log.append_many([{"timestamp": 100, "mood": "Mood 100"}])
+
+    assert log.count() == 101
+    assert [e["mood"] for e in log.latest(1)] == ["Mood 100"]
+    assert [e["timestamp"] for e in log.latest(3)] == [98, 99, 100]
+    # The index holds one fixed-width offset per entry
+    assert (tmp_path / "wellness_log.idx").stat().st_size == 101 * 8
+
+
+def test_tail_index_recovers_from_interrupted_append(tmp_path):
+    from wellness_store import TailIndexedLog
+
+    log = TailIndexedLog(tmp_path / "wellness_log.jsonl")
+    log.append_many([{"timestamp": 1, "mood": "Tired"}])
+    # Simulate a crash after the log write but before the index write, plus a torn line
+    with open(tmp_path / "wellness_log.jsonl", "a") as f:
+        f.write('{"timestamp": 2, "mood": "Calm"}\n{"timestamp": 3, "mo')
+
+    log.append_many([{"timestamp": 4, "mood": "Happy"}])
+    assert [e["mood"] for e in log.read_all()] == ["Tired", "Calm", "Happy"]
+
+
+def test_legacy_log_is_migrated(tmp_path):
+    from wellness_store import create_wellness_store
+
+    with open(tmp_path / "wellness_log.json", "w") as f:
+        json.dump([{"timestamp": 1, "mood": "Tired"}, {"timestamp": 2, "mood": "Calm"}], f)
+
+    store = create_wellness_store(tmp_path, backend="indexed")
+    assert [e["mood"] for e in store.latest(1)] == ["Calm"]
+    assert (tmp_path / "wellness_log.jsonl").exists()
+
+    # Legacy entries have no identity, the first participant to connect imports them
+    partition = create_wellness_store(tmp_path, user_id="alice")
+    assert partition.summary()["sessions"] == 2
+    assert partition.summary()["last_entry"]["mood"] == "Calm"
+    assert create_wellness_store(tmp_path, user_id="bob").summary() is None
+    assert create_wellness_store(tmp_path).summary() is None
+
+
+def test_legacy_user_is_configurable(tmp_path, monkeypatch):
+    from wellness_store import create_wellness_store
+
+    with open(tmp_path / "wellness_log.json", "w") as f:
+        json.dump([{"timestamp": 1, "mood": "Tired"}], f)
+    monkeypatch.setenv("WELLNESS_LEGACY_USER", "carol")
+
+    assert create_wellness_store(tmp_path, user_id="alice").summary() is None
+    assert create_wellness_store(tmp_path, user_id="carol").summary()["last_entry"]["mood"] == "Tired"
+
+
+@pytest.mark.asyncio
+async def test_history_is_partitioned_per_user(clean_wellness_log):
+    alice = Assistant(user_id="alice")
+    await alice.save_checkin(MagicMock(), mood="Anxious", goals=["Finish report"], summary="Alice is stressed.")
+    assert alice.checkin_queue.flush(timeout=5)
+    
+    bob = Assistant(user_id="bob")
+    assert "No previous check-ins found" in bob._get_history_context()
+    
+    history = Assistant(user_id="alice")._get_history_context()
+    assert "Anxious" in history
+    assert "Alice is stressed" in history
+
+
+def test_rolling_summary_is_folded_incrementally():
+    from wellness_store import fold_summary
+
+    day = 24 * 60 * 60
+    summary = None
+    for i, (mood, goals) in enumerate([("Tired", ["Sleep"]), ("Calm", ["Sleep", "Walk"]), ("Happy", ["Walk"])]):
+        entry = {"timestamp": 1763918320 + i * day, "date": f"2025-11-{23 + i}", "mood": mood, "goals": goals, "summary": mood}
+        summary = fold_summary(summary, entry)
+
+    assert summary["sessions"] == 3
+    assert summary["streak_days"] == 3
+    assert summary["first_date"] == "2025-11-23"
+    assert summary["recent_moods"] == ["Tired", "Calm", "Happy"]
+    assert summary["goal_counts"] == {"Sleep": 2, "Walk": 2}
+    assert summary["last_entry"]["mood"] == "Happy"
+
+    # A gap of more than a day resets the streak
+    summary = fold_summary(summary, {"timestamp": 1763918320 + 10 * day, "mood": "Okay", "goals": []})
+    assert summary["streak_days"] == 1
@@ -1,18 +1,19 @@
-import json
 import logging
+import os
 import traceback
 import time
 import asyncio
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
-from typing import Annotated, List, Dict, Any, Optional
+from typing import Annotated, AsyncIterable, Dict, Any, Optional, Sequence, Tuple
 from livekit.agents import (
     Agent,
     AgentSession,
     JobContext,
     JobProcess,
     MetricsCollectedEvent,
+    ModelSettings,
     RoomInputOptions,
     WorkerOptions,
     cli,
@@ -21,20 +22,57 @@ from livekit.agents import (
     function_tool,
     RunContext,
     llm,
+    tts,
+    utils,
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
+from livekit.plugins import murf, google, deepgram
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
+from audio_cache import CachedTTS, StaticLines, get_audio_cache
+from concept_catalog import get_concept_catalog, resolution_metrics
+from content_cache import ContentCache, content_cache
+from context_compactor import ContextCompactor, LLMSummarizer
+from curriculum_store import get_curriculum_store
+from hedged_llm import HedgedLLM
+from prefetch import SpeculativePrefetcher
+from prompt_cache import CachedTokenRatio, prompt_cache
+from vad_batcher import BatchedVAD
+from voice_pool import VoicePool
+from warmup import FirstTurnTimer, job_executor_type, prewarm_models, startup_timings, warm_turn_detector
+
 logger = logging.getLogger("agent")
 
 env_path = Path(__file__).parent.parent / ".env.local"
 load_dotenv(dotenv_path=env_path)
 
+CONTENT_PATH = Path(__file__).resolve().parent.parent.parent / "shared-data" / "day4_tutor_content.json"
+# Compiled curriculum (see curriculum_store.py), used instead of the JSON file when present
+CURRICULUM_PATH = Path(os.getenv("TUTOR_CURRICULUM", str(CONTENT_PATH.with_suffix(".db"))))
+
+# What users say to switch modes (see the prompt's switch rules). Checked in order,
+# "let me explain" is a teach-back and not a request to explain.
+MODE_PHRASES = (
+    ("teach_back", ("i'll teach you", "i will teach you", "let me explain", "teach back", "teach it back")),
+    ("quiz", ("quiz", "test me", "ask me questions", "ask me a question")),
+    ("learn", ("teach me", "explain", "let's learn", "learn about")),
+)
+
+
+def detect_mode(transcript: str) -> Optional[str]:
+    """Mode a (possibly partial) transcript asks for, if any"""
+    text = transcript.lower().replace("\u2019", "'")
+    for mode, phrases in MODE_PHRASES:
+        if any(phrase in text for phrase in phrases):
+            return mode
+    return None
+
 
 class ActiveRecallCoach(Agent):
-    def __init__(self) -> None:
-        # Load content
-        self.content = self._load_content()
+    def __init__(self, content_cache: ContentCache = content_cache) -> None:
+        # Content comes from the process-wide cache filled in prewarm, not from disk
+        self.content_cache = content_cache
+        # Concepts by id and alias, shared by every session on the same content
+        self.catalog = self._load_catalog()
         self.current_mode = "learn"  # Start with learn mode so agent can speak immediately
         self.current_concept_id = None
         
@@ -44,87 +82,91 @@ class ActiveRecallCoach(Agent):
             "quiz": "en-US-alicia",
             "teach_back": "en-US-ken",
         }
+        # Warm TTS per voice, set by the entrypoint. Without it switches reconfigure the session TTS.
+        self.voice_pool: Optional[VoicePool] = None
+        # Summaries and questions handed to the LLM to read verbatim, the only speech the audio cache keeps
+        self.static_lines = StaticLines()
+        # switch_mode results rendered from interim transcripts, before the user is done talking
+        self.prefetcher = SpeculativePrefetcher()
+        self.prefetcher.add_intent(
+            "switch_mode", self._predict_switch, lambda key: self._render_switch(*key), self._warm_switch_voice
+        )
 
         super().__init__(
             instructions=self._get_instructions(),
         )
 
-    def _load_content(self) -> List[Dict[str, Any]]:
+    def _load_catalog(self):
+        """The compiled curriculum if there is one, else a catalog over the JSON content"""
+        if CURRICULUM_PATH.exists():
+            try:
+                store = get_curriculum_store(CURRICULUM_PATH)
+                self.content_digest = store.digest
+                self.content = ()
+                return store
+            except Exception as e:
+                logger.error(f"Error opening compiled curriculum {CURRICULUM_PATH}: {e}")
+
+        self.content = self._load_content()
+        return get_concept_catalog(self.content_digest, self.content)
+
+    def _load_content(self) -> Sequence[Dict[str, Any]]:
         try:
-            content_path = Path(__file__).resolve().parent.parent.parent / "shared-data" / "day4_tutor_content.json"
-            with open(content_path, "r") as f:
-                return json.load(f)
+            entry = self.content_cache.entry(CONTENT_PATH)
+            self.content_digest = entry.digest
+            return entry.data
         except Exception as e:
             logger.error(f"Error loading content: {e}")
-            return []
+            self.content_digest = None
+            return ()
 
     def _get_instructions(self) -> str:
-        concepts_str = json.dumps(self.content, indent=2)
+        if self.content_digest is None:
+            return self._render_instructions()
+        # The prompt depends on the content only, so every session and every mode
+        # shares one byte-identical string and the provider's prefix cache can hit
+        return prompt_cache.get_or_render((self.content_digest, "coach", None, None), self._render_instructions)
+
+    def _render_instructions(self) -> str:
+        """Static part of the prompt. Nothing session- or mode-specific may go in here."""
+        return f"""You are an Active Recall Coach designed to help users learn concepts effectively.
         
-        base_instructions = f"""You are an Active Recall Coach designed to help users learn concepts effectively.
+        **AVAILABLE CONCEPTS (title and id):**
+        {self.catalog.titles()}
+        The summary and sample question of the active concept come with each `switch_mode` result.
         
-        **AVAILABLE CONTENT:**
-        {concepts_str}
+        **MODES:**
+        The session starts in LEARN mode with no concept selected. After that, the current mode
+        and concept are whatever the most recent `switch_mode` result says.
         
-        **CURRENT MODE:** {self.current_mode.upper() if self.current_mode else 'NOT SET'}
+        - **INITIAL GREETING** (LEARN mode, no concept selected yet):
+        - Greet the user warmly and introduce yourself as their Active Recall Coach.
+        - List a few of the available concepts (Variables, Loops, etc.).
+        - Explain the three learning modes briefly:
+          * **Learn** - I'll explain a concept to you
+          * **Quiz** - I'll ask you questions to test your knowledge
+          * **Teach-Back** - You explain the concept to me and I'll score your understanding
+        - Ask them which concept they'd like to focus on and which mode they prefer.
+        - Once they choose, use the `switch_mode` tool to activate that mode and concept.
         
-        **YOUR BEHAVIOR:**
-        """
+        - **LEARN Mode** (Voice: Matthew):
+        - Explain the chosen concept using its summary from the latest `switch_mode` result.
+        - Be engaging, clear, and concise.
+        - After explaining, ask if they are ready for a quiz or want to teach it back.
+        
+        - **QUIZ Mode** (Voice: Alicia):
+        - Ask the concept's sample question from the latest `switch_mode` result, or a similar simple question.
+        - Wait for their answer.
+        - If correct, praise them and ask another question or suggest moving to Teach-Back.
+        - If incorrect, gently correct them and explain the right answer.
+        
+        - **TEACH-BACK Mode** (Voice: Ken):
+        - Ask the user to explain the concept to YOU.
+        - Listen carefully.
+        - After they explain, give them a **Score (0-10)** and brief qualitative feedback.
+        - Start your feedback with "Score: X/10".
+        - Be a fair but rigorous coach.
         
-        if self.current_mode == "learn":
-            # Check if this is the first interaction (no concept selected)
-            if not self.current_concept_id:
-                mode_instructions = """
-                - **INITIAL GREETING** (First time users connect):
-                - Greet the user warmly and introduce yourself as their Active Recall Coach.
-                - List the available concepts from the content (Variables, Loops, etc.).
-                - Explain the three learning modes briefly:
-                  * **Learn** - I'll explain a concept to you (my current mode)
-                  * **Quiz** - I'll ask you questions to test your knowledge
-                  * **Teach-Back** - You explain the concept to me and I'll score your understanding
-                - Ask them which concept they'd like to focus on and which mode they prefer.
-                - Once they choose, use the `switch_mode` tool to activate that mode and concept.
-                """
-            else:
-                mode_instructions = """
-                - **LEARN Mode** (Voice: Matthew):
-                - Explain the chosen concept using the 'summary' from the content.
-                - Be engaging, clear, and concise.
-                - After explaining, ask if they are ready for a quiz or want to teach it back.
-                """
-        elif self.current_mode == "quiz":
-            mode_instructions = """
-            - **QUIZ Mode** (Voice: Alicia):
-            - Ask the 'sample_question' or generate a similar simple question about the concept.
-            - Wait for their answer.
-            - If correct, praise them and ask another question or suggest moving to Teach-Back.
-            - If incorrect, gently correct them and explain the right answer.
-            """
-        elif self.current_mode == "teach_back":
-            mode_instructions = """
-            - **TEACH-BACK Mode** (Voice: Ken):
-            - Ask the user to explain the concept to YOU.
-            - Listen carefully.
-            - After they explain, give them a **Score (0-10)** and brief qualitative feedback.
-            - Start your feedback with "Score: X/10".
-            - Be a fair but rigorous coach.
-            """
-        else:
-            # Initial greeting when no mode is set
-            mode_instructions = """
-            - **INITIAL GREETING**:
-            - Greet the user warmly.
-            - Briefly introduce yourself as their Active Recall Coach.
-            - List the available concepts from the content (Variables, Loops, etc.).
-            - Explain the three learning modes:
-              * **Learn** - I'll explain a concept to you
-              * **Quiz** - I'll ask you questions to test your knowledge
-              * **Teach-Back** - You explain the concept to me and I'll score your understanding
-            - Ask them which mode they'd like to start with and which concept they want to focus on.
-            - Once they choose, use the `switch_mode` tool to activate that mode.
-            """
-
-        common_instructions = """
         **CRITICAL MODE SWITCHING RULES:**
         - You MUST call `switch_mode` when user says ANY of these:
           * "quiz me", "test me", "ask me questions" → switch_mode(mode='quiz')
@@ -135,8 +177,61 @@ class ActiveRecallCoach(Agent):
         - Keep all responses brief and conversational (voice interface)
         - ALWAYS acknowledge the mode switch by starting your response with the new mode behavior
         """
-        
-        return base_instructions + mode_instructions + common_instructions
+
+    def _mode_context(self, mode: str, concept_title: str) -> str:
+        """Volatile part of the prompt, appended to the conversation through the switch_mode result"""
+        return f"CURRENT MODE: {mode.upper()}. CURRENT CONCEPT: {concept_title}."
+
+    def _target_concept_id(self, concept_id: Optional[str] = None) -> Optional[str]:
+        """Concept a switch lands on: the requested one, else the current one, else the first"""
+        if concept_id:
+            return concept_id
+        if self.current_concept_id:
+            return self.current_concept_id
+        first = self.catalog.first()
+        return first["id"] if first else None
+
+    def _predict_switch(self, transcript: str) -> Optional[Tuple[str, Optional[str]]]:
+        """(mode, concept_id) of the switch_mode call a transcript is heading for"""
+        mode = detect_mode(transcript)
+        concept_id = self.catalog.spot(transcript)
+        if mode is None and concept_id is None:
+            return None
+        return mode or self.current_mode, self._target_concept_id(concept_id)
+
+    def _warm_switch_voice(self, key: Tuple[str, Optional[str]]) -> None:
+        mode, _ = key
+        if self.voice_pool is not None and mode in self.voice_ids:
+            # Opens the provider connection of the next voice while the user is still talking
+            self.voice_pool.get(self.voice_ids[mode]).prewarm()
+
+    def _render_switch(self, mode: str, concept_id: Optional[str]) -> str:
+        """switch_mode's directive for the LLM, depends on nothing but the mode, concept and content"""
+        concept_obj = self.catalog.get(concept_id)
+        concept_title = concept_obj["title"] if concept_obj else "Unknown Concept"
+        new_voice_id = self.voice_ids.get(mode)
+
+        response = f"{self._mode_context(mode, concept_title)}\nMode switched to {mode.upper()}. Voice is now {new_voice_id}.\n\n"
+
+        if concept_obj:
+            self.static_lines.add(concept_obj.get("summary") or "", concept_obj.get("sample_question") or "")
+
+        if mode == "learn" and concept_obj:
+            # Read word for word, so the audio cache can replay it for the next learner
+            response += f"ACTION REQUIRED: Explain the concept '{concept_title}' to the user by first reading this summary exactly as written:\n"
+            response += f"'{concept_obj['summary']}'\n"
+            response += "Then ask if they want to be quizzed."
+
+        elif mode == "quiz" and concept_obj:
+            response += f"ACTION REQUIRED: Ask the user exactly this question to test their knowledge:\n"
+            response += f"'{concept_obj['sample_question']}'"
+
+        elif mode == "teach_back":
+            response += f"ACTION REQUIRED: Ask the user to explain '{concept_title}' to you in their own words. Listen carefully."
+            if concept_obj:
+                response += f"\nScore their explanation against this summary:\n'{concept_obj['summary']}'"
+
+        return response
 
     @function_tool
     async def switch_mode(
@@ -167,15 +262,15 @@ class ActiveRecallCoach(Agent):
             self.current_mode = mode
             
             if concept_id:
-                # Validate concept_id
-                valid_ids = [c["id"] for c in self.content]
-                if concept_id in valid_ids:
-                    self.current_concept_id = concept_id
+                # Near-misses ("for loop", "varibles") resolve locally instead of costing an LLM retry
+                concept = self.catalog.resolve(concept_id)
+                if concept:
+                    self.current_concept_id = concept["id"]
                 else:
-                    return f"Concept '{concept_id}' not found. Available: {', '.join(valid_ids)}"
-            elif not self.current_concept_id and self.content:
+                    return f"Concept '{concept_id}' not found. Available: {self.catalog.titles()}"
+            elif not self.current_concept_id and self.catalog.first():
                 # Auto-select first concept if none is set
-                self.current_concept_id = self.content[0]["id"]
+                self.current_concept_id = self.catalog.first()["id"]
                 logger.info(f"Auto-selected first concept: {self.current_concept_id}")
             
             # Get the appropriate voice ID for the new mode
@@ -189,8 +284,8 @@ class ActiveRecallCoach(Agent):
                 logger.info(f"CONCEPT: {self.current_concept_id}")
                 logger.info(f"==========================================")
                 
-                # Update the session's TTS options
-                if self.current_session.tts:
+                # With a voice pool, tts_node simply picks the new voice's warm instance
+                if self.voice_pool is None and self.current_session.tts:
                     try:
                         # Run update_options in a thread to avoid blocking the event loop
                         await asyncio.to_thread(self.current_session.tts.update_options, voice=new_voice_id)
@@ -199,31 +294,13 @@ class ActiveRecallCoach(Agent):
                         logger.error(f"Failed to update voice options: {e}")
                         # Don't fail the whole switch if voice fails, but log it
             
-            # Update instructions to reflect new mode
-            self.instructions = self._get_instructions()
-            
-            # Get concept details
-            concept_obj = None
-            if self.current_concept_id:
-                concept_obj = next((c for c in self.content if c["id"] == self.current_concept_id), None)
-            
-            concept_title = concept_obj["title"] if concept_obj else "Unknown Concept"
-            
-            # Construct a directive response for the LLM
-            response = f"Mode switched to {mode.upper()}. Voice is now {new_voice_id}. Concept is {concept_title}.\n\n"
-            
-            if mode == "learn" and concept_obj:
-                response += f"ACTION REQUIRED: Explain the concept '{concept_title}' to the user using this summary:\n"
-                response += f"'{concept_obj['summary']}'\n"
-                response += "Then ask if they want to be quizzed."
-                
-            elif mode == "quiz" and concept_obj:
-                response += f"ACTION REQUIRED: Ask the user this question (or similar) to test their knowledge:\n"
-                response += f"'{concept_obj['sample_question']}'"
-                
-            elif mode == "teach_back":
-                response += f"ACTION REQUIRED: Ask the user to explain '{concept_title}' to you in their own words. Listen carefully."
-                
+            # Instructions stay untouched so the cached prompt prefix survives the switch.
+            # The new mode reaches the LLM as this tool's result, appended at the end of the
+            # conversation (a system message would be hoisted into Gemini's system_instruction).
+            # Usually it was already rendered from the interim transcript.
+            response = self.prefetcher.take("switch_mode", (mode, self.current_concept_id))
+            if response is None:
+                response = self._render_switch(mode, self.current_concept_id)
             return response
             
         except Exception as e:
@@ -231,6 +308,34 @@ class ActiveRecallCoach(Agent):
             logger.error(traceback.format_exc())
             return f"Error switching mode: {e}"
 
+    async def tts_node(self, text: AsyncIterable[str], model_settings: ModelSettings):
+        """Speak with the pooled TTS of the current mode's voice"""
+        if self.voice_pool is None:
+            async for frame in Agent.default.tts_node(self, text, model_settings):
+                yield frame
+            return
+
+        voice_tts = self.voice_pool.get(self.voice_ids.get(self.current_mode, self.voice_ids["learn"]))
+        if not voice_tts.capabilities.streaming:
+            voice_tts = tts.StreamAdapter(
+                tts=voice_tts,
+                sentence_tokenizer=tokenize.blingfire.SentenceTokenizer(retain_format=True),
+            )
+
+        async with voice_tts.stream(conn_options=self.session.conn_options.tts_conn_options) as stream:
+
+            async def _forward_input() -> None:
+                async for chunk in text:
+                    stream.push_text(chunk)
+                stream.end_input()
+
+            forward_task = asyncio.create_task(_forward_input())
+            try:
+                async for ev in stream:
+                    yield ev.frame
+            finally:
+                await utils.aio.cancel_and_wait(forward_task)
+
     @function_tool
     async def evaluate_teach_back(
         self,
@@ -249,7 +354,18 @@ class ActiveRecallCoach(Agent):
 
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    # VAD and noise cancellation loaded and warmed, turn detector files checked, all timed
+    prewarm_models(proc)
+    # Open the compiled curriculum, or parse the JSON content, once per process
+    if CURRICULUM_PATH.exists():
+        try:
+            # Files without the compiled resolver tables build it here rather than on the first turn
+            get_curriculum_store(CURRICULUM_PATH).resolver
+        except Exception as e:
+            logger.error(f"Error opening compiled curriculum {CURRICULUM_PATH}: {e}")
+    else:
+        content_cache.preload([CONTENT_PATH])
+    proc.userdata["content_cache"] = content_cache
 
 
 async def entrypoint(ctx: JobContext):
@@ -259,41 +375,99 @@ async def entrypoint(ctx: JobContext):
         }
 
         # Initialize the agent
-        coach = ActiveRecallCoach()
+        coach = ActiveRecallCoach(content_cache=ctx.proc.userdata["content_cache"])
+
+        # One TTS per mode voice, each opening its provider connection right away.
+        # Sentences spoken before (summaries, quiz questions) play from the local audio cache.
+        audio_cache = get_audio_cache()
+        voice_pool = VoicePool(
+            lambda voice: CachedTTS(
+                murf.TTS(voice=voice, style="Conversation"),
+                audio_cache,
+                voice=voice,
+                style="Conversation",
+                static_lines=coach.static_lines,
+            ),
+            coach.voice_ids.values(),
+        )
+        voice_pool.prewarm()
+        coach.voice_pool = voice_pool
 
+        # Gemini TTFT swings from turn to turn, late first tokens are hedged with a lighter model
+        session_llm = HedgedLLM(
+            google.LLM(model="gemini-2.5-flash"),
+            google.LLM(model=os.getenv("LLM_HEDGE_MODEL", "gemini-2.5-flash-lite")),
+        )
+        # The turn detector's cold first inference runs now instead of on the user's first turn
+        turn_detector = MultilingualModel()
+        turn_detector_warmup = asyncio.create_task(warm_turn_detector(turn_detector))
+        ctx.add_shutdown_callback(lambda: utils.aio.cancel_and_wait(turn_detector_warmup))
         session = AgentSession(
             stt=deepgram.STT(model="nova-3"),
-            llm=google.LLM(
-                model="gemini-2.5-flash",
-            ),
+            llm=session_llm,
             # Start with the learn voice
-            tts=murf.TTS(voice=coach.voice_ids["learn"], style="Conversation"),
-            turn_detection=MultilingualModel(),
+            tts=voice_pool.get(coach.voice_ids["learn"]),
+            turn_detection=turn_detector,
             vad=ctx.proc.userdata["vad"],
             preemptive_generation=True,
         )
         
+        # Old turns are folded into a running summary between turns, so prompt size stays flat
+        compactor = ContextCompactor(
+            coach,
+            "tutor",
+            summarizer=LLMSummarizer(google.LLM(model=os.getenv("SUMMARY_MODEL", "gemini-2.5-flash-lite")), "tutor"),
+        )
+        compactor.attach(session)
+        # Mode and concept switches are prepared from interim transcripts
+        coach.prefetcher.attach(session)
+
         # Give the agent access to the session
         coach.current_session = session
+        # The session only reports metrics for its own TTS, forward the other voices
+        voice_pool.forward_metrics(
+            lambda tts_metrics: session.emit("metrics_collected", MetricsCollectedEvent(metrics=tts_metrics)),
+            skip=session.tts,
+        )
 
         usage_collector = metrics.UsageCollector()
+        first_turn = FirstTurnTimer()
+        cached_ratio = CachedTokenRatio()
 
         @session.on("metrics_collected")
         def _on_metrics_collected(ev: MetricsCollectedEvent):
             metrics.log_metrics(ev.metrics)
             usage_collector.collect(ev.metrics)
+            first_turn.collect(ev.metrics)
+            if isinstance(ev.metrics, metrics.LLMMetrics):
+                cached_ratio.collect(ev.metrics)
+                logger.info(f"Prompt cached tokens: {ev.metrics.prompt_cached_tokens}/{ev.metrics.prompt_tokens}")
 
         async def log_usage():
             summary = usage_collector.get_summary()
             logger.info(f"Usage: {summary}")
+            logger.info(f"Prompt cache: {prompt_cache.stats()}")
+            logger.info(f"Concept resolution: {resolution_metrics.stats()}")
+            logger.info(f"Provider prefix cache: {cached_ratio.stats()}")
+            logger.info(f"Voice switch TTFB: {voice_pool.tracker.stats()}")
+            logger.info(f"Audio cache: {audio_cache.stats()}")
+            logger.info(f"LLM hedging: {session_llm.stats()}")
+            logger.info(f"Startup timings: {startup_timings.stats()}")
+            if isinstance(ctx.proc.userdata["vad"], BatchedVAD):
+                logger.info(f"VAD batching: {ctx.proc.userdata['vad'].batcher.stats()}")
+            logger.info(f"Context compaction: {compactor.stats()}")
+            logger.info(f"Speculative prefetch: {coach.prefetcher.stats()}")
 
         ctx.add_shutdown_callback(log_usage)
+        ctx.add_shutdown_callback(voice_pool.aclose)
+        ctx.add_shutdown_callback(compactor.aclose)
+        ctx.add_shutdown_callback(coach.prefetcher.aclose)
 
         await session.start(
             agent=coach,
             room=ctx.room,
             room_input_options=RoomInputOptions(
-                noise_cancellation=noise_cancellation.BVC(),
+                noise_cancellation=ctx.proc.userdata["noise_cancellation"],
             ),
         )
 
@@ -306,4 +480,4 @@ async def entrypoint(ctx: JobContext):
 
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
+    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm, job_executor_type=job_executor_type()))
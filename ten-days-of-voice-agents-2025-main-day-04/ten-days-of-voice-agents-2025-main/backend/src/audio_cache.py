@@ -0,0 +1,424 @@
+"""
+Content-addressed cache of synthesized speech.
+Audio is stored on disk as WAV, keyed by (provider, voice, style, sample rate,
+normalized text), with LRU eviction under a size cap. CachedTTS wraps any TTS and
+plays sentences it has already synthesized straight from disk, so fixed lines
+like greetings or quiz questions cost no provider call and start almost instantly.
+Only sentences of known static lines are written, so whatever the LLM composes
+(a caller's name or email read back) never reaches the disk.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+import wave
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from livekit.agents import APIConnectOptions, tokenize, tts, utils
+from livekit.agents.metrics import TTSMetrics
+from livekit.agents.metrics.base import Metadata
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS
+
+logger = logging.getLogger("agent")
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "voice-agents" / "audio"
+
+
+def normalize_text(text: str) -> str:
+    """Whitespace and unicode forms don't change the audio, case and punctuation might"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def cache_key(provider: str, voice: str, style: Optional[str], sample_rate: int, text: str) -> str:
+    payload = json.dumps([provider, voice, style or "", sample_rate, normalize_text(text)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """WAV files under `root`, least recently played evicted first once over `max_bytes`"""
+
+    def __init__(self, root: Optional[Path] = None, max_bytes: Optional[int] = None):
+        self.root = Path(root or os.getenv("AUDIO_CACHE_DIR", DEFAULT_CACHE_DIR))
+        self.max_bytes = max_bytes or int(os.getenv("AUDIO_CACHE_MAX_MB", "256")) * 1024 * 1024
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._total_bytes = sum(size for _, size, _ in self._scan())
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.wav"
+
+    def _scan(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        for path in self.root.glob("*/*.wav"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def contains(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def get(self, key: str, sample_rate: int, num_channels: int) -> Optional[bytes]:
+        """PCM s16le for `key`, or None. A hit refreshes the entry's recency."""
+        path = self._path(key)
+        try:
+            with wave.open(str(path), "rb") as f:
+                if f.getframerate() != sample_rate or f.getnchannels() != num_channels:
+                    raise ValueError("format mismatch")
+                pcm = f.readframes(f.getnframes())
+            # Recency lives in the mtime so every process sees the same LRU order
+            os.utime(path)
+        except (FileNotFoundError, EOFError, ValueError, wave.Error):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return pcm
+
+    def put(self, key: str, pcm: bytes, sample_rate: int, num_channels: int) -> None:
+        if not pcm:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temp file and rename, readers never see a half-written WAV
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, wave.open(raw, "wb") as f:
+                f.setnchannels(num_channels)
+                f.setsampwidth(2)
+                f.setframerate(sample_rate)
+                f.writeframes(pcm)
+            os.replace(tmp, path)
+        except Exception:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+        with self._lock:
+            self._total_bytes += path.stat().st_size
+            over_cap = self._total_bytes > self.max_bytes
+        if over_cap:
+            self.evict()
+
+    def evict(self) -> None:
+        """Drop least recently used files until the cache is at 90% of its cap"""
+        with self._lock:
+            # Other processes write here too, so re-measure instead of trusting our counter
+            entries = sorted(self._scan())
+            total = sum(size for _, size, _ in entries)
+            target = int(self.max_bytes * 0.9)
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                self.evictions += 1
+            self._total_bytes = total
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "bytes": self._total_bytes,
+            }
+
+
+_caches: Dict[Path, AudioCache] = {}
+
+
+def get_audio_cache(root: Optional[Path] = None) -> AudioCache:
+    """Process-wide cache per directory"""
+    root = Path(root or os.getenv("AUDIO_CACHE_DIR", DEFAULT_CACHE_DIR)).resolve()
+    cache = _caches.get(root)
+    if cache is None:
+        cache = _caches[root] = AudioCache(root)
+    return cache
+
+
+class StaticLines:
+    """Lines spoken verbatim from content files (greetings, concept summaries, quiz questions)"""
+
+    def __init__(self, texts: Iterable[str] = ()):
+        self._texts: Set[str] = set()
+        self._lock = threading.Lock()
+        self.add(*texts)
+
+    def add(self, *texts: str) -> None:
+        with self._lock:
+            # Padded so a match has to start and end on word boundaries, "Ram." isn't part of "program."
+            self._texts.update(f" {normalize_text(text)} " for text in texts if text and text.strip())
+
+    def __contains__(self, sentence: str) -> bool:
+        """Whether `sentence` is part of one of the lines"""
+        needle = f" {normalize_text(sentence)} "
+        with self._lock:
+            texts = list(self._texts)
+        return any(needle in text for text in texts)
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+
+class CachedTTS(tts.TTS):
+    """
+    Wraps a TTS and answers sentence by sentence from an AudioCache.
+    Missed sentences go to the wrapped TTS (streaming if it can). Only those that
+    are part of `static_lines` are stored, without it nothing is written.
+    Each lookup emits a TTSMetrics labelled audio_cache.hit or audio_cache.miss with
+    no characters, so usage totals keep counting only what the provider synthesized.
+    """
+
+    def __init__(
+        self,
+        wrapped: tts.TTS,
+        cache: AudioCache,
+        *,
+        voice: str,
+        style: Optional[str] = None,
+        static_lines: Optional[StaticLines] = None,
+        sentence_tokenizer: Optional[tokenize.SentenceTokenizer] = None,
+    ) -> None:
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=True),
+            sample_rate=wrapped.sample_rate,
+            num_channels=wrapped.num_channels,
+        )
+        self._wrapped = wrapped
+        self._cache = cache
+        self.voice = voice
+        self.style = style
+        self.static_lines = static_lines if static_lines is not None else StaticLines()
+        self._sentence_tokenizer = sentence_tokenizer or tokenize.blingfire.SentenceTokenizer(retain_format=True)
+        self._wrapped.on("metrics_collected", self._on_metrics_collected)
+
+    @property
+    def model(self) -> str:
+        return self._wrapped.model
+
+    @property
+    def provider(self) -> str:
+        return self._wrapped.provider
+
+    @property
+    def cache(self) -> AudioCache:
+        return self._cache
+
+    def key_for(self, text: str) -> str:
+        return cache_key(self.provider, self.voice, self.style, self.sample_rate, text)
+
+    def _on_metrics_collected(self, *args: Any, **kwargs: Any) -> None:
+        self.emit("metrics_collected", *args, **kwargs)
+
+    def _emit_lookup(self, hit: bool, ttfb: float, audio_duration: float) -> None:
+        self.emit(
+            "metrics_collected",
+            TTSMetrics(
+                label=f"audio_cache.{'hit' if hit else 'miss'}",
+                request_id=utils.shortuuid(),
+                timestamp=time.time(),
+                ttfb=ttfb,
+                duration=ttfb,
+                audio_duration=audio_duration,
+                cancelled=False,
+                characters_count=0,
+                streamed=False,
+                metadata=Metadata(model_name=self.model, model_provider=self.provider),
+            ),
+        )
+
+    async def speak(self, text: str, output_emitter: tts.AudioEmitter, conn_options: APIConnectOptions) -> float:
+        """Push the audio for one sentence, from the cache or the provider. Returns its duration."""
+        start = time.perf_counter()
+        key = self.key_for(text)
+        bytes_per_second = self.sample_rate * self.num_channels * 2
+
+        pcm = await asyncio.to_thread(self._cache.get, key, self.sample_rate, self.num_channels)
+        if pcm is not None:
+            output_emitter.push(pcm)
+            duration = len(pcm) / bytes_per_second
+            self._emit_lookup(True, time.perf_counter() - start, duration)
+            return duration
+
+        # ttfb -1 marks "no audio from the cache", the provider reports its own TTFB
+        self._emit_lookup(False, -1.0, 0.0)
+        chunks: List[bytes] = []
+        if self._wrapped.capabilities.streaming:
+            async with self._wrapped.stream(conn_options=conn_options) as stream:
+                stream.push_text(text)
+                stream.end_input()
+                async for audio in stream:
+                    data = audio.frame.data.tobytes()
+                    chunks.append(data)
+                    output_emitter.push(data)
+        else:
+            async with self._wrapped.synthesize(text, conn_options=conn_options) as stream:
+                async for audio in stream:
+                    data = audio.frame.data.tobytes()
+                    chunks.append(data)
+                    output_emitter.push(data)
+
+        pcm = b"".join(chunks)
+        if text in self.static_lines:
+            try:
+                await asyncio.to_thread(self._cache.put, key, pcm, self.sample_rate, self.num_channels)
+            except OSError as e:
+                logger.error(f"Failed to cache synthesized audio: {e}")
+        return len(pcm) / bytes_per_second
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "SentenceChunkedStream":
+        return SentenceChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def stream(self, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> "SentenceSynthesizeStream":
+        return SentenceSynthesizeStream(tts=self, conn_options=conn_options)
+
+    def prewarm(self) -> None:
+        self._wrapped.prewarm()
+
+    async def aclose(self) -> None:
+        self._wrapped.off("metrics_collected", self._on_metrics_collected)
+        await self._wrapped.aclose()
+
+
+# The wrapped TTS already reports provider metrics, retries happen there too
+_NO_RETRY = APIConnectOptions(max_retry=0, timeout=DEFAULT_API_CONNECT_OPTIONS.timeout)
+
+
+class SentenceChunkedStream(tts.ChunkedStream):
+    """synthesize() for any wrapper TTS that implements speak()"""
+
+    def __init__(self, *, tts: CachedTTS, input_text: str, conn_options: APIConnectOptions) -> None:
+        super().__init__(tts=tts, input_text=input_text, conn_options=_NO_RETRY)
+        self._tts: CachedTTS = tts
+        self._wrapped_conn_options = conn_options
+
+    async def _metrics_monitor_task(self, event_aiter) -> None:
+        pass  # The wrapper and the TTS it wraps emit their own metrics
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=self._tts.sample_rate,
+            num_channels=self._tts.num_channels,
+            mime_type="audio/pcm",
+        )
+        if self.input_text.strip():
+            await self._tts.speak(self.input_text, output_emitter, self._wrapped_conn_options)
+        output_emitter.flush()
+
+
+# Sentences being synthesized at once: the one playing and the next
+LOOKAHEAD = 2
+
+
+class _SentenceAudio:
+    """Takes the AudioEmitter's place while a sentence is synthesized ahead of playback"""
+
+    def __init__(self) -> None:
+        self.chunks: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
+
+    def push(self, data: bytes) -> None:
+        self.chunks.put_nowait(data)
+
+
+class SentenceSynthesizeStream(tts.SynthesizeStream):
+    """
+    stream() for any wrapper TTS that implements speak(). Sentence N+1 is
+    synthesized while sentence N plays, audio still goes out in order.
+    """
+
+    def __init__(self, *, tts: CachedTTS, conn_options: APIConnectOptions) -> None:
+        super().__init__(tts=tts, conn_options=_NO_RETRY)
+        self._tts: CachedTTS = tts
+        self._wrapped_conn_options = conn_options
+
+    async def _metrics_monitor_task(self, event_aiter) -> None:
+        pass  # The wrapper and the TTS it wraps emit their own metrics
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        sent_stream = self._tts._sentence_tokenizer.stream()
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=self._tts.sample_rate,
+            num_channels=self._tts.num_channels,
+            mime_type="audio/pcm",
+            stream=True,
+        )
+        output_emitter.start_segment(segment_id=utils.shortuuid())
+
+        async def _forward_input() -> None:
+            async for data in self._input_ch:
+                if isinstance(data, self._FlushSentinel):
+                    sent_stream.flush()
+                    continue
+                sent_stream.push_text(data)
+            sent_stream.end_input()
+
+        sentences: "asyncio.Queue[Optional[Tuple[str, Optional[_SentenceAudio], Optional[asyncio.Task]]]]" = asyncio.Queue()
+        lookahead = asyncio.Semaphore(LOOKAHEAD)
+        speaking: List[asyncio.Task] = []
+
+        async def _speak(text: str, audio: _SentenceAudio) -> float:
+            try:
+                return await self._tts.speak(text, audio, self._wrapped_conn_options)
+            finally:
+                audio.chunks.put_nowait(None)
+
+        async def _synthesize() -> None:
+            async for ev in sent_stream:
+                if not ev.token.strip():
+                    sentences.put_nowait((ev.token, None, None))
+                    continue
+                await lookahead.acquire()
+                audio = _SentenceAudio()
+                task = asyncio.create_task(_speak(ev.token, audio))
+                speaking.append(task)
+                sentences.put_nowait((ev.token, audio, task))
+            sentences.put_nowait(None)
+
+        async def _play() -> None:
+            from livekit.agents.voice.io import TimedString
+
+            duration = 0.0
+            while (sentence := await sentences.get()) is not None:
+                token, audio, task = sentence
+                output_emitter.push_timed_transcript(TimedString(text=token, start_time=duration))
+                if audio is None or task is None:
+                    continue
+                try:
+                    while (data := await audio.chunks.get()) is not None:
+                        output_emitter.push(data)
+                    duration += await task
+                finally:
+                    lookahead.release()
+                output_emitter.flush()
+
+        tasks = [
+            asyncio.create_task(_forward_input()),
+            asyncio.create_task(_synthesize()),
+            asyncio.create_task(_play()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await sent_stream.aclose()
+            await utils.aio.cancel_and_wait(*tasks, *speaking)
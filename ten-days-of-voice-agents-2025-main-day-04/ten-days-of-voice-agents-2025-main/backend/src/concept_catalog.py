@@ -0,0 +1,313 @@
+"""
+Concept catalog for the Active Recall Coach.
+Concepts are indexed by id and by alias (title, spaced id, singular/plural), so
+switch_mode resolves a concept in constant time however large the curriculum is.
+ConceptResolver adds precomputed stemmed-token and trigram indexes on top, so
+near-misses like "for loop" or "varibles" resolve locally instead of costing the
+LLM another turn.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from stemmer import stem_word
+
+logger = logging.getLogger("agent")
+
+Concept = Mapping[str, Any]
+
+
+def normalize(key: str) -> str:
+    """'For-Loops' -> 'for loops'"""
+    return re.sub(r"[\s_\-]+", " ", key.strip().lower())
+
+
+def aliases_for(concept: Concept) -> List[str]:
+    names = [concept["id"], concept.get("title", "")]
+    names.extend(concept.get("aliases", ()))
+
+    aliases = []
+    for name in filter(None, names):
+        alias = normalize(name)
+        aliases.append(alias)
+        # "loop" finds "loops" and "variable" finds "variables"
+        aliases.append(alias[:-1] if alias.endswith("s") else alias + "s")
+    return aliases
+
+
+# Filler the LLM tends to wrap concept names in ("what are loops", "intro to functions")
+STOPWORDS = {
+    "a", "an", "the", "of", "on", "about", "in", "to", "and", "what", "is", "are", "how",
+    "explain", "me", "concept", "topic", "intro", "introduction", "basics",
+}
+
+
+def stems(text: str) -> Tuple[str, ...]:
+    """'Intro to For-Loops' -> ('for', 'loop')"""
+    return tuple(stem_word(token) for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in STOPWORDS)
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {normalize(text)} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass(frozen=True)
+class Resolution:
+    concept_id: Optional[str]
+    # exact, alias, stemmed, partial, fuzzy or miss
+    outcome: str
+    score: float = 1.0
+
+
+class ResolutionMetrics:
+    """Process-wide counters for how concept ids passed by the LLM got resolved"""
+
+    def __init__(self, window: int = 1000):
+        self.outcomes: Counter = Counter()
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, resolution: Resolution, elapsed: float) -> None:
+        with self._lock:
+            self.outcomes[resolution.outcome] += 1
+            self._latencies.append(elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            outcomes = dict(self.outcomes)
+
+        def pct(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1_000_000, 1)
+
+        return {
+            "outcomes": outcomes,
+            "latency_p50_us": pct(0.5),
+            "latency_p95_us": pct(0.95),
+        }
+
+
+# Singleton instance, shared by every session in the process
+resolution_metrics = ResolutionMetrics()
+
+
+class BaseResolver:
+    """
+    Resolves free-form concept names in order: exact id, alias, same stemmed tokens,
+    all stemmed tokens contained in a name, then trigram similarity.
+    """
+
+    threshold = 0.5
+
+    def _match(self, key: str) -> Resolution:
+        raise NotImplementedError
+
+    def spot(self, text: str) -> Optional[str]:
+        """
+        Concept mentioned anywhere in free text ("um, quiz me on for loops please"):
+        the most specific name whose stems all occur in it. Not recorded in metrics.
+        """
+        raise NotImplementedError
+
+    def resolve(self, key: Optional[str]) -> Resolution:
+        start = time.perf_counter()
+        resolution = self._match(key) if key else Resolution(None, "miss", 0.0)
+        elapsed = time.perf_counter() - start
+
+        resolution_metrics.record(resolution, elapsed)
+        logger.info(
+            f"Concept resolution: '{key}' -> {resolution.concept_id} "
+            f"({resolution.outcome}, score {resolution.score}, {elapsed * 1_000_000:.0f}us)"
+        )
+        return resolution
+
+
+class ConceptResolver(BaseResolver):
+    """In-memory indexes over (concept_id, name) pairs"""
+
+    def __init__(self, names: Iterable[Tuple[str, str]], threshold: float = 0.5):
+        """`names` are (concept_id, name) pairs, ids, titles and aliases alike"""
+        self.threshold = threshold
+        self._ids: Set[str] = set()
+        self._aliases: Dict[str, str] = {}
+        self._stemmed: Dict[Tuple[str, ...], str] = {}
+        self._names: List[Tuple[str, Set[str], int]] = []
+        self._by_stem: Dict[str, Set[int]] = defaultdict(set)
+        self._by_trigram: Dict[str, List[int]] = defaultdict(list)
+
+        pairs = list(names)
+        for concept_id, _ in pairs:
+            self._ids.add(concept_id)
+
+        for concept_id, name in pairs:
+            if not name:
+                continue
+            self._aliases.setdefault(normalize(name), concept_id)
+            name_stems = stems(name)
+            if not name_stems:
+                continue
+            self._stemmed.setdefault(tuple(sorted(set(name_stems))), concept_id)
+
+            idx = len(self._names)
+            grams = trigrams(name)
+            self._names.append((concept_id, grams, len(set(name_stems))))
+            for stem in name_stems:
+                self._by_stem[stem].add(idx)
+            for gram in grams:
+                self._by_trigram[gram].append(idx)
+
+    def _match(self, key: str) -> Resolution:
+        if key in self._ids:
+            return Resolution(key, "exact")
+
+        concept_id = self._aliases.get(normalize(key))
+        if concept_id:
+            return Resolution(concept_id, "alias")
+
+        key_stems = stems(key)
+        if key_stems:
+            concept_id = self._stemmed.get(tuple(sorted(set(key_stems))))
+            if concept_id:
+                return Resolution(concept_id, "stemmed")
+
+            # "agentic ai" finds "Building Agentic AI Systems", the tightest name wins
+            candidates = set.intersection(*(self._by_stem.get(stem, set()) for stem in key_stems))
+            if candidates:
+                best = min(candidates, key=lambda idx: (self._names[idx][2], idx))
+                return Resolution(self._names[best][0], "partial", round(len(key_stems) / self._names[best][2], 3))
+
+            # "for loops" finds "Loops", the most specific fully covered name wins
+            hits: Counter = Counter()
+            for stem in set(key_stems):
+                for idx in self._by_stem.get(stem, ()):
+                    hits[idx] += 1
+            covered = [idx for idx, count in hits.items() if count == self._names[idx][2]]
+            if covered:
+                best = max(covered, key=lambda idx: (self._names[idx][2], -idx))
+                return Resolution(self._names[best][0], "partial", round(self._names[best][2] / len(set(key_stems)), 3))
+
+        key_grams = trigrams(key)
+        shared: Counter = Counter()
+        for gram in key_grams:
+            for idx in self._by_trigram.get(gram, ()):
+                shared[idx] += 1
+
+        best_idx, best_score = None, 0.0
+        for idx, count in shared.items():
+            # Dice coefficient over character trigrams
+            score = 2 * count / (len(key_grams) + len(self._names[idx][1]))
+            if score > best_score:
+                best_idx, best_score = idx, score
+        if best_idx is not None and best_score >= self.threshold:
+            return Resolution(self._names[best_idx][0], "fuzzy", round(best_score, 3))
+
+        return Resolution(None, "miss", round(best_score, 3))
+
+    def spot(self, text: str) -> Optional[str]:
+        text_stems = set(stems(text))
+        hits: Counter = Counter()
+        for stem in text_stems:
+            for idx in self._by_stem.get(stem, ()):
+                hits[idx] += 1
+        covered = [idx for idx, count in hits.items() if count == self._names[idx][2]]
+        if not covered:
+            return None
+        return self._names[max(covered, key=lambda idx: (self._names[idx][2], -idx))][0]
+
+
+def concept_names(concepts: Iterable[Concept]) -> Iterator[Tuple[str, str]]:
+    for concept in concepts:
+        yield concept["id"], concept["id"]
+        yield concept["id"], concept.get("title", "")
+        for alias in concept.get("aliases", ()):
+            yield concept["id"], alias
+
+
+class ConceptCatalog:
+    """Read-only view of a curriculum with id and alias indexes"""
+
+    def __init__(self, concepts: Sequence[Concept]):
+        self._concepts = tuple(concepts)
+        self._by_id: Dict[str, Concept] = {}
+        self._by_alias: Dict[str, Concept] = {}
+
+        for concept in self._concepts:
+            self._by_id[concept["id"]] = concept
+        for concept in self._concepts:
+            for alias in aliases_for(concept):
+                # Exact ids always win over another concept's alias
+                if alias not in self._by_id:
+                    self._by_alias.setdefault(alias, concept)
+
+        self.resolver = ConceptResolver(concept_names(self._concepts))
+
+    def get(self, key: Optional[str]) -> Optional[Concept]:
+        if not key:
+            return None
+        return self._by_id.get(key) or self._by_alias.get(normalize(key))
+
+    def resolve(self, key: Optional[str]) -> Optional[Concept]:
+        """Like get, but also accepts near-misses. Every outcome is recorded in resolution_metrics."""
+        resolution = self.resolver.resolve(key)
+        return self._by_id.get(resolution.concept_id) if resolution.concept_id else None
+
+    def spot(self, text: str) -> Optional[str]:
+        """Id of the concept mentioned in a transcript, if any"""
+        return self.resolver.spot(text)
+
+    def first(self) -> Optional[Concept]:
+        return self._concepts[0] if self._concepts else None
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self._by_id)
+
+    def titles(self, limit: int = 50) -> str:
+        """Compact one-line list of concepts for the prompt, capped so big curricula don't blow it up"""
+        shown = ", ".join(f"{c.get('title', c['id'])} ({c['id']})" for c in self._concepts[:limit])
+        if len(self._concepts) > limit:
+            shown += f", and {len(self._concepts) - limit} more"
+        return shown
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._concepts)
+
+    def __iter__(self) -> Iterator[Concept]:
+        return iter(self._concepts)
+
+
+_catalogs: Dict[str, ConceptCatalog] = {}
+_lock = threading.Lock()
+
+
+def get_concept_catalog(content_digest: Optional[str], concepts: Sequence[Concept]) -> ConceptCatalog:
+    """Process-wide catalog per content version"""
+    if content_digest is None:
+        return ConceptCatalog(concepts)
+    with _lock:
+        catalog = _catalogs.get(content_digest)
+        if catalog is None:
+            catalog = _catalogs[content_digest] = ConceptCatalog(concepts)
+        return catalog
@@ -0,0 +1,356 @@
+"""
+Compiled, on-disk curriculum for the Active Recall Coach.
+A curriculum JSON array is compiled once into a SQLite file with id and alias
+indexes, plus the concept resolver's alias, stem and trigram tables. Job processes
+open it read-only and memory-mapped, so opening costs the same for 30 or 30k
+concepts, rows are only read when a concept is looked up or resolved, and all
+processes share the pages through the OS page cache.
+
+Compile with:
+    python src/curriculum_store.py ../shared-data/day4_tutor_content.json ../shared-data/day4_tutor_content.db
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+from concept_catalog import (
+    BaseResolver,
+    Concept,
+    ConceptResolver,
+    Resolution,
+    aliases_for,
+    concept_names,
+    normalize,
+    stems,
+    trigrams,
+)
+
+logger = logging.getLogger("agent")
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE concepts (
+    position INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    title TEXT,
+    summary TEXT,
+    sample_question TEXT,
+    extra TEXT
+);
+CREATE TABLE aliases (alias TEXT PRIMARY KEY, concept_id TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE resolver_aliases (name TEXT PRIMARY KEY, concept_id TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE resolver_stemmed (stems TEXT PRIMARY KEY, concept_id TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE resolver_names (
+    idx INTEGER PRIMARY KEY,
+    concept_id TEXT NOT NULL,
+    stem_count INTEGER NOT NULL,
+    gram_count INTEGER NOT NULL
+);
+CREATE TABLE resolver_stems (stem TEXT NOT NULL, idx INTEGER NOT NULL, PRIMARY KEY (stem, idx)) WITHOUT ROWID;
+CREATE TABLE resolver_grams (gram TEXT NOT NULL, idx INTEGER NOT NULL, PRIMARY KEY (gram, idx)) WITHOUT ROWID;
+"""
+
+CORE_FIELDS = ("id", "title", "summary", "sample_question")
+
+
+def compile_curriculum(source_path: Path, output_path: Path) -> int:
+    """Compile a curriculum JSON array into `output_path`. Returns the number of concepts."""
+    source_path, output_path = Path(source_path), Path(output_path)
+    raw = source_path.read_bytes()
+    concepts = json.loads(raw)
+
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    conn = sqlite3.connect(str(tmp_path))
+    try:
+        conn.executescript(SCHEMA)
+        conn.executemany(
+            "INSERT INTO concepts (position, id, title, summary, sample_question, extra) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    position,
+                    concept["id"],
+                    concept.get("title"),
+                    concept.get("summary"),
+                    concept.get("sample_question"),
+                    json.dumps({k: v for k, v in concept.items() if k not in CORE_FIELDS}),
+                )
+                for position, concept in enumerate(concepts)
+            ),
+        )
+        # Same precedence as ConceptCatalog: ids first, then the first concept claiming an alias
+        ids = {concept["id"] for concept in concepts}
+        conn.executemany(
+            "INSERT OR IGNORE INTO aliases (alias, concept_id) VALUES (?, ?)",
+            (
+                (alias, concept["id"])
+                for concept in concepts
+                for alias in aliases_for(concept)
+                if alias not in ids
+            ),
+        )
+        _compile_resolver(conn, concepts)
+        conn.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?)",
+            [("digest", hashlib.sha256(raw).hexdigest()), ("count", str(len(concepts)))],
+        )
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    # Running workers keep reading the old file until they reopen
+    os.replace(tmp_path, output_path)
+    return len(concepts)
+
+
+def _compile_resolver(conn: sqlite3.Connection, concepts: List[Concept]) -> None:
+    """The tables ConceptResolver would build in memory, with the same names and precedence as ConceptCatalog"""
+    aliases, stemmed, names, name_stems, name_grams = [], [], [], [], []
+    for concept_id, name in concept_names(concepts):
+        if not name:
+            continue
+        aliases.append((normalize(name), concept_id))
+        name_stems_set = set(stems(name))
+        if not name_stems_set:
+            continue
+        stemmed.append((" ".join(sorted(name_stems_set)), concept_id))
+        idx = len(names)
+        grams = trigrams(name)
+        names.append((idx, concept_id, len(name_stems_set), len(grams)))
+        name_stems.extend((stem, idx) for stem in name_stems_set)
+        name_grams.extend((gram, idx) for gram in grams)
+
+    # OR IGNORE keeps the first concept claiming a name, like setdefault in ConceptResolver
+    conn.executemany("INSERT OR IGNORE INTO resolver_aliases (name, concept_id) VALUES (?, ?)", aliases)
+    conn.executemany("INSERT OR IGNORE INTO resolver_stemmed (stems, concept_id) VALUES (?, ?)", stemmed)
+    conn.executemany("INSERT INTO resolver_names (idx, concept_id, stem_count, gram_count) VALUES (?, ?, ?, ?)", names)
+    conn.executemany("INSERT INTO resolver_stems (stem, idx) VALUES (?, ?)", name_stems)
+    conn.executemany("INSERT INTO resolver_grams (gram, idx) VALUES (?, ?)", name_grams)
+
+
+def _placeholders(values: Sequence[Any]) -> str:
+    return ", ".join("?" * len(values))
+
+
+class StoredResolver(BaseResolver):
+    """ConceptResolver's lookups as queries on the compiled tables, nothing is built at runtime"""
+
+    def __init__(self, fetch_all: Callable[[str, tuple], List[sqlite3.Row]], threshold: float = 0.5):
+        self._fetch_all = fetch_all
+        self.threshold = threshold
+
+    def _first(self, query: str, params: tuple) -> Optional[sqlite3.Row]:
+        rows = self._fetch_all(query, params)
+        return rows[0] if rows else None
+
+    def _covered(self, distinct_stems: Set[str]) -> Optional[sqlite3.Row]:
+        """The most specific name whose stems are all among `distinct_stems`"""
+        return self._first(
+            "SELECT n.concept_id, n.stem_count FROM resolver_stems s JOIN resolver_names n ON n.idx = s.idx "
+            f"WHERE s.stem IN ({_placeholders(distinct_stems)}) GROUP BY s.idx HAVING COUNT(*) = n.stem_count "
+            "ORDER BY n.stem_count DESC, s.idx LIMIT 1",
+            tuple(distinct_stems),
+        )
+
+    def _match(self, key: str) -> Resolution:
+        if self._first("SELECT 1 FROM concepts WHERE id = ?", (key,)):
+            return Resolution(key, "exact")
+
+        row = self._first("SELECT concept_id FROM resolver_aliases WHERE name = ?", (normalize(key),))
+        if row:
+            return Resolution(row["concept_id"], "alias")
+
+        key_stems = stems(key)
+        if key_stems:
+            distinct = set(key_stems)
+            row = self._first("SELECT concept_id FROM resolver_stemmed WHERE stems = ?", (" ".join(sorted(distinct)),))
+            if row:
+                return Resolution(row["concept_id"], "stemmed")
+
+            # "agentic ai" finds "Building Agentic AI Systems", the tightest name wins
+            row = self._first(
+                "SELECT concept_id, stem_count FROM resolver_names WHERE idx IN ("
+                f"SELECT idx FROM resolver_stems WHERE stem IN ({_placeholders(distinct)}) "
+                "GROUP BY idx HAVING COUNT(*) = ?) ORDER BY stem_count, idx LIMIT 1",
+                (*distinct, len(distinct)),
+            )
+            if row:
+                return Resolution(row["concept_id"], "partial", round(len(key_stems) / row["stem_count"], 3))
+
+            # "for loops" finds "Loops", the most specific fully covered name wins
+            row = self._covered(distinct)
+            if row:
+                return Resolution(row["concept_id"], "partial", round(row["stem_count"] / len(distinct), 3))
+
+        key_grams = trigrams(key)
+        # Dice coefficient over character trigrams
+        row = self._first(
+            "SELECT n.concept_id, 2.0 * COUNT(*) / (? + n.gram_count) AS score "
+            "FROM resolver_grams g JOIN resolver_names n ON n.idx = g.idx "
+            f"WHERE g.gram IN ({_placeholders(key_grams)}) GROUP BY g.idx ORDER BY score DESC, g.idx LIMIT 1",
+            (len(key_grams), *key_grams),
+        )
+        best_score = row["score"] if row else 0.0
+        if row and best_score >= self.threshold:
+            return Resolution(row["concept_id"], "fuzzy", round(best_score, 3))
+        return Resolution(None, "miss", round(best_score, 3))
+
+    def spot(self, text: str) -> Optional[str]:
+        text_stems = set(stems(text))
+        if not text_stems:
+            return None
+        row = self._covered(text_stems)
+        return row["concept_id"] if row else None
+
+
+class CurriculumStore:
+    """Read-only view of a compiled curriculum, with the same lookups as ConceptCatalog"""
+
+    def __init__(self, db_path: Path, mmap_size: int = 256 * 1024 * 1024):
+        self.db_path = Path(db_path)
+        self.mmap_size = mmap_size
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # Files compiled before the resolver tables existed get an in-memory resolver on first use
+        self._resolver: Optional[BaseResolver] = None
+        self._open()
+
+    def _open(self) -> None:
+        """Open the file at db_path, closing the connection to the file it replaced"""
+        stat = self.db_path.stat()
+        # immutable=1 skips locking entirely, the file is only ever replaced, never edited
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        compiled_resolver = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'resolver_names'"
+        ).fetchone()
+
+        with self._lock:
+            old, self._conn = self._conn, conn
+            # compile_curriculum swaps in a new file, so the inode changes even within one mtime tick
+            self.version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            self.digest: str = meta["digest"]
+            self._count = int(meta["count"])
+            self._resolver = StoredResolver(self._fetch_all) if compiled_resolver else None
+        if old is not None:
+            old.close()
+        if not compiled_resolver:
+            logger.warning(f"{self.db_path} has no resolver tables, recompile it to skip the in-memory build")
+
+    def reload_if_changed(self) -> bool:
+        """Switch to a recompiled file. Returns whether it changed."""
+        stat = self.db_path.stat()
+        if (stat.st_ino, stat.st_mtime_ns, stat.st_size) == self.version:
+            return False
+        self._open()
+        logger.info(f"Reopened recompiled curriculum {self.db_path} ({self.digest[:12]})")
+        return True
+
+    def _fetch_one(self, query: str, params: tuple) -> Optional[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()
+
+    def _fetch_all(self, query: str, params: tuple) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(query, params).fetchall()
+
+    @staticmethod
+    def _to_concept(row: sqlite3.Row) -> Concept:
+        concept: Dict[str, Any] = json.loads(row["extra"] or "{}")
+        concept.update({field: row[field] for field in CORE_FIELDS})
+        return concept
+
+    def get(self, key: Optional[str]) -> Optional[Concept]:
+        if not key:
+            return None
+        row = self._fetch_one("SELECT * FROM concepts WHERE id = ?", (key,))
+        if row is None:
+            row = self._fetch_one(
+                "SELECT concepts.* FROM aliases JOIN concepts ON concepts.id = aliases.concept_id WHERE alias = ?",
+                (normalize(key),),
+            )
+        return self._to_concept(row) if row else None
+
+    @property
+    def resolver(self) -> BaseResolver:
+        with self._lock:
+            if self._resolver is None:
+                names = self._conn.execute(
+                    "SELECT id, id FROM concepts UNION ALL SELECT id, title FROM concepts "
+                    "UNION ALL SELECT concept_id, alias FROM aliases"
+                ).fetchall()
+                self._resolver = ConceptResolver(tuple(row) for row in names)
+            return self._resolver
+
+    def resolve(self, key: Optional[str]) -> Optional[Concept]:
+        """Like get, but also accepts near-misses. Every outcome is recorded in resolution_metrics."""
+        resolution = self.resolver.resolve(key)
+        return self.get(resolution.concept_id) if resolution.concept_id else None
+
+    def spot(self, text: str) -> Optional[str]:
+        """Id of the concept mentioned in a transcript, if any"""
+        return self.resolver.spot(text)
+
+    def first(self) -> Optional[Concept]:
+        row = self._fetch_one("SELECT * FROM concepts ORDER BY position LIMIT 1", ())
+        return self._to_concept(row) if row else None
+
+    def titles(self, limit: int = 50) -> str:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, title FROM concepts ORDER BY position LIMIT ?", (limit,)
+            ).fetchall()
+        shown = ", ".join(f"{row['title'] or row['id']} ({row['id']})" for row in rows)
+        if self._count > limit:
+            shown += f", and {self._count - limit} more"
+        return shown
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_stores: Dict[Path, CurriculumStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_curriculum_store(db_path: Path) -> CurriculumStore:
+    """Process-wide store per compiled file, switched over in place once the file is recompiled"""
+    db_path = Path(db_path).resolve()
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = _stores[db_path] = CurriculumStore(db_path)
+        else:
+            store.reload_if_changed()
+        return store
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compile a tutor curriculum JSON file into a SQLite store")
+    parser.add_argument("source", type=Path, help="Curriculum JSON array")
+    parser.add_argument("output", type=Path, nargs="?", help="Output file, defaults to the source with a .db suffix")
+    args = parser.parse_args(argv)
+
+    output = args.output or args.source.with_suffix(".db")
+    count = compile_curriculum(args.source, output)
+    print(f"Compiled {count} concepts into {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Deadline-based LLM hedging across two models.
+Each turn goes to the primary model. If its first chunk hasn't arrived by the
+deadline (or it fails before producing anything), the same request goes to the
+secondary model and whichever streams first wins; the other request is cancelled.
+A winner is picked before any chunk is forwarded, so text and tool calls always
+come from exactly one model.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+
+from livekit.agents import APIConnectionError, APIConnectOptions, llm
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN, NotGivenOr
+
+logger = logging.getLogger("agent")
+
+
+class _Attempt:
+    """One model's stream for the turn, started right away"""
+
+    def __init__(self, model: llm.LLM, stream: llm.LLMStream):
+        self.model = model
+        self.stream = stream
+        self.started = time.perf_counter()
+        self.ttft: Optional[float] = None
+        self._iter = stream.__aiter__()
+        self.first = asyncio.ensure_future(self._next())
+        self.first.add_done_callback(self._on_first)
+
+    async def _next(self) -> Optional[llm.ChatChunk]:
+        try:
+            return await self._iter.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    def _on_first(self, _: asyncio.Future) -> None:
+        self.ttft = time.perf_counter() - self.started
+
+    @property
+    def succeeded(self) -> bool:
+        return self.first.done() and not self.first.cancelled() and self.first.exception() is None
+
+    async def next_chunk(self) -> Optional[llm.ChatChunk]:
+        return await self._next()
+
+    async def aclose(self) -> None:
+        if not self.first.done():
+            self.first.cancel()
+        try:
+            await self.stream.aclose()
+        except Exception as e:
+            logger.error(f"Error closing {self.model.model} stream: {e}")
+
+
+class HedgedLLM(llm.LLM):
+    """Primary model with a secondary hedge after `deadline` seconds without a first token"""
+
+    def __init__(self, primary: llm.LLM, secondary: llm.LLM, *, deadline: Optional[float] = None, window: int = 200):
+        super().__init__()
+        self.primary = primary
+        self.secondary = secondary
+        self.deadline = deadline if deadline is not None else float(os.getenv("LLM_HEDGE_DEADLINE", "1.5"))
+        self.turns = 0
+        self.hedged = 0
+        self.wins: Counter = Counter()
+        self.ttft: Dict[str, Deque[float]] = {"primary": deque(maxlen=window), "secondary": deque(maxlen=window)}
+        self._lock = threading.Lock()
+        for model in (primary, secondary):
+            model.on("metrics_collected", self._on_metrics_collected)
+
+    @property
+    def model(self) -> str:
+        return self.primary.model
+
+    @property
+    def provider(self) -> str:
+        return self.primary.provider
+
+    def _on_metrics_collected(self, *args: Any, **kwargs: Any) -> None:
+        self.emit("metrics_collected", *args, **kwargs)
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: Optional[List[Any]] = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        parallel_tool_calls: NotGivenOr[bool] = NOT_GIVEN,
+        tool_choice: NotGivenOr[llm.ToolChoice] = NOT_GIVEN,
+        extra_kwargs: NotGivenOr[Dict[str, Any]] = NOT_GIVEN,
+    ) -> "HedgedLLMStream":
+        return HedgedLLMStream(
+            self,
+            chat_ctx=chat_ctx,
+            tools=tools or [],
+            conn_options=conn_options,
+            parallel_tool_calls=parallel_tool_calls,
+            tool_choice=tool_choice,
+            extra_kwargs=extra_kwargs,
+        )
+
+    def _record(self, role: str, ttft: Optional[float], won: bool) -> None:
+        with self._lock:
+            if ttft is not None:
+                self.ttft[role].append(ttft)
+            if won:
+                self.wins[role] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        def p50_ms(samples: Deque[float]) -> float:
+            if not samples:
+                return 0.0
+            return round(sorted(samples)[len(samples) // 2] * 1000, 1)
+
+        with self._lock:
+            return {
+                "turns": self.turns,
+                "hedged": self.hedged,
+                "deadline_ms": round(self.deadline * 1000, 1),
+                "primary": {"model": self.primary.model, "wins": self.wins["primary"], "ttft_p50_ms": p50_ms(self.ttft["primary"])},
+                "secondary": {"model": self.secondary.model, "wins": self.wins["secondary"], "ttft_p50_ms": p50_ms(self.ttft["secondary"])},
+            }
+
+    def prewarm(self) -> None:
+        self.primary.prewarm()
+        self.secondary.prewarm()
+
+    async def aclose(self) -> None:
+        for model in (self.primary, self.secondary):
+            model.off("metrics_collected", self._on_metrics_collected)
+
+
+class HedgedLLMStream(llm.LLMStream):
+    def __init__(
+        self,
+        hedged: HedgedLLM,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: List[Any],
+        conn_options: APIConnectOptions,
+        parallel_tool_calls: NotGivenOr[bool],
+        tool_choice: NotGivenOr[llm.ToolChoice],
+        extra_kwargs: NotGivenOr[Dict[str, Any]],
+    ) -> None:
+        super().__init__(hedged, chat_ctx=chat_ctx, tools=tools, conn_options=conn_options)
+        self._hedged = hedged
+        self._parallel_tool_calls = parallel_tool_calls
+        self._tool_choice = tool_choice
+        self._extra_kwargs = extra_kwargs
+        self._winner: Optional[_Attempt] = None
+
+    @property
+    def chat_ctx(self) -> llm.ChatContext:
+        return self._winner.stream.chat_ctx if self._winner else self._chat_ctx
+
+    @property
+    def tools(self) -> List[Any]:
+        return self._winner.stream.tools if self._winner else self._tools
+
+    async def _metrics_monitor_task(self, event_aiter) -> None:
+        pass  # The primary and secondary report their own metrics
+
+    def _start(self, model: llm.LLM) -> _Attempt:
+        stream = model.chat(
+            chat_ctx=self._chat_ctx,
+            tools=self._tools,
+            # Retrying inside an attempt would only delay the hedge
+            conn_options=APIConnectOptions(
+                max_retry=0,
+                timeout=self._conn_options.timeout,
+                retry_interval=self._conn_options.retry_interval,
+            ),
+            parallel_tool_calls=self._parallel_tool_calls,
+            tool_choice=self._tool_choice,
+            extra_kwargs=self._extra_kwargs,
+        )
+        return _Attempt(model, stream)
+
+    async def _run(self) -> None:
+        hedged = self._hedged
+        hedged.turns += 1
+        primary = self._start(hedged.primary)
+        attempts = [primary]
+        try:
+            await asyncio.wait({primary.first}, timeout=hedged.deadline)
+            if not primary.succeeded:
+                reason = "failed" if primary.first.done() else f"no first token after {hedged.deadline * 1000:.0f}ms"
+                logger.warning(f"LLM {hedged.primary.model} {reason}, hedging with {hedged.secondary.model}")
+                hedged.hedged += 1
+                attempts.append(self._start(hedged.secondary))
+
+            winner = await self._race(attempts)
+            for role, attempt in zip(("primary", "secondary"), attempts):
+                if attempt.succeeded:
+                    ttft = attempt.ttft
+                elif not attempt.first.done():
+                    # Lost the race: it took at least this long
+                    ttft = time.perf_counter() - attempt.started
+                else:
+                    ttft = None
+                hedged._record(role, ttft, attempt is winner)
+            if winner is None:
+                raise APIConnectionError(f"Both {hedged.primary.model} and {hedged.secondary.model} failed")
+            if winner is not primary:
+                logger.info(f"LLM hedge won by {hedged.secondary.model} in {winner.ttft * 1000:.0f}ms")
+
+            # Losers are cancelled before a single chunk of theirs is forwarded
+            for attempt in attempts:
+                if attempt is not winner:
+                    await attempt.aclose()
+            self._winner = winner
+
+            chunk = winner.first.result()
+            while chunk is not None:
+                self._event_ch.send_nowait(chunk)
+                chunk = await winner.next_chunk()
+        finally:
+            for attempt in attempts:
+                await attempt.aclose()
+
+    async def _race(self, attempts: List[_Attempt]) -> Optional[_Attempt]:
+        """First attempt to produce a chunk, the primary wins ties. None if all of them failed."""
+        pending = list(attempts)
+        while pending:
+            await asyncio.wait([a.first for a in pending], return_when=asyncio.FIRST_COMPLETED)
+            for attempt in [a for a in pending if a.first.done()]:
+                if attempt.succeeded:
+                    return attempt
+                logger.error(f"LLM {attempt.model.model} failed: {attempt.first.exception()}")
+                pending.remove(attempt)
+        return None
@@ -0,0 +1,179 @@
+"""
+Speculative prefetch on interim transcripts.
+While the user is still talking, a cheap local matcher runs over each interim
+transcript and guesses which tool the LLM is about to call and with what key
+(a concept for switch_mode, a vertical for lookup_faq). The tool's data is loaded,
+its voice warmed and its response rendered ahead of time; when the LLM does call
+the tool with the same key, the prepared response is used. Guesses expire after
+a TTL, and hits and misses are counted per intent.
+
+Matching and preparing run in a worker thread, one transcript at a time; while
+one is being matched only the newest transcript waits, older ones are dropped.
+Warming, which needs the event loop, runs on the loop afterwards.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger("agent")
+
+
+@dataclass
+class _Intent:
+    name: str
+    # Transcript -> key of the tool call it predicts, None if it doesn't predict one
+    detect: Callable[[str], Optional[Hashable]]
+    # Key -> prepared value handed to the tool on a hit, runs off the event loop
+    prepare: Callable[[Hashable], Any]
+    # Key -> None, runs on the event loop once the value is prepared
+    warm: Optional[Callable[[Hashable], None]] = None
+
+
+@dataclass
+class _Prepared:
+    value: Any
+    created: float = field(default_factory=time.monotonic)
+
+
+class SpeculativePrefetcher:
+    """Prepared tool results keyed by (intent, key), filled from interim transcripts"""
+
+    def __init__(self, ttl: float = 20.0):
+        self.ttl = ttl
+        self._intents: List[_Intent] = []
+        self._prepared: Dict[Tuple[str, Hashable], _Prepared] = {}
+        self._last_transcript = ""
+        self._lock = threading.Lock()
+        self._pending: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self.predictions: Counter = Counter()
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self.expired: Counter = Counter()
+        self.prepare_seconds = 0.0
+
+    def add_intent(
+        self,
+        name: str,
+        detect: Callable[[str], Optional[Hashable]],
+        prepare: Callable[[Hashable], Any],
+        warm: Optional[Callable[[Hashable], None]] = None,
+    ) -> None:
+        self._intents.append(_Intent(name, detect, prepare, warm))
+
+    def attach(self, session: Any) -> None:
+        """Predict from every transcript the STT sends, interim and final"""
+        session.on("user_input_transcribed", self._on_user_input_transcribed)
+
+    def _on_user_input_transcribed(self, ev: Any) -> None:
+        # Only hands the transcript over, the event loop never waits on matching
+        self._pending = getattr(ev, "transcript", "")
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._drain())
+
+    async def _drain(self) -> None:
+        while self._pending is not None:
+            transcript, self._pending = self._pending, None
+            prepared = await asyncio.to_thread(self.on_transcript, transcript)
+            self._warm(prepared)
+
+    def _warm(self, prepared: List[Tuple[str, Hashable]]) -> None:
+        warmers = {intent.name: intent.warm for intent in self._intents if intent.warm is not None}
+        for name, key in prepared:
+            if name not in warmers:
+                continue
+            try:
+                warmers[name](key)
+            except Exception as e:
+                logger.error(f"Error warming {name}: {e}")
+
+    async def aclose(self) -> None:
+        """Wait for the transcript being matched, drop any still pending"""
+        self._pending = None
+        if self._task is not None:
+            await self._task
+
+    def _expire(self, now: float) -> None:
+        for key, entry in list(self._prepared.items()):
+            if now - entry.created > self.ttl:
+                del self._prepared[key]
+                self.expired[key[0]] += 1
+
+    def on_transcript(self, transcript: str) -> List[Tuple[str, Hashable]]:
+        """
+        Prepare whatever the transcript predicts, blocking. Returns the newly prepared
+        (intent, key) pairs, which haven't been warmed.
+        """
+        transcript = transcript.strip()
+        with self._lock:
+            # Interim transcripts repeat a lot, only changed text is matched again
+            if not transcript or transcript == self._last_transcript:
+                return []
+            self._last_transcript = transcript
+            self._expire(time.monotonic())
+
+        prepared = []
+        for intent in self._intents:
+            try:
+                key = intent.detect(transcript)
+                if key is None:
+                    continue
+                with self._lock:
+                    if (intent.name, key) in self._prepared:
+                        continue
+                start = time.perf_counter()
+                value = intent.prepare(key)
+                elapsed = time.perf_counter() - start
+            except Exception as e:
+                logger.error(f"Error prefetching {intent.name}: {e}")
+                continue
+
+            with self._lock:
+                self._prepared[(intent.name, key)] = _Prepared(value)
+                self.predictions[intent.name] += 1
+                self.prepare_seconds += elapsed
+            prepared.append((intent.name, key))
+            logger.info(f"Prefetched {intent.name} {key!r} in {elapsed * 1000:.1f}ms")
+        return prepared
+
+    def take(self, name: str, key: Hashable) -> Optional[Any]:
+        """The value prepared for this tool call, or None on a miss. A value is used once."""
+        with self._lock:
+            entry = self._prepared.pop((name, key), None)
+            if entry is not None and time.monotonic() - entry.created > self.ttl:
+                self.expired[name] += 1
+                entry = None
+            if entry is None:
+                self.misses[name] += 1
+                return None
+            self.hits[name] += 1
+            return entry.value
+
+    def hit_rate(self, name: Optional[str] = None) -> float:
+        """Share of tool calls that found their result prepared"""
+        with self._lock:
+            hits = self.hits[name] if name else sum(self.hits.values())
+            calls = hits + (self.misses[name] if name else sum(self.misses.values()))
+        return hits / calls if calls else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        names = [intent.name for intent in self._intents]
+        per_intent = {
+            name: {
+                "predictions": self.predictions[name],
+                "hits": self.hits[name],
+                "misses": self.misses[name],
+                "hit_rate": round(self.hit_rate(name), 3),
+                "expired": self.expired[name],
+            }
+            for name in names
+        }
+        return {
+            "hit_rate": round(self.hit_rate(), 3),
+            "prepare_ms": round(self.prepare_seconds * 1000, 1),
+            "intents": per_intent,
+        }
@@ -0,0 +1,90 @@
+"""
+Memoized system prompts.
+Instructions are rendered once per (content hash, persona, mode, concept) key and
+the same string object is handed to every later session and mode switch.
+CachedTokenRatio tracks how much of each prompt the LLM provider served from its
+own prefix cache.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class PromptCache:
+    """LRU cache of rendered instruction strings with hit/miss counters"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[Hashable, ...], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key: Tuple[Hashable, ...], render: Callable[[], str]) -> str:
+        with self._lock:
+            prompt = self._entries.get(key)
+            if prompt is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return prompt
+            self.misses += 1
+
+        prompt = render()
+        with self._lock:
+            # Another thread may have rendered the same key meanwhile, keep the first string
+            prompt = self._entries.setdefault(key, prompt)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return prompt
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+            "entries": len(self._entries),
+        }
+
+
+class CachedTokenRatio:
+    """Per-session share of prompt tokens served from the provider's prefix cache"""
+
+    def __init__(self):
+        self.turns = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.last_ratio = 0.0
+
+    def collect(self, llm_metrics: Any) -> None:
+        """Feed it every collected metric, anything without prompt token counts is ignored"""
+        prompt_tokens = getattr(llm_metrics, "prompt_tokens", None)
+        cached_tokens = getattr(llm_metrics, "prompt_cached_tokens", None)
+        if prompt_tokens is None or cached_tokens is None:
+            return
+        self.turns += 1
+        self.prompt_tokens += prompt_tokens
+        self.cached_tokens += cached_tokens
+        self.last_ratio = cached_tokens / prompt_tokens if prompt_tokens else 0.0
+
+    @property
+    def ratio(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "turns": self.turns,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cached_ratio": round(self.ratio, 3),
+            "last_cached_ratio": round(self.last_ratio, 3),
+        }
+
+
+# Singleton instance, shared by every session in the process
+prompt_cache = PromptCache()
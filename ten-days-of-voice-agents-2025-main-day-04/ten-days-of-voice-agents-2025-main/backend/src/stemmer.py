@@ -0,0 +1,27 @@
+"""
+Light English suffix stripping for lexical matching.
+Shared by the SDR's FAQ index and the tutor's concept resolver, so singular and
+plural forms of a word land on the same stem in both.
+"""
+
+# "es" is a plural ending only after these (classes, boxes, buzzes, matches, wishes)
+SIBILANT_ENDINGS = ("ss", "x", "zz", "ch", "sh")
+
+# Words ending in these aren't plurals (class, status, analysis)
+NOT_PLURAL_ENDINGS = ("ss", "us", "is")
+
+
+def stem_word(token: str) -> str:
+    """'connections' -> 'connection', 'services' -> 'service', 'classes' -> 'class'"""
+    if len(token) <= 4:
+        return token
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    for suffix in ("ing", "ed"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[: -len(suffix)]
+    if token.endswith("es") and token[:-2].endswith(SIBILANT_ENDINGS):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith(NOT_PLURAL_ENDINGS):
+        return token[:-1]
+    return token
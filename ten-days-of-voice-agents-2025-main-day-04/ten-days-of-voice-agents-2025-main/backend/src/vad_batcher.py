@@ -0,0 +1,252 @@
+"""
+Cross-session batched Silero VAD.
+Every session in a worker process runs its own VAD stream, and each stream runs
+the Silero ONNX model one 32ms window at a time. BatchedVAD keeps silero's stream
+logic as is but hands the windows to a process-wide batcher thread, which waits
+at most a couple of milliseconds for windows from other streams and runs them
+all through a single ONNX call. Results are the same as unbatched inference.
+Batches only grow past one window with several sessions in the same process, so
+it is used only with VAD_BATCHING=1, which runs jobs as threads (see warmup.py).
+
+Benchmark per-stream against batched inference with:
+    python src/vad_batcher.py --streams 32 --seconds 5
+"""
+import argparse
+import os
+import queue
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+from livekit.plugins import silero
+from livekit.plugins.silero import onnx_model
+from livekit.plugins.silero.vad import VADStream
+
+
+class _Request:
+    __slots__ = ("done", "error", "input", "result", "state", "submitted")
+
+    def __init__(self, window: np.ndarray, state: np.ndarray):
+        self.input = window
+        self.state = state
+        self.submitted = time.perf_counter()
+        self.done = threading.Event()
+        self.result: Optional[Tuple[float, np.ndarray]] = None
+        self.error: Optional[BaseException] = None
+
+
+class VADBatcher:
+    """Runs VAD windows from every stream through one ONNX call per micro-batch"""
+
+    def __init__(
+        self,
+        onnx_session: Any,
+        sample_rate: int,
+        max_batch: Optional[int] = None,
+        max_wait: Optional[float] = None,
+        window: int = 2000,
+    ):
+        self.session = onnx_session
+        self.sample_rate = sample_rate
+        self.max_batch = max_batch or int(os.getenv("VAD_BATCH_MAX", "32"))
+        self.max_wait = max_wait if max_wait is not None else float(os.getenv("VAD_BATCH_WAIT_MS", "2")) / 1000
+        self._sr = np.array(sample_rate, dtype=np.int64)
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        # Streams alive right now, a batch holding a window from each of them can't grow any more
+        self._active = 0
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.windows = 0
+        self.max_batch_seen = 0
+        self._waits: Deque[float] = deque(maxlen=window)
+        self._run_seconds = 0.0
+
+    def _ensure_started(self) -> None:
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="vad-batcher", daemon=True)
+                self._thread.start()
+
+    def register(self, owner: Any) -> None:
+        """Count `owner` as an active stream until it is garbage collected"""
+        with self._stats_lock:
+            self._active += 1
+        weakref.finalize(owner, self._unregister)
+
+    def _unregister(self) -> None:
+        with self._stats_lock:
+            self._active -= 1
+
+    def infer(self, window: np.ndarray, state: np.ndarray) -> Tuple[float, np.ndarray]:
+        """Speech probability and next RNN state for one (1, context + window) input. Blocks until its batch ran."""
+        self._ensure_started()
+        request = _Request(window, state)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < min(self.max_batch, max(1, self._active)):
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._run_batch(batch)
+                    return
+                batch.append(request)
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List[_Request]) -> None:
+        start = time.perf_counter()
+        try:
+            out, state = self.session.run(
+                None,
+                {
+                    "input": np.concatenate([r.input for r in batch], axis=0),
+                    "state": np.concatenate([r.state for r in batch], axis=1),
+                    "sr": self._sr,
+                },
+            )
+            for i, request in enumerate(batch):
+                request.result = (float(out[i, 0]), state[:, i : i + 1, :])
+        except BaseException as e:
+            for request in batch:
+                request.error = e
+        finished = time.perf_counter()
+        for request in batch:
+            request.done.set()
+
+        with self._stats_lock:
+            self.batches += 1
+            self.windows += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            self._run_seconds += finished - start
+            self._waits.extend(finished - request.submitted for request in batch)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            waits = sorted(self._waits)
+
+            def pct_ms(p: float) -> float:
+                if not waits:
+                    return 0.0
+                return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 2)
+
+            return {
+                "batches": self.batches,
+                "windows": self.windows,
+                "mean_batch": round(self.windows / self.batches, 2) if self.batches else 0.0,
+                "max_batch": self.max_batch_seen,
+                "run_ms_per_window": round(self._run_seconds / self.windows * 1000, 3) if self.windows else 0.0,
+                "decision_p50_ms": pct_ms(0.5),
+                "decision_p95_ms": pct_ms(0.95),
+            }
+
+    def close(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=1)
+
+
+class BatchedOnnxModel(onnx_model.OnnxModel):
+    """Silero's per-stream model, with the ONNX call going through the batcher"""
+
+    def __init__(self, batcher: VADBatcher):
+        super().__init__(onnx_session=batcher.session, sample_rate=batcher.sample_rate)
+        self._batcher = batcher
+        batcher.register(self)
+
+    def __call__(self, x: np.ndarray) -> float:
+        # Same inputs as OnnxModel.__call__, which also feeds the initial RNN state every window
+        self._input_buffer[:, : self._context_size] = self._context
+        self._input_buffer[:, self._context_size :] = x
+        p, _ = self._batcher.infer(self._input_buffer.copy(), self._rnn_state)
+        self._context = self._input_buffer[:, -self._context_size :].copy()
+        return p
+
+
+class BatchedVAD(silero.VAD):
+    """Silero VAD whose streams share one batcher. Load with BatchedVAD.load(), like silero.VAD."""
+
+    def __init__(self, *, session: Any, opts: Any) -> None:
+        super().__init__(session=session, opts=opts)
+        self.batcher = VADBatcher(session, opts.sample_rate)
+
+    def stream(self) -> VADStream:
+        stream = VADStream(self, self._opts, BatchedOnnxModel(self.batcher))
+        self._streams.add(stream)
+        return stream
+
+
+def _bench(model_for_stream, streams: int, windows: int) -> Tuple[float, float]:
+    """Feed `windows` windows per stream from one thread each. Returns (windows per second, p95 ms per window)."""
+    latencies: List[float] = []
+    lock = threading.Lock()
+    rng = np.random.default_rng(0)
+    audio = (rng.standard_normal(512) * 0.1).astype(np.float32)
+
+    def worker() -> None:
+        model = model_for_stream()
+        local = []
+        for _ in range(windows):
+            start = time.perf_counter()
+            model(audio)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(streams)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return streams * windows / elapsed, latencies[int(0.95 * (len(latencies) - 1))] * 1000
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare per-stream and batched Silero VAD inference")
+    parser.add_argument("--streams", type=int, default=32, help="Concurrent VAD streams")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Audio per stream")
+    parser.add_argument("--max-batch", type=int, default=None)
+    parser.add_argument("--wait-ms", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    session = onnx_model.new_inference_session(True)
+    windows = int(args.seconds * 16000 / 512)
+    batcher = VADBatcher(
+        session, 16000, max_batch=args.max_batch, max_wait=None if args.wait_ms is None else args.wait_ms / 1000
+    )
+    try:
+        for name, factory in (
+            ("per-stream", lambda: onnx_model.OnnxModel(onnx_session=session, sample_rate=16000)),
+            ("batched", lambda: BatchedOnnxModel(batcher)),
+        ):
+            throughput, p95 = _bench(factory, args.streams, windows)
+            print(f"{name:<12}{throughput:>10.0f} windows/s{p95:>10.2f}ms p95 per window")
+        print(f"Batcher: {batcher.stats()}")
+    finally:
+        batcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Warm TTS instances, one per coach voice.
+Every voice gets its own TTS with its provider connection opened up front, so a
+mode switch swaps in an already-connected instance instead of reconfiguring the
+session's TTS mid-conversation. The pool also tracks the TTFB of the first
+utterance after a voice switch against steady-state TTFB.
+"""
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, Optional
+
+logger = logging.getLogger("agent")
+
+
+class SwitchTTFBTracker:
+    """TTFB of the first synthesis after a voice change vs every other synthesis"""
+
+    def __init__(self, window: int = 200):
+        self.switch_ttfb: Deque[float] = deque(maxlen=window)
+        self.steady_ttfb: Deque[float] = deque(maxlen=window)
+        self._last_voice: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def record(self, voice: str, ttfb: float) -> bool:
+        """Record one synthesis. Returns True if it was the first one after a switch."""
+        with self._lock:
+            switched = self._last_voice is not None and voice != self._last_voice
+            self._last_voice = voice
+            (self.switch_ttfb if switched else self.steady_ttfb).append(ttfb)
+            return switched
+
+    def stats(self) -> Dict[str, Any]:
+        def p50_ms(samples: Deque[float]) -> float:
+            if not samples:
+                return 0.0
+            return round(sorted(samples)[len(samples) // 2] * 1000, 1)
+
+        with self._lock:
+            return {
+                "switches": len(self.switch_ttfb),
+                "switch_ttfb_p50_ms": p50_ms(self.switch_ttfb),
+                "steady_ttfb_p50_ms": p50_ms(self.steady_ttfb),
+            }
+
+
+class VoicePool:
+    """One TTS per voice, created and prewarmed together"""
+
+    def __init__(self, factory: Callable[[str], Any], voices: Iterable[str]):
+        self._factory = factory
+        self._instances: Dict[str, Any] = {}
+        self._forward: Optional[Callable[[Any], None]] = None
+        self._forward_skip: Any = None
+        self.tracker = SwitchTTFBTracker()
+        for voice in voices:
+            self._add(voice)
+
+    def _add(self, voice: str) -> Any:
+        instance = self._factory(voice)
+        self._instances[voice] = instance
+
+        def _on_metrics(tts_metrics: Any) -> None:
+            ttfb = getattr(tts_metrics, "ttfb", None)
+            measured = ttfb is not None and ttfb >= 0 and not getattr(tts_metrics, "cancelled", False)
+            # Cancelled or missing measurements never reach the tracker
+            if measured and self.tracker.record(voice, ttfb):
+                logger.info(f"TTS TTFB after switch to {voice}: {ttfb * 1000:.0f}ms")
+            if self._forward and instance is not self._forward_skip:
+                self._forward(tts_metrics)
+
+        instance.on("metrics_collected", _on_metrics)
+        return instance
+
+    def prewarm(self) -> None:
+        """Open a provider connection for every voice without blocking. Needs a running event loop."""
+        for voice, instance in self._instances.items():
+            try:
+                instance.prewarm()
+            except Exception as e:
+                logger.error(f"Failed to prewarm TTS voice {voice}: {e}")
+
+    def get(self, voice: str) -> Any:
+        instance = self._instances.get(voice)
+        if instance is None:
+            # A voice nobody configured up front, still better than failing the turn
+            instance = self._add(voice)
+            instance.prewarm()
+        return instance
+
+    def forward_metrics(self, callback: Callable[[Any], None], skip: Any = None) -> None:
+        """
+        Send TTS metrics of pooled instances to `callback`. The instance given to the
+        AgentSession already reports through the session, pass it as `skip`.
+        """
+        self._forward = callback
+        self._forward_skip = skip
+
+    async def aclose(self) -> None:
+        for instance in self._instances.values():
+            try:
+                await instance.aclose()
+            except Exception as e:
+                logger.error(f"Error closing TTS: {e}")
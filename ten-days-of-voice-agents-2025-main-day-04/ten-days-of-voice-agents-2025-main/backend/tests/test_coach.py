@@ -0,0 +1,103 @@
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from agent import ActiveRecallCoach
+from prompt_cache import CachedTokenRatio
+
+
+def test_sessions_share_rendered_instructions():
+    first = ActiveRecallCoach()
+    second = ActiveRecallCoach()
+    assert first.instructions is second.instructions
+
+
+@pytest.mark.asyncio
+async def test_mode_switch_keeps_instructions_byte_stable():
+    coach = ActiveRecallCoach()
+    ctx = MagicMock()
+    initial = coach.instructions
+
+    quiz_result = await coach.switch_mode(ctx, mode="quiz", concept_id="loops")
+    learn_result = await coach.switch_mode(ctx, mode="learn", concept_id="loops")
+
+    # The mode travels in the appended tool result, the prompt prefix never changes
+    assert coach.instructions is initial
+    assert "CURRENT MODE" not in coach.instructions
+    assert quiz_result.startswith("CURRENT MODE: QUIZ.")
+    assert learn_result.startswith("CURRENT MODE: LEARN.")
+
+
+def test_cached_token_ratio():
+    ratio = CachedTokenRatio()
+    ratio.collect(MagicMock(prompt_tokens=1000, prompt_cached_tokens=0))
+    ratio.collect(MagicMock(prompt_tokens=1000, prompt_cached_tokens=900))
+    ratio.collect(object())
+
+    stats = ratio.stats()
+    assert stats["turns"] == 2
+    assert stats["cached_ratio"] == 0.45
+    assert stats["last_cached_ratio"] == 0.9
+
+
+@pytest.mark.asyncio
+async def test_prompt_has_titles_and_switch_carries_active_concept():
+    coach = ActiveRecallCoach()
+    ctx = MagicMock()
+    loops = coach.catalog.get("loops")
+
+    assert "Loops (loops)" in coach.instructions
+    assert loops["summary"] not in coach.instructions
+
+    result = await coach.switch_mode(ctx, mode="teach_back", concept_id="loop")
+    assert coach.current_concept_id == "loops"
+    assert loops["summary"] in result
+
+
+@pytest.mark.asyncio
+async def test_coach_uses_compiled_curriculum(tmp_path, monkeypatch):
+    import agent
+    from curriculum_store import compile_curriculum
+
+    db_path = tmp_path / "curriculum.db"
+    compile_curriculum(agent.CONTENT_PATH, db_path)
+    monkeypatch.setattr(agent, "CURRICULUM_PATH", db_path)
+
+    coach = ActiveRecallCoach()
+    assert len(coach.catalog) == 3
+    result = await coach.switch_mode(MagicMock(), mode="quiz", concept_id="functions")
+    assert coach.catalog.get("functions")["sample_question"] in result
+
+
+@pytest.mark.asyncio
+async def test_switch_mode_resolves_near_miss_concepts():
+    coach = ActiveRecallCoach()
+    result = await coach.switch_mode(MagicMock(), mode="learn", concept_id="for loop")
+    assert coach.current_concept_id == "loops"
+    assert "not found" not in result
+
+
+@pytest.mark.asyncio
+async def test_interim_transcript_prefetches_switch():
+    coach = ActiveRecallCoach()
+    expected = coach._render_switch("quiz", "loops")
+
+    coach.prefetcher.on_transcript("could you quiz me")
+    coach.prefetcher.on_transcript("could you quiz me on loops")
+    result = await coach.switch_mode(MagicMock(), mode="quiz", concept_id="loops")
+
+    assert result == expected
+    stats = coach.prefetcher.stats()["intents"]["switch_mode"]
+    assert stats["hits"] == 1
+    assert stats["hit_rate"] == 1.0
+
+    # A different switch than the one predicted is rendered as before
+    coach.prefetcher.on_transcript("let me explain loops to you")
+    result = await coach.switch_mode(MagicMock(), mode="learn", concept_id="loops")
+    assert result.startswith("CURRENT MODE: LEARN.")
+    assert coach.prefetcher.stats()["intents"]["switch_mode"]["misses"] == 1
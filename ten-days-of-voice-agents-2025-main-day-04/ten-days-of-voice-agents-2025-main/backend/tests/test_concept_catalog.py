@@ -0,0 +1,88 @@
+import sys
+from pathlib import Path
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from concept_catalog import (
+    ConceptCatalog,
+    get_concept_catalog,
+    resolution_metrics,
+    stems,
+)
+
+CONCEPTS = [
+    {"id": "variables", "title": "Variables", "summary": "Boxes.", "sample_question": "What is a variable?"},
+    {"id": "for_loops", "title": "For Loops", "summary": "Repeat.", "sample_question": "What is a loop?", "aliases": ["iteration"]},
+]
+
+
+def test_lookup_by_id_and_alias():
+    catalog = ConceptCatalog(CONCEPTS)
+    assert catalog.get("variables")["title"] == "Variables"
+    assert catalog.get("variable")["id"] == "variables"
+    assert catalog.get("For-Loops")["id"] == "for_loops"
+    assert catalog.get("for loop")["id"] == "for_loops"
+    assert catalog.get("iteration")["id"] == "for_loops"
+    assert catalog.get("recursion") is None
+    assert catalog.get(None) is None
+
+
+def test_titles_are_capped():
+    concepts = [{"id": f"c{i}", "title": f"Concept {i}"} for i in range(10_000)]
+    catalog = ConceptCatalog(concepts)
+    titles = catalog.titles(limit=3)
+    assert titles == "Concept 0 (c0), Concept 1 (c1), Concept 2 (c2), and 9997 more"
+    assert catalog.get("c9999")["title"] == "Concept 9999"
+
+
+def test_catalog_is_shared_per_digest():
+    assert get_concept_catalog("abc", CONCEPTS) is get_concept_catalog("abc", CONCEPTS)
+
+
+def test_resolver_handles_near_misses():
+    concepts = CONCEPTS + [{"id": "agentic_ai_systems", "title": "Building Agentic AI Systems"}]
+    catalog = ConceptCatalog(concepts)
+
+    cases = {
+        "variables": ("variables", "exact"),
+        "For Loops": ("for_loops", "alias"),
+        "loops for": ("for_loops", "stemmed"),
+        "Agentic AI": ("agentic_ai_systems", "partial"),
+        "varibles": ("variables", "fuzzy"),
+        "quantum chemistry": (None, "miss"),
+    }
+    for key, (concept_id, outcome) in cases.items():
+        resolution = catalog.resolver.resolve(key)
+        assert (resolution.concept_id, resolution.outcome) == (concept_id, outcome), key
+
+
+def test_resolution_outcomes_are_counted():
+    catalog = ConceptCatalog(CONCEPTS)
+    before = resolution_metrics.stats()["outcomes"].get("fuzzy", 0)
+    assert catalog.resolve("varaibles")["id"] == "variables"
+    assert catalog.resolve("recursion") is None
+    stats = resolution_metrics.stats()
+    assert stats["outcomes"]["fuzzy"] == before + 1
+    assert stats["outcomes"]["miss"] >= 1
+    assert stats["latency_p95_us"] > 0
+
+
+def test_spot_finds_concept_in_transcript():
+    catalog = ConceptCatalog(CONCEPTS)
+    assert catalog.spot("um can you quiz me on for loops please") == "for_loops"
+    assert catalog.spot("I want to go over variables") == "variables"
+    # "loops" alone doesn't cover "for loops", and nothing else is mentioned
+    assert catalog.spot("what's the weather like") is None
+
+
+def test_singular_and_plural_share_a_stem():
+    for singular, plural in [
+        ("variable", "variables"), ("class", "classes"), ("dictionary", "dictionaries"),
+        ("closure", "closures"), ("module", "modules"), ("index", "indexes"),
+    ]:
+        assert stems(singular) == stems(plural), (singular, plural)
+
+    catalog = ConceptCatalog([{"id": "closures", "title": "Closures"}, {"id": "classes", "title": "Classes"}])
+    assert catalog.resolve("closure things")["id"] == "closures"
+    assert catalog.resolve("class basics")["id"] == "classes"
@@ -0,0 +1,124 @@
+import sys
+from pathlib import Path
+
+import pytest
+from livekit.agents import llm
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from context_compactor import (
+    SUMMARY_ID,
+    ContextCompactor,
+    ExtractiveSummarizer,
+    history_tokens,
+)
+
+
+class FakeAgent:
+    """Just the chat context API the compactor uses"""
+
+    def __init__(self, chat_ctx: llm.ChatContext):
+        self._chat_ctx = chat_ctx
+        self.updates = 0
+
+    @property
+    def chat_ctx(self) -> llm.ChatContext:
+        return self._chat_ctx.copy()
+
+    async def update_chat_ctx(self, chat_ctx: llm.ChatContext) -> None:
+        self._chat_ctx = chat_ctx
+        self.updates += 1
+
+
+class RecordingSummarizer:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, previous, items):
+        self.calls.append((previous, [getattr(item, "text_content", None) for item in items]))
+        return (previous + " | " if previous else "") + f"summary of {len(items)} items"
+
+
+def _tutoring_call(turns: int) -> llm.ChatContext:
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="system", content="You are an Active Recall Coach.")
+    for turn in range(turns):
+        chat_ctx.add_message(role="user", content=f"Question {turn}: " + "please explain loops again " * 10)
+        call_id = f"call_{turn}"
+        chat_ctx.items.append(llm.FunctionCall(call_id=call_id, name="switch_mode", arguments='{"mode": "learn"}'))
+        chat_ctx.items.append(
+            llm.FunctionCallOutput(
+                call_id=call_id, name="switch_mode", output="ACTION REQUIRED: Explain the concept. " * 20, is_error=False
+            )
+        )
+        chat_ctx.add_message(role="assistant", content=f"Answer {turn}: " + "a loop repeats code " * 10)
+    return chat_ctx
+
+
+@pytest.mark.asyncio
+async def test_under_budget_is_left_alone():
+    agent = FakeAgent(_tutoring_call(2))
+    compactor = ContextCompactor(agent, "tutor", summarizer=RecordingSummarizer(), budget_tokens=5000)
+    assert await compactor.compact() is False
+    assert agent.updates == 0
+
+
+@pytest.mark.asyncio
+async def test_over_budget_folds_old_turns_into_summary():
+    agent = FakeAgent(_tutoring_call(10))
+    summarizer = RecordingSummarizer()
+    compactor = ContextCompactor(agent, "tutor", summarizer=summarizer, budget_tokens=800, keep_turns=3)
+    before = history_tokens(agent.chat_ctx.items)
+    assert before > 800
+
+    assert await compactor.compact() is True
+    items = agent.chat_ctx.items
+    assert history_tokens(items) < before
+    # Instructions first, then the summary, then the recent turns
+    assert items[0].text_content == "You are an Active Recall Coach."
+    assert items[1].id == SUMMARY_ID and "summary of" in items[1].text_content
+    users = [item.text_content for item in items if item.type == "message" and item.role == "user"]
+    assert users[-1].startswith("Question 9")
+    assert len(users) >= 3
+    # Tool calls and their outputs stay paired
+    calls = {item.call_id for item in items if item.type == "function_call"}
+    outputs = {item.call_id for item in items if item.type == "function_call_output"}
+    assert calls == outputs
+    # Only the latest tool results keep their full text
+    full = [item for item in items if item.type == "function_call_output" and not item.output.endswith("(trimmed)")]
+    assert len(full) == 2
+
+
+@pytest.mark.asyncio
+async def test_summary_is_incremental_and_size_stays_flat():
+    agent = FakeAgent(_tutoring_call(6))
+    summarizer = RecordingSummarizer()
+    compactor = ContextCompactor(agent, "tutor", summarizer=summarizer, budget_tokens=800, keep_turns=2)
+    await compactor.compact()
+    sizes = [history_tokens(agent.chat_ctx.items)]
+
+    # The call goes on
+    for turn in range(6, 12):
+        chat_ctx = agent.chat_ctx
+        chat_ctx.add_message(role="user", content=f"Question {turn}: " + "what about while loops " * 10)
+        chat_ctx.add_message(role="assistant", content=f"Answer {turn}: " + "a while loop checks first " * 10)
+        agent._chat_ctx = chat_ctx
+        await compactor.compact()
+        sizes.append(history_tokens(agent.chat_ctx.items))
+
+    assert max(sizes) <= 800
+    # Each compaction starts from the previous summary, it never re-reads summarized turns
+    assert summarizer.calls[1][0] == "summary of " + str(len(summarizer.calls[0][1])) + " items"
+    assert all("Question 0" not in (text or "") for _, texts in summarizer.calls[1:] for text in texts)
+    assert [item.id for item in agent.chat_ctx.items].count(SUMMARY_ID) == 1
+
+
+@pytest.mark.asyncio
+async def test_extractive_summary_is_capped():
+    summarizer = ExtractiveSummarizer()
+    items = _tutoring_call(40).items
+    summary = await summarizer("", items)
+    assert len(summary) <= 1500
+    assert "Question 39" in summary
+    assert "ACTION REQUIRED" not in summary
@@ -0,0 +1,116 @@
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from concept_catalog import ConceptCatalog, ConceptResolver
+from curriculum_store import (
+    CurriculumStore,
+    StoredResolver,
+    compile_curriculum,
+    get_curriculum_store,
+    main,
+)
+
+CONTENT_PATH = Path(__file__).resolve().parent.parent.parent / "shared-data" / "day4_tutor_content.json"
+
+
+def test_compiled_store_matches_json(tmp_path):
+    db_path = tmp_path / "curriculum.db"
+    assert compile_curriculum(CONTENT_PATH, db_path) == 3
+
+    store = CurriculumStore(db_path)
+    with open(CONTENT_PATH) as f:
+        concepts = json.load(f)
+
+    assert len(store) == 3
+    assert store.first() == concepts[0]
+    assert store.get("loops") == concepts[1]
+    assert store.get("Loop")["id"] == "loops"
+    assert store.get("recursion") is None
+    assert "Variables (variables)" in store.titles()
+
+
+def test_store_is_read_only(tmp_path):
+    db_path = tmp_path / "curriculum.db"
+    compile_curriculum(CONTENT_PATH, db_path)
+    store = CurriculumStore(db_path)
+    with pytest.raises(sqlite3.OperationalError):
+        store._conn.execute("DELETE FROM concepts")
+
+
+def test_recompiled_store_is_reopened(tmp_path):
+    db_path = tmp_path / "curriculum.db"
+    compile_curriculum(CONTENT_PATH, db_path)
+    old = get_curriculum_store(db_path)
+    assert get_curriculum_store(db_path) is old
+    digest = old.digest
+
+    source = tmp_path / "content.json"
+    source.write_text(json.dumps([{"id": "recursion", "title": "Recursion", "summary": "Calls itself."}]))
+    compile_curriculum(source, db_path)
+
+    old_conn = old._conn
+    new = get_curriculum_store(db_path)
+    assert new is old
+    assert new.digest != digest
+    assert new.get("recursion")["title"] == "Recursion"
+    assert new.get("loops") is None
+    assert new.spot("tell me about recursion") == "recursion"
+    # The replaced connection is closed, not leaked
+    with pytest.raises(sqlite3.ProgrammingError):
+        old_conn.execute("SELECT 1")
+
+def test_large_curriculum(tmp_path):
+    source = tmp_path / "big.json"
+    source.write_text(json.dumps([
+        {"id": f"c{i}", "title": f"Concept {i}", "summary": f"Summary {i}", "sample_question": f"Q{i}?", "level": i % 3}
+        for i in range(10_000)
+    ]))
+    main([str(source)])
+
+    store = CurriculumStore(tmp_path / "big.db")
+    assert len(store) == 10_000
+    assert store.get("concept 9876") == {
+        "id": "c9876", "title": "Concept 9876", "summary": "Summary 9876", "sample_question": "Q9876?", "level": 0,
+    }
+    assert store.titles(limit=2) == "Concept 0 (c0), Concept 1 (c1), and 9998 more"
+
+
+def test_store_resolves_near_misses(tmp_path):
+    db_path = tmp_path / "curriculum.db"
+    compile_curriculum(CONTENT_PATH, db_path)
+    store = CurriculumStore(db_path)
+    assert isinstance(store._resolver, StoredResolver)
+    assert store.resolve("functon")["id"] == "functions"
+    assert store.resolve("what are loops")["id"] == "loops"
+    assert store.resolve("recursion") is None
+
+
+def test_stored_resolver_matches_catalog(tmp_path):
+    db_path = tmp_path / "curriculum.db"
+    compile_curriculum(CONTENT_PATH, db_path)
+    store = CurriculumStore(db_path)
+    with open(CONTENT_PATH) as f:
+        catalog = ConceptCatalog(json.load(f))
+
+    for key in ["loops", "Loop", "for loops", "variable", "functon", "what are loops", "recursion", "", "zz"]:
+        assert store.resolver.resolve(key) == catalog.resolver.resolve(key)
+    for text in ["um, quiz me on for loops please", "explain functions", "nothing here"]:
+        assert store.spot(text) == catalog.spot(text)
+
+
+def test_store_without_resolver_tables_falls_back(tmp_path):
+    db_path = tmp_path / "curriculum.db"
+    compile_curriculum(CONTENT_PATH, db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DROP TABLE resolver_names")
+
+    store = CurriculumStore(db_path)
+    assert store.resolve("functon")["id"] == "functions"
+    assert isinstance(store._resolver, ConceptResolver)
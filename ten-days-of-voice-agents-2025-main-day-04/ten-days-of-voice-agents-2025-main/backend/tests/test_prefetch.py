@@ -0,0 +1,99 @@
+import asyncio
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+from livekit import rtc
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from prefetch import SpeculativePrefetcher
+
+
+def make_prefetcher(ttl=20.0):
+    prepared = []
+
+    def prepare(key):
+        prepared.append(key)
+        return f"result for {key}"
+
+    prefetcher = SpeculativePrefetcher(ttl=ttl)
+    prefetcher.add_intent("lookup", lambda text: "jio" if "jio" in text.lower() else None, prepare)
+    return prefetcher, prepared
+
+
+def test_prepares_once_and_hands_out_once():
+    prefetcher, prepared = make_prefetcher()
+    assert prefetcher.on_transcript("tell me") == []
+    assert prefetcher.on_transcript("tell me about Jio") == [("lookup", "jio")]
+    # Growing interim transcripts with the same prediction don't prepare again
+    assert prefetcher.on_transcript("tell me about Jio plans") == []
+    assert prepared == ["jio"]
+
+    assert prefetcher.take("lookup", "jio") == "result for jio"
+    assert prefetcher.take("lookup", "jio") is None
+    stats = prefetcher.stats()
+    assert stats["intents"]["lookup"] == {"predictions": 1, "hits": 1, "misses": 1, "hit_rate": 0.5, "expired": 0}
+
+
+def test_expired_predictions_miss():
+    prefetcher, _ = make_prefetcher(ttl=0.0)
+    prefetcher.on_transcript("jio")
+    assert prefetcher.take("lookup", "jio") is None
+    assert prefetcher.stats()["intents"]["lookup"]["expired"] == 1
+
+
+def test_failing_prepare_is_skipped():
+    prefetcher = SpeculativePrefetcher()
+    prefetcher.add_intent("broken", lambda text: text, lambda key: 1 / 0)
+    assert prefetcher.on_transcript("anything") == []
+    assert prefetcher.take("broken", "anything") is None
+
+
+async def test_attach_prepares_off_the_event_loop():
+    session = rtc.EventEmitter()
+    prepare_threads, warmed = [], []
+
+    def prepare(key):
+        prepare_threads.append(threading.current_thread())
+        return f"result for {key}"
+
+    def warm(key):
+        # Warming needs the event loop
+        asyncio.get_running_loop()
+        warmed.append(key)
+
+    prefetcher = SpeculativePrefetcher()
+    prefetcher.add_intent("lookup", lambda text: "jio" if "jio" in text.lower() else None, prepare, warm)
+    prefetcher.attach(session)
+    session.emit("user_input_transcribed", SimpleNamespace(transcript="what is jio", is_final=False))
+    # The handler only schedules the work
+    assert prepare_threads == []
+
+    await prefetcher._task
+    assert prepare_threads and prepare_threads[0] is not threading.main_thread()
+    assert warmed == ["jio"]
+    assert prefetcher.take("lookup", "jio") == "result for jio"
+
+
+async def test_only_the_newest_transcript_waits():
+    session = rtc.EventEmitter()
+    seen, release = [], threading.Event()
+
+    def detect(text):
+        seen.append(text)
+        release.wait(timeout=5)
+        return None
+
+    prefetcher = SpeculativePrefetcher()
+    prefetcher.add_intent("lookup", detect, lambda key: key)
+    prefetcher.attach(session)
+    for transcript in ["tell", "tell me", "tell me about", "tell me about jio"]:
+        session.emit("user_input_transcribed", SimpleNamespace(transcript=transcript, is_final=False))
+        await asyncio.sleep(0.05)
+    release.set()
+    await prefetcher._task
+
+    assert seen == ["tell", "tell me about jio"]
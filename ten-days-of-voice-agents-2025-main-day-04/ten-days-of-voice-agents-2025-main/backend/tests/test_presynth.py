@@ -0,0 +1,38 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from audio_cache import AudioCache
+from local_tts import start_server
+from presynth import VOICES, collect_utterances, main, presynthesize
+
+SHARED_DATA_DIR = Path(__file__).resolve().parent.parent.parent / "shared-data"
+
+
+def test_collects_summaries_and_questions():
+    utterances = collect_utterances(SHARED_DATA_DIR)
+    assert "What is a variable and how do you create one in Python?" in utterances
+    assert len(utterances) == len(set(utterances))
+
+
+@pytest.mark.asyncio
+async def test_presynthesis_renders_every_mode_voice(tmp_path):
+    runner, url = await start_server()
+    try:
+        cache = AudioCache(tmp_path)
+        stats = await presynthesize(cache, SHARED_DATA_DIR, concurrency=3, local_url=url)
+        assert stats["voices"] == len(VOICES)
+        assert stats["failed"] == 0
+        assert stats["synthesized"] == stats["sentences"] > 0
+    finally:
+        await runner.cleanup()
+
+
+def test_strict_run_fails_without_content(tmp_path):
+    args = ["--shared-data", str(tmp_path / "missing"), "--cache-dir", str(tmp_path / "cache"), "--local-url", "http://127.0.0.1:9"]
+    assert main(args) == 0
+    assert main(args + ["--strict"]) == 1
@@ -0,0 +1,64 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from livekit import rtc
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from voice_pool import SwitchTTFBTracker, VoicePool
+
+
+class FakeTTS(rtc.EventEmitter):
+    def __init__(self, voice):
+        super().__init__()
+        self.voice = voice
+        self.prewarmed = 0
+        self.closed = False
+
+    def prewarm(self):
+        self.prewarmed += 1
+
+    async def aclose(self):
+        self.closed = True
+
+    def speak(self, ttfb):
+        self.emit("metrics_collected", SimpleNamespace(ttfb=ttfb, cancelled=False))
+
+
+def test_tracker_separates_switch_and_steady_ttfb():
+    tracker = SwitchTTFBTracker()
+    assert tracker.record("matthew", 0.2) is False
+    assert tracker.record("matthew", 0.2) is False
+    assert tracker.record("alicia", 0.9) is True
+    assert tracker.record("alicia", 0.3) is False
+
+    stats = tracker.stats()
+    assert stats["switches"] == 1
+    assert stats["switch_ttfb_p50_ms"] == 900.0
+    assert stats["steady_ttfb_p50_ms"] == 200.0
+
+
+@pytest.mark.asyncio
+async def test_pool_prewarms_every_voice_and_forwards_metrics():
+    pool = VoicePool(FakeTTS, ["matthew", "alicia", "ken"])
+    pool.prewarm()
+    assert all(pool.get(voice).prewarmed == 1 for voice in ["matthew", "alicia", "ken"])
+
+    forwarded = []
+    session_tts = pool.get("matthew")
+    pool.forward_metrics(forwarded.append, skip=session_tts)
+
+    session_tts.speak(0.1)
+    pool.get("alicia").speak(0.4)
+    # The session already reports its own TTS, only the other voices are forwarded
+    assert [m.ttfb for m in forwarded] == [0.4]
+    assert pool.tracker.stats()["switches"] == 1
+
+    # Unknown voices are created and warmed on demand
+    assert pool.get("natalie").prewarmed == 1
+
+    await pool.aclose()
+    assert session_tts.closed
@@ -7,12 +7,11 @@ import os
 env_path = Path(__file__).parent.parent / ".env.local"
 load_dotenv(dotenv_path=env_path)
 
-import json
 import traceback
 import time
 import asyncio
 from datetime import datetime
-from typing import Annotated, List, Dict, Any, Optional
+from typing import Annotated, AsyncIterable, List, Dict, Any, Optional
 from livekit.agents import (
     Agent,
     AgentSession,
@@ -26,19 +25,68 @@ from livekit.agents import (
     tokenize,
     function_tool,
     RunContext,
+    ModelSettings,
     llm,
+    tts,
+    utils,
 )
-from livekit.plugins import openai, silero, google, deepgram, noise_cancellation
+from livekit.plugins import openai, google, deepgram, murf
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
+from answer_cache import answer_cache, current_turn, grounded_answer, question_terms
+from audio_cache import CachedTTS, StaticLines, get_audio_cache
+from content_cache import ContentCache, content_cache
+from context_compactor import ContextCompactor, LLMSummarizer
+from faq_index import VerticalSpotter, get_faq_index
+from hedged_llm import HedgedLLM
+from hedged_tts import HedgedTTS
+from lead_store import create_lead_store
+from persistence import get_persistence_queue
+from prefetch import SpeculativePrefetcher
+from prompt_cache import CachedTokenRatio, prompt_cache
+from tenant_registry import Tenant, TenantRegistry, greeting_for
+from vad_batcher import BatchedVAD
+from warmup import FirstTurnTimer, job_executor_type, prewarm_models, startup_timings, warm_turn_detector
+
 logger = logging.getLogger("agent")
 
+SHARED_DATA_DIR = Path(__file__).resolve().parent.parent.parent / "shared-data"
+CONTENT_PATH = SHARED_DATA_DIR / "reliance_content.json"
+
+# Callers wrapping up, the prompt has the agent call save_lead next
+CLOSING_PHRASES = ("that's all", "that is all", "that's it", "nothing else", "thank you", "thanks", "goodbye", "bye")
+
+
+def detect_closing(transcript: str) -> Optional[str]:
+    text = transcript.lower().replace("\u2019", "'")
+    return "close" if any(phrase in text for phrase in CLOSING_PHRASES) else None
+
 
 class RelianceSDRAgent(Agent):
-    def __init__(self) -> None:
-        # Load content
+    def __init__(self, content_cache: ContentCache = content_cache, tenant: Optional[Tenant] = None) -> None:
+        # Content comes from the process-wide cache filled in prewarm, not from disk
+        self.content_cache = content_cache
+        # Any SDR content file can be served, Reliance is only the default
+        self.tenant = tenant
+        self.content_path = tenant.content_path if tenant else CONTENT_PATH
         self.content = self._load_content()
-        self.leads_path = Path(__file__).resolve().parent.parent.parent / "shared-data" / "leads.json"
+        # Knowledge base lookups go through a local BM25 index instead of the prompt
+        self.faq_index = get_faq_index(self.content_digest, self.content)
+        self.verticals = VerticalSpotter(self.content)
+        # lookup_faq and save_lead results prepared from interim transcripts
+        self.prefetcher = SpeculativePrefetcher()
+        # Matched and rendered off the event loop, the TTS connection is opened on it
+        self.prefetcher.add_intent("lookup_faq", self.verticals.spot, self._render_lookup, lambda _: self._warm_tts())
+        self.prefetcher.add_intent(
+            "save_lead", detect_closing, lambda _: self._render_lead_saved(), lambda _: self._warm_tts()
+        )
+        self.leads_path = SHARED_DATA_DIR / "leads.json"
+        # Backend is chosen with LEAD_STORE (journal, sqlite or sharded)
+        self.lead_store = create_lead_store(self.leads_path.parent)
+        # save_lead only enqueues, a writer thread commits leads to the store in batches
+        self.lead_queue = get_persistence_queue("leads", self.lead_store.append_many)
+        # Start of the current user turn, for the answer cache's latency numbers
+        self._turn_started = time.perf_counter()
         
         super().__init__(
             instructions=self._get_instructions(),
@@ -46,42 +94,91 @@ class RelianceSDRAgent(Agent):
 
     def _load_content(self) -> Dict[str, Any]:
         try:
-            content_path = Path(__file__).resolve().parent.parent.parent / "shared-data" / "reliance_content.json"
-            with open(content_path, "r") as f:
-                return json.load(f)
+            entry = self.content_cache.entry(self.content_path)
+            self.content_digest = entry.digest
+            return entry.data
         except Exception as e:
             logger.error(f"Error loading content: {e}")
+            self.content_digest = None
             return {}
 
     def _get_instructions(self) -> str:
-        company_info = self.content.get("company_info", {})
-        verticals = self.content.get("verticals", [])
-        faqs = self.content.get("faqs", [])
-        
-        verticals_str = "\n".join([f"- {v['name']}: {v['description']}" for v in verticals])
-        faqs_str = "\n".join([f"Q: {f['question']}\nA: {f['answer']}" for f in faqs])
+        if self.content_digest is None:
+            return self._render_instructions()
+        # Every session with the same content gets the very same string
+        return prompt_cache.get_or_render((self.content_digest, "sdr", None, None), self._render_instructions)
+
+    @property
+    def company_name(self) -> str:
+        return self.content.get("company_info", {}).get("name", "Reliance Group")
+
+    @property
+    def greeting(self) -> str:
+        # Spoken verbatim on every call, so the audio cache serves it after the first time
+        return greeting_for(self.company_name)
+
+    async def on_enter(self) -> None:
+        self.session.say(self.greeting)
+
+    async def llm_node(
+        self, chat_ctx: llm.ChatContext, tools: List[llm.FunctionTool], model_settings: ModelSettings
+    ) -> AsyncIterable[Any]:
+        question, tools_called = current_turn(chat_ctx.items)
+        if question is None or self.content_digest is None:
+            async for chunk in Agent.default.llm_node(self, chat_ctx, tools, model_settings):
+                yield chunk
+            return
+
+        if not tools_called:
+            # Fresh question: answer repeated knowledge-base questions without the LLM
+            self._turn_started = time.perf_counter()
+            hit = answer_cache.lookup(self.content_digest, question)
+            if hit:
+                logger.info(f"Answer cache hit ({hit.score:.2f}), saved {hit.saved * 1000:.0f}ms")
+                yield hit.answer
+                return
+
+        # Only turns answered from a knowledge-base lookup, and nothing else, can be reused
+        cacheable = bool(tools_called) and set(tools_called) == {"lookup_faq"}
+        first_text: Optional[float] = None
+        parts: List[str] = []
+        async for chunk in Agent.default.llm_node(self, chat_ctx, tools, model_settings):
+            if isinstance(chunk, llm.ChatChunk) and chunk.delta:
+                if chunk.delta.tool_calls:
+                    cacheable = False
+                text = chunk.delta.content
+            else:
+                text = chunk if isinstance(chunk, str) else None
+            if text:
+                first_text = first_text or time.perf_counter()
+                parts.append(text)
+            yield chunk
+
+        if cacheable and first_text:
+            # What gets cached is the knowledge base's own text, never this turn, which may address the caller by name
+            documents = [doc for _, doc in self.faq_index.search(question, k=3)]
+            answer = grounded_answer(documents, "".join(parts))
+            if answer:
+                answer_cache.store(self.content_digest, question, answer, ttft=first_text - self._turn_started)
+
+    def _render_instructions(self) -> str:
+        company_name = self.company_name
         
         return f"""
-        You are an elite Sales Development Representative (SDR) for the **{company_info.get('name', 'Reliance Group')}**.
-        
-        **COMPANY OVERVIEW:**
-        {company_info.get('description')}
-        Mission: {company_info.get('mission')}
-        
-        **KEY BUSINESS VERTICALS:**
-        {verticals_str}
+        You are an elite Sales Development Representative (SDR) for the **{company_name}**.
         
-        **FAQ KNOWLEDGE BASE:**
-        {faqs_str}
+        **KNOWLEDGE BASE:**
+        Company facts, business verticals, group companies and FAQs are NOT in this prompt.
+        Call the `lookup_faq` tool with the caller's question before answering anything factual about the company.
         
         **YOUR GOAL:**
         1.  **Qualify the Lead:** engagingly ask for their Name, Company, Role, and which Vertical/Product they are interested in.
-        2.  **Answer Questions:** Use the FAQ and Vertical info to answer questions accurately. If you don't know, admit it and offer to connect them with a specialist.
+        2.  **Answer Questions:** Use what `lookup_faq` returns to answer questions accurately. If you don't know, admit it and offer to connect them with a specialist.
         3.  **Close:** Once you have their details and have answered their questions, summarize their interest and end the call professionally.
         
         **YOUR PERSONA:**
         - **Tone:** Professional, warm, respectful, and helpful (Corporate Indian English accent preferred).
-        - **Greeting:** "Namaste! Welcome to Reliance Group. I am your AI Assistant. How may I help you explore our digital services and energy solutions today?"
+        - **Greeting:** The call opens with "{self.greeting}" (already spoken for you, don't repeat it).
         - **Behavior:**
           - Be concise. Voice interfaces require shorter answers.
           - Don't interrogate. Ask for details naturally during the conversation.
@@ -94,6 +191,45 @@ class RelianceSDRAgent(Agent):
         2.  Call the `save_lead` tool.
         """
 
+    def _warm_tts(self) -> None:
+        """Open the TTS connection now, the spoken answer follows the tool call"""
+        try:
+            session_tts = self.session.tts
+        except RuntimeError:
+            return  # Not running in a session
+        if session_tts is not None:
+            session_tts.prewarm()
+
+    def _render_lookup(self, query: str) -> str:
+        results = self.faq_index.search(query, k=3)
+        if not results:
+            return "Nothing in the knowledge base matches that. Offer to connect them with a specialist."
+        logger.info(f"FAQ lookup '{query}': {[doc.title for _, doc in results]}")
+        return "\n\n".join(doc.text for _, doc in results)
+
+    def _render_lead_saved(self) -> str:
+        return f"Lead saved successfully. Thank you for your interest in {self.company_name}."
+
+    @function_tool
+    async def lookup_faq(
+        self,
+        ctx: RunContext,
+        query: Annotated[str, "The caller's question or topic, e.g. 'Jio 5G' or 'green hydrogen'"],
+    ):
+        """Look up company facts, business verticals, group companies and FAQs. Call this before answering any question about the company."""
+        try:
+            # A query that only names a vertical ("Jio", "tell me about JioMart") gets the
+            # result prepared while the caller was talking, anything more specific is searched
+            vertical = self.verticals.spot(query)
+            if vertical and set(question_terms(query)) <= self.verticals.terms:
+                prefetched = self.prefetcher.take("lookup_faq", vertical)
+                if prefetched is not None:
+                    return prefetched
+            return self._render_lookup(query)
+        except Exception as e:
+            logger.error(f"Error looking up FAQ: {e}")
+            return "The knowledge base is unavailable right now. Offer to connect them with a specialist."
+
     @function_tool
     async def save_lead(
         self,
@@ -114,33 +250,54 @@ class RelianceSDRAgent(Agent):
                 "email": email,
                 "role": role,
                 "interest": interest,
-                "timeline": timeline
+                "timeline": timeline,
+                "tenant": self.tenant.tenant_id if self.tenant else None,
             }
             
-            # Load existing leads
-            leads = []
-            if self.leads_path.exists():
-                with open(self.leads_path, "r") as f:
-                    try:
-                        leads = json.load(f)
-                    except json.JSONDecodeError:
-                        leads = []
-            
-            leads.append(lead_data)
-            
-            # Save back
-            with open(self.leads_path, "w") as f:
-                json.dump(leads, f, indent=2)
+            # Returns immediately, the writer thread does the disk I/O
+            self.lead_queue.submit(lead_data)
                 
             logger.info(f"Lead saved: {name} from {company}")
-            return "Lead saved successfully. Thank you for your interest in Reliance Group."
+            return self.prefetcher.take("save_lead", "close") or self._render_lead_saved()
             
         except Exception as e:
             logger.error(f"Error saving lead: {e}")
             return "There was an error saving your details, but I have noted them down."
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    # VAD and noise cancellation loaded and warmed, turn detector files checked, all timed
+    prewarm_models(proc)
+    # Parse every tenant's content once per process, sessions share the frozen result
+    tenants = TenantRegistry(SHARED_DATA_DIR, content_cache=content_cache)
+    tenants.discover()
+    proc.userdata["content_cache"] = content_cache
+    proc.userdata["tenants"] = tenants
+    # Build the FAQ indexes up front so the first lookup_faq call doesn't pay for it
+    for tenant_id in tenants.tenant_ids:
+        try:
+            entry = content_cache.entry(tenants.get(tenant_id).content_path)
+            get_faq_index(entry.digest, entry.data)
+        except Exception as e:
+            logger.error(f"Error building FAQ index for {tenant_id}: {e}")
+
+
+def build_tts(static_lines: StaticLines) -> tts.TTS:
+    """
+    Murf first, hedged with Deepgram when Murf is slow or down. Deepgram alone if
+    there is no Murf key. Static lines play from the local audio cache once spoken.
+    """
+    fallback = CachedTTS(
+        deepgram.TTS(model="aura-helios-en"), get_audio_cache(), voice="aura-helios-en", static_lines=static_lines
+    )
+    try:
+        primary = murf.TTS(voice="en-US-matthew", style="Conversation")
+    except ValueError as e:
+        logger.warning(f"Murf TTS not configured, using Deepgram only: {e}")
+        return fallback
+    return HedgedTTS(
+        CachedTTS(primary, get_audio_cache(), voice="en-US-matthew", style="Conversation", static_lines=static_lines),
+        fallback,
+    )
 
 
 async def entrypoint(ctx: JobContext):
@@ -149,39 +306,89 @@ async def entrypoint(ctx: JobContext):
             "room": ctx.room.name,
         }
 
+        # Dispatch metadata wins over room metadata, e.g. {"tenant": "tata"}
+        tenant = ctx.proc.userdata["tenants"].resolve(ctx.job.metadata, ctx.job.room.metadata)
+        ctx.log_context_fields["tenant"] = tenant.tenant_id if tenant else None
+
         # Initialize the agent
-        agent = RelianceSDRAgent()
+        agent = RelianceSDRAgent(content_cache=ctx.proc.userdata["content_cache"], tenant=tenant)
 
+        # Gemini TTFT swings from turn to turn, late first tokens are hedged with a lighter model
+        session_llm = HedgedLLM(
+            google.LLM(model="gemini-2.5-flash"),
+            google.LLM(model=os.getenv("LLM_HEDGE_MODEL", "gemini-2.5-flash-lite")),
+        )
+        # Only the greeting is cached, the rest of the call can carry the caller's details
+        session_tts = build_tts(StaticLines([agent.greeting]))
+        # The turn detector's cold first inference runs now instead of on the user's first turn
+        turn_detector = MultilingualModel()
+        turn_detector_warmup = asyncio.create_task(warm_turn_detector(turn_detector))
+        ctx.add_shutdown_callback(lambda: utils.aio.cancel_and_wait(turn_detector_warmup))
         session = AgentSession(
             stt=deepgram.STT(model="nova-3"),
-            llm=google.LLM(
-                model="gemini-2.5-flash",
-            ),
-            # Use Deepgram TTS as OpenAI key is missing and Murf is unavailable
-            tts=deepgram.TTS(model="aura-helios-en"), 
-            turn_detection=MultilingualModel(),
+            llm=session_llm,
+            tts=session_tts,
+            turn_detection=turn_detector,
             vad=ctx.proc.userdata["vad"],
             preemptive_generation=True,
         )
         
+        # Old turns are folded into a running summary between turns, so prompt size stays flat
+        compactor = ContextCompactor(
+            agent,
+            "sdr",
+            summarizer=LLMSummarizer(google.LLM(model=os.getenv("SUMMARY_MODEL", "gemini-2.5-flash-lite")), "sdr"),
+        )
+        compactor.attach(session)
+        # Vertical lookups and the closing save_lead are prepared from interim transcripts
+        agent.prefetcher.attach(session)
+
         usage_collector = metrics.UsageCollector()
+        first_turn = FirstTurnTimer()
+        cached_ratio = CachedTokenRatio()
 
         @session.on("metrics_collected")
         def _on_metrics_collected(ev: MetricsCollectedEvent):
             metrics.log_metrics(ev.metrics)
             usage_collector.collect(ev.metrics)
+            first_turn.collect(ev.metrics)
+            if isinstance(ev.metrics, metrics.LLMMetrics):
+                cached_ratio.collect(ev.metrics)
+                logger.info(f"Prompt cached tokens: {ev.metrics.prompt_cached_tokens}/{ev.metrics.prompt_tokens}")
 
         async def log_usage():
             summary = usage_collector.get_summary()
             logger.info(f"Usage: {summary}")
+            logger.info(f"Prompt cache: {prompt_cache.stats()}")
+            logger.info(f"Audio cache: {get_audio_cache().stats()}")
+            logger.info(f"Answer cache: {answer_cache.stats()}")
+            logger.info(f"LLM hedging: {session_llm.stats()}")
+            logger.info(f"Startup timings: {startup_timings.stats()}")
+            if isinstance(ctx.proc.userdata["vad"], BatchedVAD):
+                logger.info(f"VAD batching: {ctx.proc.userdata['vad'].batcher.stats()}")
+            logger.info(f"Context compaction: {compactor.stats()}")
+            logger.info(f"Speculative prefetch: {agent.prefetcher.stats()}")
+            if isinstance(session_tts, HedgedTTS):
+                logger.info(f"Hedged TTS: {session_tts.stats()}")
+            logger.info(f"Provider prefix cache: {cached_ratio.stats()}")
 
         ctx.add_shutdown_callback(log_usage)
+        ctx.add_shutdown_callback(compactor.aclose)
+        ctx.add_shutdown_callback(agent.prefetcher.aclose)
+
+        async def flush_leads():
+            if not await agent.lead_queue.aflush(timeout=10):
+                logger.error("Timed out flushing queued leads")
+            await asyncio.to_thread(agent.lead_store.flush)
+            logger.info(f"Lead persistence: {agent.lead_queue.metrics()}")
+
+        ctx.add_shutdown_callback(flush_leads)
 
         await session.start(
             agent=agent,
             room=ctx.room,
             room_input_options=RoomInputOptions(
-                noise_cancellation=noise_cancellation.BVC(),
+                noise_cancellation=ctx.proc.userdata["noise_cancellation"],
             ),
         )
 
@@ -198,6 +405,7 @@ if __name__ == "__main__":
         WorkerOptions(
             entrypoint_fnc=entrypoint, 
             prewarm_fnc=prewarm,
+            job_executor_type=job_executor_type(),
             ws_url=os.getenv("LIVEKIT_URL"),
             api_key=os.getenv("LIVEKIT_API_KEY"),
             api_secret=os.getenv("LIVEKIT_API_SECRET"),
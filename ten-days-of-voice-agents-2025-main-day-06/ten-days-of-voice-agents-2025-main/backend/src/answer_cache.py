@@ -0,0 +1,223 @@
+"""
+Cache of answers to repeated knowledge-base questions.
+When the LLM answers a caller's question from a document that lookup_faq
+returned (an FAQ, a business vertical or the company overview), that document's
+own text from the knowledge base is stored under a bag-of-stems vector of the
+question, scoped to the tenant's content hash. The LLM's turn is never stored:
+it is only used to check which document it was built from, since it can carry
+the caller's name and follow-up questions that must not be spoken to the next
+caller. A later question close enough to a stored one (cosine
+similarity over the stems) is answered straight from the cache without an LLM
+round trip. Entries expire after a TTL and the least recently used ones are
+evicted first.
+"""
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from faq_index import tokenize
+
+# Words that carry no meaning for matching questions ("tell me about Jio" == "Jio")
+FILLER = {
+    "about", "any", "could", "detail", "explain", "give", "info", "information", "know",
+    "like", "more", "please", "some", "tell", "want", "would",
+}
+
+# Questions that point back into the conversation can't be answered from a cache
+CONTEXT_WORDS = {"that", "this", "these", "those", "they", "them", "it", "its", "he", "she", "there", "same"}
+
+WORD_RE = re.compile(r"[a-z0-9']+")
+
+# Emails and phone numbers keep a question out of the cache
+PII_RE = re.compile(r"\S+@\S+|\d[\d\s-]{5,}\d")
+
+# Share of a document answer's terms the LLM has to repeat for its turn to count as built from it
+GROUNDED_COVERAGE = 0.6
+
+
+def question_terms(question: str) -> Counter:
+    return Counter(term for term in tokenize(question) if term not in FILLER)
+
+
+def is_cacheable_question(question: str) -> bool:
+    words = set(WORD_RE.findall(question.lower()))
+    return bool(question_terms(question)) and not (words & CONTEXT_WORDS) and not PII_RE.search(question)
+
+
+def faq_answer(text: str) -> str:
+    """Answer part of an FAQ document ("Q: ...\\nA: ...")"""
+    return text.split("\nA: ", 1)[-1].strip()
+
+
+def document_answer(document: Any) -> str:
+    """What a knowledge-base document says when spoken as an answer"""
+    return faq_answer(document.text) if document.kind == "faq" else document.text.strip()
+
+
+def grounded_answer(documents: Iterable[Any], spoken: str, coverage: float = GROUNDED_COVERAGE) -> Optional[str]:
+    """
+    Answer of the document the LLM's reply was built from, or None. The returned
+    text comes from the knowledge base, so it is the same for every caller.
+    """
+    spoken_terms = set(tokenize(spoken))
+    best: Optional[str] = None
+    best_coverage = coverage
+    for document in documents:
+        answer = document_answer(document)
+        terms = set(tokenize(answer))
+        covered = len(terms & spoken_terms) / len(terms) if terms else 0.0
+        if covered >= best_coverage:
+            best, best_coverage = answer, covered
+    return best
+
+
+def _cosine(a: Counter, b: Counter, norm_a: float, norm_b: float) -> float:
+    if not norm_a or not norm_b:
+        return 0.0
+    return sum(count * b[term] for term, count in a.items() if term in b) / (norm_a * norm_b)
+
+
+def _norm(terms: Counter) -> float:
+    return math.sqrt(sum(count * count for count in terms.values()))
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    terms: Counter
+    norm: float
+    # Time the LLM took to the first answer text, which a hit saves
+    ttft: float
+    created: float = field(default_factory=time.monotonic)
+    hits: int = 0
+
+
+@dataclass(frozen=True)
+class AnswerHit:
+    entry: CachedAnswer
+    score: float
+    lookup_time: float
+
+    @property
+    def answer(self) -> str:
+        return self.entry.answer
+
+    @property
+    def saved(self) -> float:
+        return max(0.0, self.entry.ttft - self.lookup_time)
+
+
+def current_turn(items: Iterable[Any]) -> Tuple[Optional[str], List[str]]:
+    """
+    The latest user message in a chat context and the names of the tools called
+    since. No tools means the LLM is about to answer a fresh question.
+    """
+    tools: List[str] = []
+    for item in reversed(list(items)):
+        kind = getattr(item, "type", None)
+        if kind == "function_call":
+            tools.append(item.name)
+        elif kind == "message" and item.role == "user":
+            return item.text_content, list(reversed(tools))
+    return None, list(reversed(tools))
+
+
+class AnswerCache:
+    """LRU + TTL cache of answers keyed by (scope, question vector)"""
+
+    def __init__(self, max_entries: int = 512, ttl: Optional[float] = None, threshold: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl if ttl is not None else float(os.getenv("ANSWER_CACHE_TTL", "21600"))
+        self.threshold = threshold if threshold is not None else float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.85"))
+        self._entries: "OrderedDict[Tuple[Hashable, str], CachedAnswer]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def _key(terms: Counter) -> str:
+        return " ".join(sorted(terms.elements()))
+
+    def lookup(self, scope: Hashable, question: str) -> Optional[AnswerHit]:
+        start = time.perf_counter()
+        if not is_cacheable_question(question):
+            return None
+        terms = question_terms(question)
+        norm = _norm(terms)
+        now = time.monotonic()
+
+        with self._lock:
+            self.lookups += 1
+            best: Optional[Tuple[Tuple[Hashable, str], CachedAnswer, float]] = None
+            exact_key = (scope, self._key(terms))
+            exact = self._entries.get(exact_key)
+            if exact is not None and now - exact.created <= self.ttl:
+                best = (exact_key, exact, 1.0)
+            else:
+                for key, entry in list(self._entries.items()):
+                    if now - entry.created > self.ttl:
+                        del self._entries[key]
+                        self.expirations += 1
+                        continue
+                    if key[0] != scope:
+                        continue
+                    score = _cosine(terms, entry.terms, norm, entry.norm)
+                    if score >= self.threshold and (best is None or score > best[2]):
+                        best = (key, entry, score)
+
+            if best is None:
+                return None
+            key, entry, score = best
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self.hits += 1
+            hit = AnswerHit(entry, score, time.perf_counter() - start)
+            self.saved_seconds += hit.saved
+            return hit
+
+    def store(self, scope: Hashable, question: str, answer: str, ttft: float) -> bool:
+        """Remember an answer. Returns False for questions that can't be cached."""
+        if not answer.strip() or not is_cacheable_question(question):
+            return False
+        terms = question_terms(question)
+        entry = CachedAnswer(question, answer.strip(), terms, _norm(terms), ttft)
+        with self._lock:
+            key = (scope, self._key(terms))
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self.stores += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hit_rate, 3),
+                "entries": len(self._entries),
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "saved_ms": round(self.saved_seconds * 1000, 1),
+            }
+
+
+# Singleton instance, callers in one worker process share answers
+answer_cache = AnswerCache()
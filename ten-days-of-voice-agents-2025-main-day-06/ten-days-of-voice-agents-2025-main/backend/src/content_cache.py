@@ -0,0 +1,121 @@
+"""
+Process-wide cache for the shared-data content files.
+Files are parsed once, normally in prewarm, into read-only structures that every
+session in the process shares. A file is re-read only when its mtime or size
+changes, and re-parsed only when its content hash changes, so edits still take
+effect without restarting workers.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger("agent")
+
+
+class FrozenDict(dict):
+    """A dict that refuses mutation. Still a dict, so json.dumps and .get work as before."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("shared content is read-only")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __ior__(self, other):
+        raise TypeError("shared content is read-only")
+
+
+def freeze(value: Any) -> Any:
+    """Recursively turn dicts into FrozenDicts and lists into tuples"""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+@dataclass(frozen=True)
+class ContentEntry:
+    data: Any
+    digest: str
+    mtime_ns: int
+    size: int
+
+
+class ContentCache:
+    """Parsed, frozen content files keyed by path, refreshed at most every `check_interval` seconds"""
+
+    def __init__(self, check_interval: float = 2.0):
+        self.check_interval = check_interval
+        self._entries: Dict[Path, ContentEntry] = {}
+        self._last_check: Dict[Path, float] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def _read(self, path: Path, previous: Optional[ContentEntry]) -> ContentEntry:
+        stat = os.stat(path)
+        with open(path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+
+        if previous and previous.digest == digest:
+            # Touched but unchanged, keep the same objects
+            return ContentEntry(previous.data, digest, stat.st_mtime_ns, stat.st_size)
+
+        self.loads += 1
+        return ContentEntry(freeze(json.loads(raw)), digest, stat.st_mtime_ns, stat.st_size)
+
+    def entry(self, path: Path) -> ContentEntry:
+        """The current entry for `path`, loading or reloading it if needed"""
+        path = Path(path).resolve()
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and now - self._last_check.get(path, 0.0) < self.check_interval:
+                return entry
+
+            self._last_check[path] = now
+            if entry is not None:
+                try:
+                    stat = os.stat(path)
+                    if (stat.st_mtime_ns, stat.st_size) == (entry.mtime_ns, entry.size):
+                        return entry
+                except OSError as e:
+                    logger.error(f"Can't stat {path}, serving cached content: {e}")
+                    return entry
+
+            try:
+                new_entry = self._read(path, entry)
+            except (OSError, ValueError) as e:
+                if entry is None:
+                    raise
+                # A half-saved edit shouldn't take the agent down, keep the last good version
+                logger.error(f"Failed to reload {path}, serving cached content: {e}")
+                return entry
+
+            if entry is not None and new_entry.digest != entry.digest:
+                logger.info(f"Reloaded content from {path}")
+            self._entries[path] = new_entry
+            return new_entry
+
+    def get(self, path: Path) -> Any:
+        return self.entry(path).data
+
+    def preload(self, paths: Iterable[Path]) -> None:
+        """Load files up front, typically from prewarm. Missing or broken files are logged and skipped."""
+        for path in paths:
+            try:
+                self.entry(path)
+            except Exception as e:
+                logger.error(f"Error preloading content {path}: {e}")
+
+
+# Singleton instance, shared by every session in the process
+content_cache = ContentCache()
@@ -0,0 +1,244 @@
+"""
+Bounded conversation context.
+Each persona gets a token budget for its chat history; the instructions and the
+capped summary are a prefix and don't count. Once the history goes over budget,
+the oldest turns are folded into a running summary and old tool results are
+trimmed, down to a fraction of the budget. Compaction runs in the background
+when the agent goes back to listening, so it never delays a reply, and the
+summary is updated incrementally instead of re-reading the whole call.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from livekit.agents import llm
+
+logger = logging.getLogger("agent")
+
+# History budgets in tokens, CONTEXT_BUDGET_TOKENS overrides them all
+BUDGETS = {"tutor": 2500, "sdr": 2000}
+DEFAULT_BUDGET = 2500
+
+# What the summary has to keep for each persona
+SUMMARY_FOCUS = {
+    "tutor": "the concepts covered, the current mode and concept, the learner's answers, mistakes and scores",
+    "sdr": "the caller's name, company, role, email, interests and timeline, and what was already answered",
+}
+
+SUMMARY_ID = "context_summary"
+SUMMARY_MAX_CHARS = 1500
+STALE_TOOL_CHARS = 160
+
+
+def estimate_tokens(item: Any) -> int:
+    """About four characters per token, close enough to budget with"""
+    if item.type == "message":
+        chars = len(item.text_content or "")
+    elif item.type == "function_call":
+        chars = len(item.name) + len(item.arguments)
+    elif item.type == "function_call_output":
+        chars = len(item.output)
+    else:
+        chars = 0
+    return chars // 4 + 4
+
+
+def _is_pinned(item: Any) -> bool:
+    """Instructions and the running summary are never compacted"""
+    return item.type == "message" and item.role in ("system", "developer")
+
+
+def history_tokens(items: Sequence[Any]) -> int:
+    return sum(estimate_tokens(item) for item in items if not _is_pinned(item))
+
+
+def transcript_lines(items: Sequence[Any], max_chars: int = 300) -> List[str]:
+    lines = []
+    for item in items:
+        if item.type == "message":
+            text = (item.text_content or "").strip()
+            if text:
+                lines.append(f"{item.role}: {text[:max_chars]}")
+        elif item.type == "function_call":
+            lines.append(f"tool call: {item.name}({item.arguments[:max_chars]})")
+        elif item.type == "function_call_output":
+            lines.append(f"tool result: {item.output[:max_chars]}")
+    return lines
+
+
+class ExtractiveSummarizer:
+    """No-LLM summary: the user's lines and tool calls, newest kept when over the cap"""
+
+    async def __call__(self, previous: str, items: Sequence[Any]) -> str:
+        lines = [line for line in transcript_lines(items, max_chars=160) if not line.startswith("tool result:")]
+        summary = "\n".join(filter(None, [previous, *lines]))
+        return summary[-SUMMARY_MAX_CHARS:]
+
+
+class LLMSummarizer:
+    """Folds new turns into the running summary with a small model, extractive if that fails"""
+
+    def __init__(self, summary_llm: llm.LLM, persona: str):
+        self.llm = summary_llm
+        self.focus = SUMMARY_FOCUS.get(persona, "the user's goals, facts they shared, decisions and open questions")
+        self.fallback = ExtractiveSummarizer()
+
+    async def __call__(self, previous: str, items: Sequence[Any]) -> str:
+        chat_ctx = llm.ChatContext.empty()
+        chat_ctx.add_message(
+            role="system",
+            content=(
+                "You maintain a running summary of a voice call. Update the summary with the new turns. "
+                f"Keep {self.focus}. Drop greetings and chit-chat. Plain sentences, under 150 words."
+            ),
+        )
+        chat_ctx.add_message(
+            role="user",
+            content=f"Summary so far:\n{previous or '(none)'}\n\nNew turns:\n" + "\n".join(transcript_lines(items)),
+        )
+        try:
+            parts = []
+            async with self.llm.chat(chat_ctx=chat_ctx) as stream:
+                async for chunk in stream:
+                    if chunk.delta and chunk.delta.content:
+                        parts.append(chunk.delta.content)
+            summary = "".join(parts).strip()
+            if summary:
+                return summary[:SUMMARY_MAX_CHARS]
+        except Exception as e:
+            logger.error(f"Error summarizing conversation, using extractive summary: {e}")
+        return await self.fallback(previous, items)
+
+
+class ContextCompactor:
+    """Keeps an agent's chat history under its persona's token budget"""
+
+    def __init__(
+        self,
+        agent: Any,
+        persona: str,
+        summarizer: Optional[Callable[[str, Sequence[Any]], Any]] = None,
+        budget_tokens: Optional[int] = None,
+        keep_turns: int = 3,
+        keep_tool_results: int = 2,
+        target_ratio: float = 0.6,
+    ):
+        self.agent = agent
+        self.persona = persona
+        self.summarizer = summarizer or ExtractiveSummarizer()
+        self.budget_tokens = budget_tokens or int(
+            os.getenv("CONTEXT_BUDGET_TOKENS", BUDGETS.get(persona, DEFAULT_BUDGET))
+        )
+        self.keep_turns = keep_turns
+        self.keep_tool_results = keep_tool_results
+        self.target_tokens = int(self.budget_tokens * target_ratio)
+        self.summary = ""
+        self._task: Optional[asyncio.Task] = None
+        self.compactions = 0
+        self.turns_summarized = 0
+        self.last_before = 0
+        self.last_after = 0
+        self.last_ms = 0.0
+
+    def attach(self, session: Any) -> None:
+        """Compact in the background whenever the agent goes back to listening"""
+        session.on("agent_state_changed", self._on_agent_state_changed)
+
+    def _on_agent_state_changed(self, ev: Any) -> None:
+        if getattr(ev, "new_state", None) == "listening":
+            self.schedule()
+
+    def schedule(self) -> None:
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._compact_safely())
+
+    async def _compact_safely(self) -> None:
+        try:
+            await self.compact()
+        except Exception as e:
+            logger.error(f"Error compacting conversation context: {e}")
+
+    def _select_head(self, items: List[Any]) -> List[Any]:
+        """Oldest turns to fold into the summary, cut at a user message so tool calls stay paired"""
+        history = [item for item in items if not _is_pinned(item)]
+        user_turns = [i for i, item in enumerate(history) if item.type == "message" and item.role == "user"]
+        if len(user_turns) <= self.keep_turns:
+            return []
+
+        # Fold as little as gets under the target, but always keep the last few turns verbatim
+        latest_cut = user_turns[-self.keep_turns]
+        for cut in user_turns[1:]:
+            if cut >= latest_cut:
+                break
+            if history_tokens(history[cut:]) <= self.target_tokens:
+                return history[:cut]
+        return history[:latest_cut]
+
+    def _trim_stale_tool_results(self, items: List[Any]) -> List[Any]:
+        outputs = [i for i, item in enumerate(items) if item.type == "function_call_output"]
+        stale = set(outputs[: max(0, len(outputs) - self.keep_tool_results)])
+        trimmed = []
+        for i, item in enumerate(items):
+            if i in stale and len(item.output) > STALE_TOOL_CHARS:
+                item = item.model_copy(update={"output": item.output[:STALE_TOOL_CHARS] + " ...(trimmed)"})
+            trimmed.append(item)
+        return trimmed
+
+    async def compact(self) -> bool:
+        """Compact now if over budget. Returns True if the chat context was replaced."""
+        start = time.perf_counter()
+        snapshot = list(self.agent.chat_ctx.items)
+        before = history_tokens(snapshot)
+        if before <= self.budget_tokens:
+            return False
+
+        head = self._select_head(snapshot)
+        if head:
+            self.summary = await self.summarizer(self.summary, head)
+
+        # The user may have spoken while the summary was written, apply to the latest context
+        chat_ctx = self.agent.chat_ctx.copy()
+        head_ids = {item.id for item in head}
+        items = [item for item in chat_ctx.items if item.id not in head_ids and item.id != SUMMARY_ID]
+        items = self._trim_stale_tool_results(items)
+        if self.summary:
+            summary = llm.ChatMessage(
+                id=SUMMARY_ID,
+                role="system",
+                content=[f"Earlier in this call:\n{self.summary}"],
+                extra={"is_summary": True},
+            )
+            # Right after the instructions, so the instructions stay a stable prefix
+            index = next((i for i, item in enumerate(items) if not _is_pinned(item)), len(items))
+            items.insert(index, summary)
+        chat_ctx.items[:] = items
+        await self.agent.update_chat_ctx(chat_ctx)
+
+        self.compactions += 1
+        self.turns_summarized += sum(1 for item in head if item.type == "message" and item.role == "user")
+        self.last_before = before
+        self.last_after = history_tokens(items)
+        self.last_ms = (time.perf_counter() - start) * 1000
+        logger.info(
+            f"Compacted {self.persona} context: {before} -> {self.last_after} history tokens "
+            f"({len(head)} items summarized) in {self.last_ms:.0f}ms"
+        )
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "budget_tokens": self.budget_tokens,
+            "compactions": self.compactions,
+            "turns_summarized": self.turns_summarized,
+            "last_before_tokens": self.last_before,
+            "last_after_tokens": self.last_after,
+            "last_compaction_ms": round(self.last_ms, 1),
+            "summary_chars": len(self.summary),
+        }
+
+    async def aclose(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
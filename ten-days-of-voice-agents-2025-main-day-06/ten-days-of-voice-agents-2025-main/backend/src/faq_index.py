@@ -0,0 +1,142 @@
+"""
+Local lexical index over an SDR knowledge base.
+FAQs, business verticals and group companies become BM25 documents that the
+lookup_faq tool searches, so the system prompt no longer has to carry the whole
+knowledge base. Everything runs in-process, no network calls.
+"""
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+from stemmer import stem_word
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from",
+    "how", "i", "in", "is", "it", "me", "my", "of", "on", "or", "our", "the", "to",
+    "we", "what", "where", "which", "who", "with", "you", "your",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [stem_word(token) for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+@dataclass(frozen=True)
+class Document:
+    kind: str
+    title: str
+    text: str
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of documents"""
+
+    def __init__(self, documents: List[Tuple[Document, str]], k1: float = 1.5, b: float = 0.75):
+        """`documents` pairs each Document with the text that should be indexed for it"""
+        self.documents = [document for document, _ in documents]
+        self.k1 = k1
+        self.b = b
+
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._doc_len: List[int] = []
+        for doc_id, (_, indexed_text) in enumerate(documents):
+            terms = Counter(tokenize(indexed_text))
+            self._doc_len.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self._postings[term].append((doc_id, tf))
+
+        n = len(self.documents)
+        self._avgdl = (sum(self._doc_len) / n) if n else 0.0
+        self._idf = {
+            term: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[float, Document]]:
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self._postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / self._avgdl)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(score, self.documents[doc_id]) for doc_id, score in ranked]
+
+
+def build_faq_index(content: Mapping[str, Any]) -> BM25Index:
+    """Index the FAQs, verticals and company overview of a content file"""
+    documents: List[Tuple[Document, str]] = []
+
+    company_info = content.get("company_info", {})
+    if company_info:
+        name = company_info.get("name", "")
+        text = f"{name}: {company_info.get('description', '')} Mission: {company_info.get('mission', '')}"
+        if company_info.get("founded"):
+            text += f" Founded in {company_info['founded']}."
+        documents.append((Document("company", name, text), f"{text} about company overview history founded mission"))
+
+    for vertical in content.get("verticals", []):
+        companies = ", ".join(vertical.get("companies", []))
+        text = f"{vertical['name']}: {vertical.get('description', '')}"
+        if companies:
+            text += f" Companies: {companies}."
+        # The id is indexed too, callers sometimes use it ("o2c", "new energy")
+        indexed = f"{text} {vertical.get('id', '').replace('_', ' ')} vertical business"
+        documents.append((Document("vertical", vertical["name"], text), indexed))
+
+    for faq in content.get("faqs", []):
+        text = f"Q: {faq['question']}\nA: {faq['answer']}"
+        # Questions count twice, they are phrased the way callers ask
+        documents.append((Document("faq", faq["question"], text), f"{faq['question']} {faq['question']} {faq['answer']}"))
+
+    return BM25Index(documents)
+
+
+class VerticalSpotter:
+    """Business vertical mentioned in free text, by vertical name, id or group company"""
+
+    def __init__(self, content: Mapping[str, Any]):
+        self._names: List[Tuple[Set[str], str]] = []
+        # Every term of every name, a query made only of these just names a vertical
+        self.terms: Set[str] = set()
+        for vertical in content.get("verticals", []):
+            names = [vertical["name"], vertical.get("id", "").replace("_", " "), *vertical.get("companies", [])]
+            # "Digital Services (Jio)" is also just "Jio"
+            names.extend(re.findall(r"\(([^)]+)\)", vertical["name"]))
+            for name in names:
+                terms = set(tokenize(name))
+                if terms:
+                    self._names.append((terms, vertical["name"]))
+                    self.terms |= terms
+
+    def spot(self, text: str) -> Optional[str]:
+        """Name of the vertical whose most specific name is fully mentioned, e.g. "JioMart" -> "Retail" """
+        words = set(tokenize(text))
+        best: Optional[Tuple[Set[str], str]] = None
+        for terms, vertical in self._names:
+            if terms <= words and (best is None or len(terms) > len(best[0])):
+                best = (terms, vertical)
+        return best[1] if best else None
+
+
+_indexes: Dict[str, BM25Index] = {}
+_lock = threading.Lock()
+
+
+def get_faq_index(content_digest: Optional[str], content: Mapping[str, Any]) -> BM25Index:
+    """Process-wide index per content version, built once (normally in prewarm)"""
+    if content_digest is None:
+        return build_faq_index(content)
+    with _lock:
+        index = _indexes.get(content_digest)
+        if index is None:
+            index = _indexes[content_digest] = build_faq_index(content)
+        return index
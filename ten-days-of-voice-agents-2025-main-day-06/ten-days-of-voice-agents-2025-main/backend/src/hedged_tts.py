@@ -0,0 +1,251 @@
+"""
+Hedged TTS across two providers.
+Every sentence goes to the primary provider first. If its first audio hasn't
+arrived by a deadline derived from the primary's recent p95 time-to-first-byte
+(or it fails outright), the same sentence is sent to the secondary provider and
+whichever answers first is played; the other request is cancelled. Per-provider
+TTFB histograms show how often and by how much the primary misses.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from livekit.agents import APIConnectOptions, tokenize, tts
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS
+
+from audio_cache import SentenceChunkedStream, SentenceSynthesizeStream
+
+logger = logging.getLogger("agent")
+
+
+class LatencyHistogram:
+    """Fixed TTFB buckets for reporting, plus a rolling window for percentiles"""
+
+    BUCKETS_MS = (50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 3000)
+
+    def __init__(self, window: int = 200):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def record(self, seconds: float) -> None:
+        ms = seconds * 1000
+        index = next((i for i, bound in enumerate(self.BUCKETS_MS) if ms <= bound), len(self.BUCKETS_MS))
+        with self._lock:
+            self.counts[index] += 1
+            self.samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self.samples:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def stats(self) -> Dict[str, Any]:
+        def ms(value: Optional[float]) -> float:
+            return round(value * 1000, 1) if value is not None else 0.0
+
+        labels = [f"<={bound}ms" for bound in self.BUCKETS_MS] + [f">{self.BUCKETS_MS[-1]}ms"]
+        with self._lock:
+            buckets = {label: count for label, count in zip(labels, self.counts) if count}
+            count = sum(self.counts)
+        return {"count": count, "p50_ms": ms(self.quantile(0.5)), "p95_ms": ms(self.quantile(0.95)), "buckets": buckets}
+
+
+class _Attempt:
+    """One provider request for a sentence, started right away"""
+
+    def __init__(self, provider_tts: tts.TTS, text: str, conn_options: APIConnectOptions):
+        self.tts = provider_tts
+        self.started = time.perf_counter()
+        self.ttfb: Optional[float] = None
+        if provider_tts.capabilities.streaming:
+            self.stream: Any = provider_tts.stream(conn_options=conn_options)
+            self.stream.push_text(text)
+            self.stream.end_input()
+        else:
+            self.stream = provider_tts.synthesize(text, conn_options=conn_options)
+        self._iter = self.stream.__aiter__()
+        self.first = asyncio.ensure_future(self._first_audio())
+        self.first.add_done_callback(self._on_first)
+
+    async def _first_audio(self) -> Optional[tts.SynthesizedAudio]:
+        try:
+            return await self._iter.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    def _on_first(self, _: asyncio.Future) -> None:
+        self.ttfb = time.perf_counter() - self.started
+
+    @property
+    def succeeded(self) -> bool:
+        return self.first.done() and not self.first.cancelled() and self.first.exception() is None
+
+    async def next_audio(self) -> Optional[tts.SynthesizedAudio]:
+        try:
+            return await self._iter.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    async def aclose(self) -> None:
+        if not self.first.done():
+            self.first.cancel()
+        try:
+            await self.stream.aclose()
+        except Exception as e:
+            logger.error(f"Error closing {self.tts.provider} TTS stream: {e}")
+
+
+class HedgedTTS(tts.TTS):
+    """
+    Primary TTS with a secondary hedge. Both providers must produce the same
+    sample rate and channel count, audio from either goes into the same stream.
+    """
+
+    def __init__(
+        self,
+        primary: tts.TTS,
+        secondary: tts.TTS,
+        *,
+        initial_deadline: float = 0.8,
+        min_deadline: float = 0.25,
+        max_deadline: float = 2.0,
+        min_samples: int = 10,
+        sentence_tokenizer: Optional[tokenize.SentenceTokenizer] = None,
+    ):
+        if (primary.sample_rate, primary.num_channels) != (secondary.sample_rate, secondary.num_channels):
+            raise ValueError(
+                f"Hedged providers must match: {primary.provider} is {primary.sample_rate}Hz/{primary.num_channels}ch, "
+                f"{secondary.provider} is {secondary.sample_rate}Hz/{secondary.num_channels}ch"
+            )
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=True),
+            sample_rate=primary.sample_rate,
+            num_channels=primary.num_channels,
+        )
+        self._primary = primary
+        self._secondary = secondary
+        self.initial_deadline = initial_deadline
+        self.min_deadline = min_deadline
+        self.max_deadline = max_deadline
+        self.min_samples = min_samples
+        self._sentence_tokenizer = sentence_tokenizer or tokenize.blingfire.SentenceTokenizer(retain_format=True)
+        self.latency = {"primary": LatencyHistogram(), "secondary": LatencyHistogram()}
+        self.requests = 0
+        self.hedged = 0
+        self.secondary_wins = 0
+        self.primary_failures = 0
+        for wrapped in (primary, secondary):
+            wrapped.on("metrics_collected", self._on_metrics_collected)
+
+    @property
+    def model(self) -> str:
+        return self._primary.model
+
+    @property
+    def provider(self) -> str:
+        return self._primary.provider
+
+    def _on_metrics_collected(self, *args: Any, **kwargs: Any) -> None:
+        self.emit("metrics_collected", *args, **kwargs)
+
+    def deadline(self) -> float:
+        """How long to wait for the primary's first audio before hedging"""
+        p95 = self.latency["primary"].quantile(0.95)
+        if p95 is None or len(self.latency["primary"]) < self.min_samples:
+            p95 = self.initial_deadline
+        return min(self.max_deadline, max(self.min_deadline, p95))
+
+    async def speak(self, text: str, output_emitter: tts.AudioEmitter, conn_options: APIConnectOptions) -> float:
+        """Push the audio for one sentence from whichever provider answers first. Returns its duration."""
+        self.requests += 1
+        deadline = self.deadline()
+        primary = _Attempt(self._primary, text, conn_options)
+        attempts: List[_Attempt] = [primary]
+        try:
+            await asyncio.wait({primary.first}, timeout=deadline)
+            if not primary.succeeded:
+                reason = "failed" if primary.first.done() else f"silent after {deadline * 1000:.0f}ms"
+                logger.warning(f"Primary TTS {self._primary.provider} {reason}, hedging with {self._secondary.provider}")
+                self.hedged += 1
+                attempts.append(_Attempt(self._secondary, text, conn_options))
+
+            winner = await self._race(attempts)
+            self._record(attempts, winner)
+            if winner is None:
+                # Both failed, surface the primary's error
+                raise primary.first.exception()
+
+            duration = 0.0
+            audio = winner.first.result()
+            while audio is not None:
+                output_emitter.push(audio.frame.data.tobytes())
+                duration += audio.frame.duration
+                audio = await winner.next_audio()
+            return duration
+        finally:
+            for attempt in attempts:
+                await attempt.aclose()
+
+    async def _race(self, attempts: List[_Attempt]) -> Optional[_Attempt]:
+        """First attempt to produce audio, the primary wins ties. None if all of them failed."""
+        pending = list(attempts)
+        while pending:
+            await asyncio.wait([a.first for a in pending], return_when=asyncio.FIRST_COMPLETED)
+            for attempt in [a for a in pending if a.first.done()]:
+                if attempt.succeeded:
+                    return attempt
+                logger.error(f"TTS {attempt.tts.provider} failed: {attempt.first.exception()}")
+                pending.remove(attempt)
+        return None
+
+    def _record(self, attempts: List[_Attempt], winner: Optional[_Attempt]) -> None:
+        primary = attempts[0]
+        if primary.succeeded:
+            self.latency["primary"].record(primary.ttfb)
+        elif primary.first.done():
+            self.primary_failures += 1
+        else:
+            # Lost the race: it took at least this long, keep the p95 honest
+            self.latency["primary"].record(time.perf_counter() - primary.started)
+
+        if len(attempts) > 1 and attempts[1].succeeded:
+            self.latency["secondary"].record(attempts[1].ttfb)
+        if winner is not None and winner is not primary:
+            self.secondary_wins += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "secondary_wins": self.secondary_wins,
+            "primary_failures": self.primary_failures,
+            "deadline_ms": round(self.deadline() * 1000, 1),
+            "primary": {"provider": self._primary.provider, **self.latency["primary"].stats()},
+            "secondary": {"provider": self._secondary.provider, **self.latency["secondary"].stats()},
+        }
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> SentenceChunkedStream:
+        return SentenceChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def stream(self, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> SentenceSynthesizeStream:
+        return SentenceSynthesizeStream(tts=self, conn_options=conn_options)
+
+    def prewarm(self) -> None:
+        self._primary.prewarm()
+        self._secondary.prewarm()
+
+    async def aclose(self) -> None:
+        for wrapped in (self._primary, self._secondary):
+            wrapped.off("metrics_collected", self._on_metrics_collected)
+            await wrapped.aclose()
@@ -0,0 +1,239 @@
+"""
+Append-only lead journal for the SDR agent.
+Leads are appended as JSON lines to leads.jsonl, fsyncs are batched, and a
+background compactor rebuilds the leads.json snapshot for existing readers.
+"""
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger("agent")
+
+
+def _replace_atomically(path: Path, write: Callable[[TextIO], None]) -> None:
+    """Write through a temp file of this writer's own and rename it over `path`"""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class LeadJournal:
+    """Append-only JSONL journal with batched fsyncs and a snapshot compactor"""
+
+    def __init__(
+        self,
+        journal_path: Path,
+        snapshot_path: Optional[Path] = None,
+        fsync_every: int = 16,
+        fsync_interval: float = 1.0,
+        compact_interval: float = 30.0,
+    ):
+        self.journal_path = Path(journal_path)
+        # leads.json keeps its old name and format, it is now derived from the journal
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else self.journal_path.with_suffix(".json")
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_interval = compact_interval
+
+        self._lock = threading.Lock()
+        # Stays open across appends, closed by close() or after a failed write
+        self._file: Optional[TextIO] = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._last_compact = 0.0
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        self._compactor: Optional[threading.Thread] = None
+
+        self.migrate_legacy()
+
+    @contextmanager
+    def _file_lock(self):
+        """Serializes migration and compaction across every process sharing the journal"""
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.journal_path.with_name(self.journal_path.name + ".lock"), "w") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def migrate_legacy(self) -> int:
+        """
+        Seed the journal from an existing leads.json array.
+        Runs once: as soon as the journal exists the snapshot is treated as derived data.
+        Returns the number of migrated leads.
+        """
+        if self.journal_path.exists() or not self.snapshot_path.exists():
+            return 0
+
+        with self._file_lock():
+            # Another process may have migrated, and appended, while we waited for the lock
+            if self.journal_path.exists():
+                return 0
+            try:
+                with open(self.snapshot_path, "r") as f:
+                    leads = json.load(f)
+            except json.JSONDecodeError:
+                logger.warning(f"Could not parse {self.snapshot_path}, starting an empty journal")
+                leads = []
+
+            _replace_atomically(
+                self.journal_path,
+                lambda f: f.writelines(json.dumps(lead, ensure_ascii=False) + "\n" for lead in leads),
+            )
+
+        logger.info(f"Migrated {len(leads)} leads from {self.snapshot_path} to {self.journal_path}")
+        return len(leads)
+
+    def _open(self) -> TextIO:
+        if self._file is None:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.journal_path, "a")  # noqa: SIM115 - long-lived, see _close_locked
+        return self._file
+
+    def _close_locked(self) -> None:
+        f, self._file = self._file, None
+        if f is None:
+            return
+        try:
+            f.close()
+        except OSError as e:
+            # close() still releases the descriptor when its final flush fails
+            logger.error(f"Error closing {self.journal_path}: {e}")
+
+    def _sync_locked(self) -> None:
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, lead: Dict[str, Any]) -> None:
+        """Append one lead. Cost is independent of how many leads are already stored."""
+        self.append_many([lead])
+
+    def append_many(self, leads: List[Dict[str, Any]]) -> None:
+        """Append several leads with a single write and at most one fsync"""
+        if not leads:
+            return
+
+        data = "".join(json.dumps(lead, ensure_ascii=False) + "\n" for lead in leads)
+        with self._lock:
+            try:
+                f = self._open()
+                f.write(data)
+                f.flush()
+                self._unsynced += len(leads)
+                if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                    self._sync_locked()
+            except OSError:
+                # Don't keep appending through a handle that just failed, the next append reopens the file
+                self._close_locked()
+                raise
+        self._dirty.set()
+
+    def sync(self) -> None:
+        """Force pending appends to disk"""
+        with self._lock:
+            self._sync_locked()
+
+    def read_all(self) -> List[Dict[str, Any]]:
+        """Read every lead from the journal, skipping a torn trailing line"""
+        leads = []
+        if not self.journal_path.exists():
+            return leads
+
+        with open(self.journal_path, "r") as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    leads.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping corrupt journal line {line_no} in {self.journal_path}")
+        return leads
+
+    def compact(self) -> int:
+        """Rebuild the leads.json snapshot from the journal. Returns the number of leads written."""
+        self._dirty.clear()
+        self.sync()
+        with self._file_lock():
+            # Read under the lock, so a slower compactor can't replace a newer snapshot with an older one
+            leads = self.read_all()
+            # Readers see either the previous snapshot or the new one, never a partial file
+            _replace_atomically(self.snapshot_path, lambda f: json.dump(leads, f, indent=2))
+
+        self._last_compact = time.monotonic()
+        return len(leads)
+
+    def start(self) -> None:
+        """Start the background thread that syncs pending appends and compacts the snapshot"""
+        if self._compactor and self._compactor.is_alive():
+            return
+        self._stop.clear()
+        self._compactor = threading.Thread(target=self._run, name="lead-journal", daemon=True)
+        self._compactor.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.fsync_interval):
+            try:
+                self.sync()
+                if self._dirty.is_set() and time.monotonic() - self._last_compact >= self.compact_interval:
+                    self.compact()
+            except Exception as e:
+                logger.error(f"Lead journal background task failed: {e}")
+
+    def flush(self) -> None:
+        """Sync the journal and bring the snapshot up to date"""
+        self.sync()
+        if self._dirty.is_set():
+            self.compact()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._compactor:
+            self._compactor.join()
+            self._compactor = None
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._close_locked()
+
+
+_journals: Dict[Path, LeadJournal] = {}
+
+
+def get_lead_journal(journal_path: Path) -> LeadJournal:
+    """Return the process-wide journal for a path, starting its compactor on first use"""
+    journal_path = Path(journal_path).resolve()
+    journal = _journals.get(journal_path)
+    if journal is None:
+        journal = LeadJournal(journal_path)
+        journal.start()
+        # Pending appends reach the disk and the file gets closed when the worker exits
+        atexit.register(journal.close)
+        _journals[journal_path] = journal
+    return journal
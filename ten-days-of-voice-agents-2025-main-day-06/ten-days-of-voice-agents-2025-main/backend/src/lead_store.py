@@ -0,0 +1,230 @@
+"""
+Pluggable lead storage for the SDR agent.
+LEAD_STORE=journal (default) appends to leads.jsonl, LEAD_STORE=sqlite writes to a
+WAL-mode SQLite database that several job processes can write concurrently, and
+LEAD_STORE=sharded gives every job process its own append-only shard.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from lead_journal import get_lead_journal
+from shard_store import ShardedLog
+
+logger = logging.getLogger("agent")
+
+LEAD_FIELDS = ["name", "company", "role", "interest", "timeline"]
+
+# Leads are deduplicated per tenant, the same email can be a lead of several brands.
+# Leads saved without a tenant get '' so they still deduplicate (NULLs never conflict).
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    id INTEGER PRIMARY KEY,
+    tenant TEXT NOT NULL DEFAULT '',
+    email TEXT,
+    name TEXT,
+    company TEXT,
+    role TEXT,
+    interest TEXT,
+    timeline TEXT,
+    timestamp TEXT NOT NULL,
+    UNIQUE (tenant, email)
+);
+CREATE INDEX IF NOT EXISTS idx_leads_company_timestamp ON leads (company COLLATE NOCASE, timestamp);
+CREATE INDEX IF NOT EXISTS idx_leads_timestamp ON leads (timestamp);
+"""
+
+UPSERT = """
+INSERT INTO leads (tenant, email, name, company, role, interest, timeline, timestamp)
+VALUES (:tenant, :email, :name, :company, :role, :interest, :timeline, :timestamp)
+ON CONFLICT (tenant, email) DO UPDATE SET
+    name = excluded.name,
+    company = excluded.company,
+    role = excluded.role,
+    interest = excluded.interest,
+    timeline = excluded.timeline,
+    timestamp = excluded.timestamp
+"""
+
+
+class SQLiteLeadStore:
+    """Lead store backed by SQLite in WAL mode, deduplicated by tenant and email"""
+
+    def __init__(self, db_path: Path, busy_timeout: float = 5.0):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Autocommit mode, write transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate_schema()
+        self._conn.executescript(SCHEMA)
+
+    def _columns(self) -> set:
+        return {row["name"] for row in self._conn.execute("PRAGMA table_info(leads)")}
+
+    def _migrate_schema(self) -> None:
+        """Databases from before tenants were keyed on email alone, rebuild them keyed on (tenant, email)"""
+        columns = self._columns()
+        if not columns or "tenant" in columns:
+            return
+
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock
+            if "tenant" not in self._columns():
+                self._conn.execute("ALTER TABLE leads RENAME TO leads_v1")
+                self._conn.execute("DROP INDEX IF EXISTS idx_leads_company_timestamp")
+                self._conn.execute("DROP INDEX IF EXISTS idx_leads_timestamp")
+                # executescript would commit, run the schema one statement at a time
+                for statement in filter(str.strip, SCHEMA.split(";")):
+                    self._conn.execute(statement)
+                self._conn.execute(
+                    "INSERT INTO leads (id, tenant, email, name, company, role, interest, timeline, timestamp) "
+                    "SELECT id, '', email, name, company, role, interest, timeline, timestamp FROM leads_v1"
+                )
+                self._conn.execute("DROP TABLE leads_v1")
+                logger.info(f"Migrated {self.db_path} to per-tenant leads")
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _row(lead: Dict[str, Any]) -> Dict[str, Any]:
+        email = (lead.get("email") or "").strip().lower()
+        row = {field: lead.get(field) for field in LEAD_FIELDS}
+        # Leads without an email can't be deduplicated, NULLs never conflict
+        row["email"] = email or None
+        row["tenant"] = lead.get("tenant") or ""
+        row["timestamp"] = lead.get("timestamp") or datetime.now().isoformat()
+        return row
+
+    def append(self, lead: Dict[str, Any]) -> None:
+        self.append_many([lead])
+
+    def append_many(self, leads: List[Dict[str, Any]]) -> None:
+        """Upsert several leads in a single transaction"""
+        if not leads:
+            return
+
+        rows = [self._row(lead) for lead in leads]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(UPSERT, rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get_by_email(self, email: str, tenant: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM leads WHERE tenant = ? AND email = ?", (tenant or "", (email or "").strip().lower())
+            ).fetchone()
+        return self._to_lead(row) if row else None
+
+    def leads_for_company(
+        self, company: str, since: Optional[Union[datetime, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Leads for a company (case-insensitive), optionally only those saved at or after `since`"""
+        if isinstance(since, datetime):
+            since = since.isoformat()
+
+        query = "SELECT * FROM leads WHERE company = ? COLLATE NOCASE"
+        params: List[Any] = [company]
+        if since:
+            query += " AND timestamp >= ?"
+            params.append(since)
+        query += " ORDER BY timestamp"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._to_lead(row) for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+
+    def migrate_legacy(self, legacy_path: Path) -> int:
+        """Import an existing leads.json array into an empty database. Returns the number of imported leads."""
+        legacy_path = Path(legacy_path)
+        if not legacy_path.exists() or self.count():
+            return 0
+
+        try:
+            with open(legacy_path, "r") as f:
+                leads = json.load(f)
+        except json.JSONDecodeError:
+            logger.warning(f"Could not parse {legacy_path}, nothing to migrate")
+            return 0
+
+        self.append_many(leads)
+        logger.info(f"Migrated {len(leads)} leads from {legacy_path} to {self.db_path}")
+        return len(leads)
+
+    @staticmethod
+    def _to_lead(row: sqlite3.Row) -> Dict[str, Any]:
+        lead = dict(row)
+        lead.pop("id", None)
+        lead["tenant"] = lead["tenant"] or None
+        return lead
+
+    def flush(self) -> None:
+        """Fold the WAL back into the main database file"""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_sqlite_stores: Dict[Path, SQLiteLeadStore] = {}
+_sharded_stores: Dict[Path, ShardedLog] = {}
+
+
+def create_lead_store(shared_data_dir: Path, backend: Optional[str] = None):
+    """
+    Return the process-wide lead store for the configured backend.
+    All backends expose append/append_many/flush/close.
+    """
+    shared_data_dir = Path(shared_data_dir).resolve()
+    backend = (backend or os.getenv("LEAD_STORE", "journal")).lower()
+
+    if backend == "journal":
+        return get_lead_journal(shared_data_dir / "leads.jsonl")
+
+    if backend == "sqlite":
+        db_path = shared_data_dir / "leads.db"
+        store = _sqlite_stores.get(db_path)
+        if store is None:
+            store = SQLiteLeadStore(db_path)
+            store.migrate_legacy(shared_data_dir / "leads.json")
+            _sqlite_stores[db_path] = store
+        return store
+
+    if backend == "sharded":
+        store = _sharded_stores.get(shared_data_dir)
+        if store is None:
+            # flush() merges the shards into leads.snapshot.json
+            store = ShardedLog(shared_data_dir, "leads")
+            store.migrate_legacy(shared_data_dir / "leads.json")
+            _sharded_stores[shared_data_dir] = store
+        return store
+
+    raise ValueError(f"Unknown LEAD_STORE backend: {backend}")
@@ -0,0 +1,137 @@
+"""
+Local stand-in LLM server, for running the LLM path without network or API keys.
+It speaks the OpenAI streaming chat completions API, so the livekit openai plugin
+can point at it with base_url. Replies are deterministic: when tools are offered
+and the last message is from the user, the first tool is called with the user's
+text; otherwise the model echoes the last message back, one word per chunk.
+
+Run the server with:
+    python src/local_llm.py --port 8090 --ttfb-ms 800
+Point a client at it with:
+    openai.LLM(model="local", base_url="http://127.0.0.1:8090/v1", api_key="local")
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Tuple
+
+from aiohttp import web
+
+TTFB_MS = web.AppKey("ttfb_ms", float)
+TOKEN_MS = web.AppKey("token_ms", float)
+
+
+def _reply(body: Dict[str, Any]) -> Tuple[str, List[Dict[str, Any]]]:
+    """Text and tool calls the stand-in model answers with"""
+    messages = body.get("messages", [])
+    last = messages[-1] if messages else {}
+    content = last.get("content") or ""
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+
+    tools = body.get("tools") or []
+    if tools and last.get("role") == "user":
+        function = tools[0]["function"]
+        required = function.get("parameters", {}).get("required", [])
+        arguments = dict.fromkeys(required, content)
+        return "", [{"name": function["name"], "arguments": json.dumps(arguments)}]
+    if last.get("role") == "tool":
+        return f"Here is what I found: {content}", []
+    return f"You said: {content}", []
+
+
+def create_app(ttfb_ms: float = 0.0, token_ms: float = 0.0) -> web.Application:
+    async def chat_completions(request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        model = body.get("model", "local")
+        # Per-request overrides (extra_body) let a test make one model slow or broken
+        if body.get("fail"):
+            return web.json_response({"error": {"message": f"{model} is unavailable"}}, status=503)
+        delay = float(body.get("ttfb_ms", request.app[TTFB_MS]))
+        token_delay = float(body.get("token_ms", request.app[TOKEN_MS]))
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        completion_id = f"chatcmpl-{int(time.time() * 1000)}"
+
+        async def send(delta: Dict[str, Any], finish_reason: Any = None, usage: Any = None) -> None:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if delta is not None else [],
+            }
+            if usage:
+                chunk["usage"] = usage
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+
+        text, tool_calls = _reply(body)
+        try:
+            await asyncio.sleep(delay / 1000)
+            words = text.split(" ") if text else []
+            for index, word in enumerate(words):
+                delta = {"content": word if index == 0 else f" {word}"}
+                if index == 0:
+                    delta["role"] = "assistant"
+                await send(delta)
+                if token_delay:
+                    await asyncio.sleep(token_delay / 1000)
+            for index, call in enumerate(tool_calls):
+                await send(
+                    {
+                        "role": "assistant",
+                        "tool_calls": [
+                            {"index": index, "id": f"call_{index}", "type": "function", "function": call}
+                        ],
+                    }
+                )
+            await send({}, finish_reason="tool_calls" if tool_calls else "stop")
+            prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in body.get("messages", []))
+            completion_tokens = max(1, len(text.split()))
+            await send(
+                None,
+                usage={
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            )
+            await response.write(b"data: [DONE]\n\n")
+            await response.write_eof()
+        except ConnectionResetError:
+            pass  # Client hung up early, e.g. a hedged request that lost the race
+        return response
+
+    app = web.Application()
+    app[TTFB_MS] = ttfb_ms
+    app[TOKEN_MS] = token_ms
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    return app
+
+
+async def start_server(
+    host: str = "127.0.0.1", port: int = 0, ttfb_ms: float = 0.0, token_ms: float = 0.0
+) -> Tuple[web.AppRunner, str]:
+    """Start the server in the running loop. Returns the runner (call cleanup() to stop) and the /v1 base URL."""
+    runner = web.AppRunner(create_app(ttfb_ms, token_ms))
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}/v1"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in LLM server (OpenAI chat completions API)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--ttfb-ms", type=float, default=0.0, help="Delay before the first token")
+    parser.add_argument("--token-ms", type=float, default=0.0, help="Delay between tokens")
+    args = parser.parse_args()
+    web.run_app(create_app(args.ttfb_ms, args.token_ms), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Local stand-in TTS provider, for running the audio pipeline without network or API keys.
+The server answers POST /v1/synthesize with a tone whose length follows the text,
+streamed as raw PCM after a configurable first-byte delay and per-chunk jitter.
+LocalTTS is the matching livekit TTS client.
+
+Run the server with:
+    python src/local_tts.py --port 8089 --ttfb-ms 150 --jitter-ms 10
+"""
+import argparse
+import asyncio
+import hashlib
+import math
+import random
+from typing import Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+from livekit.agents import APIConnectOptions, tts, utils
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS
+
+DEFAULT_SAMPLE_RATE = 24000
+CHUNK_MS = 20
+
+TTFB_MS = web.AppKey("ttfb_ms", float)
+JITTER_MS = web.AppKey("jitter_ms", float)
+
+
+def synthesize_pcm(text: str, voice: str, sample_rate: int = DEFAULT_SAMPLE_RATE) -> bytes:
+    """Deterministic 16-bit mono tone, 60ms per character, pitch picked by the voice"""
+    duration = max(0.2, 0.06 * len(text.strip()))
+    frequency = 180 + int(hashlib.sha1(voice.encode()).hexdigest(), 16) % 200
+    samples = int(duration * sample_rate)
+    out = bytearray()
+    for i in range(samples):
+        value = int(8000 * math.sin(2 * math.pi * frequency * i / sample_rate))
+        out += value.to_bytes(2, "little", signed=True)
+    return bytes(out)
+
+
+def create_app(ttfb_ms: float = 0.0, jitter_ms: float = 0.0) -> web.Application:
+    async def synthesize(request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        sample_rate = int(body.get("sample_rate", DEFAULT_SAMPLE_RATE))
+        pcm = synthesize_pcm(body.get("text", ""), body.get("voice", "default"), sample_rate)
+
+        # Per-request overrides let a test make one call slow
+        delay = float(body.get("ttfb_ms", request.app[TTFB_MS]))
+        jitter = float(body.get("jitter_ms", request.app[JITTER_MS]))
+
+        response = web.StreamResponse(headers={"Content-Type": "audio/pcm"})
+        await response.prepare(request)
+        await asyncio.sleep(delay / 1000)
+
+        chunk_bytes = sample_rate * 2 * CHUNK_MS // 1000
+        try:
+            for offset in range(0, len(pcm), chunk_bytes):
+                if jitter:
+                    await asyncio.sleep(random.uniform(0, jitter) / 1000)
+                await response.write(pcm[offset : offset + chunk_bytes])
+            await response.write_eof()
+        except ConnectionResetError:
+            pass  # Client hung up early, e.g. a hedged request that lost the race
+        return response
+
+    app = web.Application()
+    app[TTFB_MS] = ttfb_ms
+    app[JITTER_MS] = jitter_ms
+    app.router.add_post("/v1/synthesize", synthesize)
+    return app
+
+
+async def start_server(
+    host: str = "127.0.0.1", port: int = 0, ttfb_ms: float = 0.0, jitter_ms: float = 0.0
+) -> Tuple[web.AppRunner, str]:
+    """Start the server in the running loop. Returns the runner (call cleanup() to stop) and base URL."""
+    runner = web.AppRunner(create_app(ttfb_ms, jitter_ms))
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}"
+
+
+class LocalTTS(tts.TTS):
+    """Non-streaming client for the local stand-in server"""
+
+    def __init__(
+        self,
+        *,
+        base_url: str,
+        voice: str = "default",
+        sample_rate: int = DEFAULT_SAMPLE_RATE,
+        http_session: Optional[aiohttp.ClientSession] = None,
+        ttfb_ms: Optional[float] = None,
+    ) -> None:
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=sample_rate,
+            num_channels=1,
+        )
+        self.base_url = base_url.rstrip("/")
+        self.voice = voice
+        self.ttfb_ms = ttfb_ms
+        self._session = http_session
+
+    @property
+    def model(self) -> str:
+        return self.voice
+
+    @property
+    def provider(self) -> str:
+        return "local"
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        if not self._session:
+            self._session = utils.http_context.http_session()
+        return self._session
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "LocalChunkedStream":
+        return LocalChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class LocalChunkedStream(tts.ChunkedStream):
+    def __init__(self, *, tts: LocalTTS, input_text: str, conn_options: APIConnectOptions) -> None:
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._tts: LocalTTS = tts
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        body = {"text": self.input_text, "voice": self._tts.voice, "sample_rate": self._tts.sample_rate}
+        if self._tts.ttfb_ms is not None:
+            body["ttfb_ms"] = self._tts.ttfb_ms
+
+        async with self._tts._ensure_session().post(
+            f"{self._tts.base_url}/v1/synthesize",
+            json=body,
+            timeout=aiohttp.ClientTimeout(total=self._conn_options.timeout + 30),
+        ) as response:
+            response.raise_for_status()
+            output_emitter.initialize(
+                request_id=utils.shortuuid(),
+                sample_rate=self._tts.sample_rate,
+                num_channels=1,
+                mime_type="audio/pcm",
+            )
+            async for data, _ in response.content.iter_chunks():
+                output_emitter.push(data)
+            output_emitter.flush()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in TTS server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--ttfb-ms", type=float, default=0.0, help="Delay before the first audio chunk")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random delay up to this much between chunks")
+    args = parser.parse_args()
+    web.run_app(create_app(args.ttfb_ms, args.jitter_ms), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Offline pre-synthesis of static utterances into the audio cache.
+Walks shared-data/*.json, collects every line the SDR speaks verbatim (each
+tenant's greeting), splits them into sentences exactly like CachedTTS does at
+runtime, and renders each one for every configured voice with bounded concurrency.
+Sentences already in the cache are skipped, so reruns only pay for new content.
+The tutor's lines are rendered by its own presynth.py in day 4.
+
+Usage:
+    python src/presynth.py                                     # real providers, keys from .env.local
+    python src/presynth.py --local-url http://127.0.0.1:8089   # local stand-in server (local_tts.py)
+    python src/presynth.py --strict                            # exit non-zero on failures or nothing to render
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import aiohttp
+from dotenv import load_dotenv
+from livekit.agents import tokenize, tts
+
+from audio_cache import AudioCache, CachedTTS, StaticLines
+from local_tts import LocalTTS
+from tenant_registry import SDR_KEYS, greeting_for
+
+logger = logging.getLogger("agent")
+
+SHARED_DATA_DIR = Path(__file__).resolve().parent.parent.parent / "shared-data"
+
+
+@dataclass(frozen=True)
+class VoiceSpec:
+    provider: str
+    voice: str
+    style: Optional[str]
+
+
+# Keep in sync with the TTS setup in the entrypoint
+VOICES = [
+    VoiceSpec("murf", "en-US-matthew", "Conversation"),
+    VoiceSpec("deepgram", "aura-helios-en", None),
+]
+
+
+def collect_utterances(shared_data_dir: Path) -> List[str]:
+    """Greeting of every tenant content file in shared-data"""
+    utterances: List[str] = []
+
+    for path in sorted(Path(shared_data_dir).glob("*.json")):
+        try:
+            with open(path, "r") as f:
+                content = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Skipping {path}: {e}")
+            continue
+
+        # Curricula and leads.json sit next to the tenants, they aren't the SDR's to speak
+        if isinstance(content, dict) and all(key in content for key in SDR_KEYS):
+            utterances.append(greeting_for(content["company_info"].get("name", path.stem)))
+
+    return list(dict.fromkeys(utterances))
+
+
+async def split_sentences(tokenizer: tokenize.SentenceTokenizer, text: str) -> List[str]:
+    """Same streaming tokenizer as SentenceSynthesizeStream, so the cache keys line up"""
+    stream = tokenizer.stream()
+    stream.push_text(text)
+    stream.end_input()
+    sentences = [ev.token for ev in [ev async for ev in stream] if ev.token.strip()]
+    await stream.aclose()
+    return sentences
+
+
+def make_tts(spec: VoiceSpec, http_session: aiohttp.ClientSession, local_url: Optional[str]) -> Optional[tts.TTS]:
+    """Provider TTS for a voice, or None when it isn't configured (missing API key)"""
+    try:
+        if local_url:
+            return LocalTTS(base_url=local_url, voice=spec.voice, http_session=http_session)
+        if spec.provider == "deepgram":
+            from livekit.plugins import deepgram
+
+            return deepgram.TTS(model=spec.voice, http_session=http_session)
+        if spec.provider == "murf":
+            from livekit.plugins import murf
+
+            return murf.TTS(voice=spec.voice, style=spec.style, http_session=http_session)
+    except ValueError as e:
+        logger.warning(f"Skipping {spec.provider}:{spec.voice}: {e}")
+        return None
+    raise ValueError(f"Unknown TTS provider: {spec.provider}")
+
+
+async def presynthesize(
+    cache: AudioCache,
+    shared_data_dir: Path = SHARED_DATA_DIR,
+    voices: Sequence[VoiceSpec] = VOICES,
+    concurrency: int = 4,
+    local_url: Optional[str] = None,
+) -> Dict[str, int]:
+    utterances = collect_utterances(shared_data_dir)
+    static_lines = StaticLines(utterances)
+    stats = {"voices": 0, "sentences": 0, "synthesized": 0, "cached": 0, "failed": 0}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with aiohttp.ClientSession() as http_session:
+        jobs = []
+        wrappers: List[CachedTTS] = []
+        for spec in voices:
+            provider_tts = make_tts(spec, http_session, local_url)
+            if provider_tts is None:
+                continue
+            cached = CachedTTS(provider_tts, cache, voice=spec.voice, style=spec.style, static_lines=static_lines)
+            wrappers.append(cached)
+            stats["voices"] += 1
+
+            sentences: List[str] = []
+            for text in utterances:
+                sentences.extend(await split_sentences(cached._sentence_tokenizer, text))
+
+            for sentence in dict.fromkeys(sentences):
+                stats["sentences"] += 1
+                if cache.contains(cached.key_for(sentence)):
+                    stats["cached"] += 1
+                    continue
+                jobs.append(_render(cached, sentence, semaphore, stats))
+
+        await asyncio.gather(*jobs)
+        for cached in wrappers:
+            await cached.aclose()
+
+    return stats
+
+
+async def _render(cached: CachedTTS, sentence: str, semaphore: asyncio.Semaphore, stats: Dict[str, int]) -> None:
+    async with semaphore:
+        try:
+            # A miss in CachedTTS synthesizes and stores the sentence
+            await cached.synthesize(sentence).collect()
+            stats["synthesized"] += 1
+        except Exception as e:
+            stats["failed"] += 1
+            logger.error(f"Failed to synthesize '{sentence[:40]}' with {cached.voice}: {e}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    load_dotenv(dotenv_path=Path(__file__).parent.parent / ".env.local")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    parser = argparse.ArgumentParser(description="Pre-synthesize static utterances into the audio cache")
+    parser.add_argument("--shared-data", type=Path, default=SHARED_DATA_DIR, help="Directory with the content JSON files")
+    parser.add_argument("--cache-dir", type=Path, default=None, help="Audio cache directory (default: AUDIO_CACHE_DIR)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Parallel synthesis requests")
+    parser.add_argument("--local-url", default=os.getenv("LOCAL_TTS_URL"), help="Use the local stand-in TTS server instead of real providers")
+    parser.add_argument("--strict", action="store_true", help="Exit non-zero if anything failed or there was nothing to render")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    stats = asyncio.run(
+        presynthesize(
+            AudioCache(args.cache_dir),
+            shared_data_dir=args.shared_data,
+            concurrency=args.concurrency,
+            local_url=args.local_url,
+        )
+    )
+    print(f"Pre-synthesis done in {time.perf_counter() - start:.1f}s: {stats}")
+    if args.strict and (stats["failed"] or not stats["sentences"]):
+        # The agent works without its cache, just slower; for deploy steps that would rather fail than ship that
+        logger.error(f"Pre-synthesis incomplete, is {args.shared_data} there and are the TTS keys set?")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Company knowledge bases served by the SDR worker.
+Every *_content.json in shared-data with the SDR schema (company_info, verticals,
+faqs) is a tenant. All of them are parsed once into the shared content cache at
+prewarm, and each job picks its tenant from dispatch or room metadata, so one warm
+worker pool can serve several brands.
+"""
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from content_cache import ContentCache, content_cache
+
+logger = logging.getLogger("agent")
+
+SDR_KEYS = ("company_info", "verticals", "faqs")
+DEFAULT_TENANT = "reliance"
+
+
+@dataclass(frozen=True)
+class Tenant:
+    tenant_id: str
+    name: str
+    content_path: Path
+
+
+def greeting_for(company_name: str) -> str:
+    """Fixed opening line, spoken verbatim so it can be pre-synthesized"""
+    return f"Namaste! Welcome to {company_name}. I am your AI Assistant. How may I help you explore our businesses today?"
+
+
+def _slug(text: Any) -> str:
+    # Metadata is user-supplied JSON, {"tenant": 5} must not crash the lookup
+    return re.sub(r"[^a-z0-9]+", "_", str(text).lower()).strip("_")
+
+
+def tenant_id_for(path: Path) -> str:
+    """reliance_content.json -> reliance, day5_tata_content.json -> tata"""
+    stem = path.stem
+    if stem.endswith("_content"):
+        stem = stem[: -len("_content")]
+    return re.sub(r"^day\d+_", "", stem)
+
+
+class TenantRegistry:
+    """Tenants discovered in a shared-data directory, looked up by id or company name"""
+
+    def __init__(
+        self,
+        shared_data_dir: Path,
+        content_cache: ContentCache = content_cache,
+        default_tenant: Optional[str] = None,
+    ):
+        self.shared_data_dir = Path(shared_data_dir)
+        self.content_cache = content_cache
+        self.default_tenant = default_tenant or os.getenv("SDR_DEFAULT_TENANT", DEFAULT_TENANT)
+        self._tenants: Dict[str, Tenant] = {}
+        self._aliases: Dict[str, str] = {}
+
+    def discover(self) -> List[Tenant]:
+        """Parse every content file with the SDR schema. Other JSON files are skipped."""
+        tenants: Dict[str, Tenant] = {}
+        aliases: Dict[str, str] = {}
+
+        for path in sorted(self.shared_data_dir.glob("*_content.json")):
+            try:
+                content = self.content_cache.get(path)
+            except Exception as e:
+                logger.error(f"Error loading tenant content {path}: {e}")
+                continue
+            if not isinstance(content, dict) or not all(key in content for key in SDR_KEYS):
+                continue
+
+            tenant_id = tenant_id_for(path)
+            name = content["company_info"].get("name", tenant_id)
+            tenants[tenant_id] = Tenant(tenant_id, name, path)
+            # "Tata Group" and "tata_group" both find the tata tenant
+            aliases[_slug(name)] = tenant_id
+
+        self._tenants = tenants
+        self._aliases = aliases
+        logger.info(f"SDR tenants: {', '.join(tenants) or 'none'}")
+        return list(tenants.values())
+
+    @property
+    def tenant_ids(self) -> List[str]:
+        return list(self._tenants)
+
+    def get(self, key: Any) -> Optional[Tenant]:
+        if not key:
+            return None
+        slug = _slug(key)
+        return self._tenants.get(slug) or self._tenants.get(self._aliases.get(slug, ""))
+
+    def resolve(self, *metadata: Optional[str]) -> Optional[Tenant]:
+        """
+        First tenant named in the given metadata strings, else the default tenant.
+        Metadata is either a JSON object with a "tenant" (or "company") key or a bare tenant id.
+        """
+        for raw in metadata:
+            if not raw:
+                continue
+            try:
+                parsed = json.loads(raw)
+            except ValueError:
+                parsed = raw
+            if isinstance(parsed, dict):
+                key = parsed.get("tenant") or parsed.get("company")
+            else:
+                key = parsed if isinstance(parsed, str) else None
+
+            tenant = self.get(key)
+            if tenant:
+                return tenant
+            if key:
+                logger.warning(f"Unknown tenant '{key}', falling back to {self.default_tenant}")
+
+        return self.get(self.default_tenant)
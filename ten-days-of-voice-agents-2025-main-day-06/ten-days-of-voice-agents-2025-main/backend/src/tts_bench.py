@@ -0,0 +1,271 @@
+"""
+TTS latency benchmark.
+Streams every text of a corpus through every voice and sentence tokenizer setting,
+word by word like LLM output, and measures time to first audio, real-time factor
+and the jitter between audio chunks. Results are written as JSON, and can be
+compared against a previous run to catch regressions.
+
+Usage:
+    python src/tts_bench.py --local                              # in-process stand-in server, no network
+    python src/tts_bench.py --local-url http://127.0.0.1:8089    # running local_tts.py server
+    python src/tts_bench.py --voices murf:en-US-matthew          # real provider, keys from .env.local
+    python src/tts_bench.py --local --baseline bench.json        # exit non-zero on regressions
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import aiohttp
+from dotenv import load_dotenv
+from livekit.agents import tokenize, tts
+
+from local_tts import start_server
+from presynth import VOICES, VoiceSpec, make_tts
+
+logger = logging.getLogger("agent")
+
+# Sentence tokenizer settings used across the agents
+TOKENIZERS: Dict[str, Callable[[], tokenize.SentenceTokenizer]] = {
+    # CachedTTS / HedgedTTS
+    "blingfire": lambda: tokenize.blingfire.SentenceTokenizer(retain_format=True),
+    # livekit default for non-streaming providers
+    "basic": lambda: tokenize.basic.SentenceTokenizer(),
+    # Wellness agent: short sentences are spoken right away
+    "basic_min1": lambda: tokenize.basic.SentenceTokenizer(min_sentence_len=1),
+}
+
+DEFAULT_CORPUS = [
+    "Hi!",
+    "Namaste! Welcome to Reliance Group. How may I help you today?",
+    "Sure. Jio offers mobile, broadband and enterprise connectivity across India.",
+    "Great question. A variable is a name that points to a value, and you create one "
+    "with an assignment like x equals five. You can reassign it later. Want to try one?",
+    "Okay. Got it. Thanks.",
+]
+
+
+def load_corpus(path: Optional[Path]) -> List[str]:
+    """A JSON list of strings, or a text file with one utterance per line"""
+    if path is None:
+        return list(DEFAULT_CORPUS)
+    raw = Path(path).read_text()
+    if path.suffix == ".json":
+        return [text for text in json.loads(raw) if text.strip()]
+    return [line.strip() for line in raw.splitlines() if line.strip()]
+
+
+# The SDR's voices plus the tutor's mode voices from day 4, the corpus has lines of both
+BENCH_VOICES = VOICES + [
+    VoiceSpec("murf", "en-US-matthew", "Conversation"),
+    VoiceSpec("murf", "en-US-alicia", "Conversation"),
+    VoiceSpec("murf", "en-US-ken", "Conversation"),
+]
+
+
+def select_voices(names: Optional[Sequence[str]]) -> List[VoiceSpec]:
+    """Configured voices, deduplicated, optionally filtered by "provider:voice" or "voice" """
+    voices = list({(spec.provider, spec.voice, spec.style): spec for spec in BENCH_VOICES}.values())
+    if not names:
+        return voices
+    wanted = set(names)
+    return [spec for spec in voices if spec.voice in wanted or f"{spec.provider}:{spec.voice}" in wanted]
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+async def measure(provider_tts: tts.TTS, tokenizer: tokenize.SentenceTokenizer, text: str) -> Dict[str, Any]:
+    """Stream one utterance through the tokenizer and provider, time every audio chunk"""
+    arrivals: List[float] = []
+    audio_duration = 0.0
+    adapter = tts.StreamAdapter(tts=provider_tts, sentence_tokenizer=tokenizer)
+
+    start = time.perf_counter()
+    try:
+        async with adapter.stream() as stream:
+            for word in text.split(" "):
+                stream.push_text(word + " ")
+            stream.end_input()
+            async for audio in stream:
+                arrivals.append(time.perf_counter())
+                audio_duration += audio.frame.duration
+    finally:
+        # Only detaches the adapter, the provider stays open for the next run
+        await adapter.aclose()
+    total = time.perf_counter() - start
+
+    gaps = [later - earlier for earlier, later in zip(arrivals, arrivals[1:])]
+    return {
+        "chars": len(text),
+        "chunks": len(arrivals),
+        "ttfb_ms": _ms(arrivals[0] - start) if arrivals else None,
+        "total_ms": _ms(total),
+        "audio_s": round(audio_duration, 3),
+        "rtf": round(total / audio_duration, 3) if audio_duration else None,
+        "jitter_ms": _ms(statistics.pstdev(gaps)) if len(gaps) > 1 else 0.0,
+        "max_gap_ms": _ms(max(gaps)) if gaps else 0.0,
+    }
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """One row per voice and tokenizer"""
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for row in results:
+        groups.setdefault((row["voice"], row["tokenizer"]), []).append(row)
+
+    summary = []
+    for (voice, tokenizer_name), rows in groups.items():
+        ok = [row for row in rows if not row.get("error")]
+        ttfbs = [row["ttfb_ms"] for row in ok if row["ttfb_ms"] is not None]
+        rtfs = [row["rtf"] for row in ok if row["rtf"] is not None]
+        summary.append(
+            {
+                "voice": voice,
+                "tokenizer": tokenizer_name,
+                "runs": len(rows),
+                "errors": len(rows) - len(ok),
+                "ttfb_p50_ms": _percentile(ttfbs, 0.5),
+                "ttfb_p95_ms": _percentile(ttfbs, 0.95),
+                "rtf_mean": round(statistics.mean(rtfs), 3) if rtfs else None,
+                "jitter_p50_ms": _percentile([row["jitter_ms"] for row in ok], 0.5),
+                "max_gap_ms": max((row["max_gap_ms"] for row in ok), default=None),
+            }
+        )
+    return summary
+
+
+async def run_benchmark(
+    voices: Sequence[VoiceSpec],
+    tokenizers: Sequence[str],
+    corpus: Sequence[str],
+    local_url: Optional[str] = None,
+    repeats: int = 1,
+) -> Dict[str, Any]:
+    results: List[Dict[str, Any]] = []
+
+    async with aiohttp.ClientSession() as http_session:
+        for spec in voices:
+            provider_tts = make_tts(spec, http_session, local_url)
+            if provider_tts is None:
+                continue
+            voice = f"{spec.provider}:{spec.voice}"
+            try:
+                for tokenizer_name in tokenizers:
+                    for index, text in enumerate(corpus):
+                        for _ in range(repeats):
+                            row: Dict[str, Any] = {"voice": voice, "tokenizer": tokenizer_name, "text_id": index}
+                            try:
+                                row.update(await measure(provider_tts, TOKENIZERS[tokenizer_name](), text))
+                            except Exception as e:
+                                logger.error(f"{voice} / {tokenizer_name} failed on text {index}: {e}")
+                                row["error"] = str(e)
+                            results.append(row)
+            finally:
+                await provider_tts.aclose()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "endpoint": local_url or "providers",
+            "voices": [f"{spec.provider}:{spec.voice}" for spec in voices],
+            "tokenizers": list(tokenizers),
+            "corpus_size": len(corpus),
+            "repeats": repeats,
+        },
+        "summary": summarize(results),
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.2) -> List[str]:
+    """Summary rows whose TTFB p50 or mean RTF got worse than baseline by more than `tolerance`"""
+    previous = {(row["voice"], row["tokenizer"]): row for row in baseline.get("summary", [])}
+    regressions = []
+    for row in current["summary"]:
+        before = previous.get((row["voice"], row["tokenizer"]))
+        if not before:
+            continue
+        for metric in ("ttfb_p50_ms", "rtf_mean"):
+            old, new = before.get(metric), row.get(metric)
+            if old and new and new > old * (1 + tolerance):
+                regressions.append(f"{row['voice']} / {row['tokenizer']}: {metric} {old} -> {new}")
+    return regressions
+
+
+def _print_summary(summary: List[Dict[str, Any]]) -> None:
+    print(f"{'voice':<28}{'tokenizer':<12}{'ttfb p50':>10}{'ttfb p95':>10}{'rtf':>8}{'jitter':>8}{'errors':>8}")
+    for row in summary:
+        print(
+            f"{row['voice']:<28}{row['tokenizer']:<12}{row['ttfb_p50_ms'] or '-':>10}{row['ttfb_p95_ms'] or '-':>10}"
+            f"{row['rtf_mean'] or '-':>8}{row['jitter_p50_ms'] or '-':>8}{row['errors']:>8}"
+        )
+
+
+async def _run(args: argparse.Namespace) -> Dict[str, Any]:
+    runner = None
+    local_url = args.local_url
+    if args.local:
+        runner, local_url = await start_server(ttfb_ms=args.mock_ttfb_ms, jitter_ms=args.mock_jitter_ms)
+    try:
+        return await run_benchmark(
+            select_voices(args.voices),
+            args.tokenizers,
+            load_corpus(args.corpus),
+            local_url=local_url,
+            repeats=args.repeats,
+        )
+    finally:
+        if runner:
+            await runner.cleanup()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    load_dotenv(dotenv_path=Path(__file__).parent.parent / ".env.local")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    parser = argparse.ArgumentParser(description="Benchmark TTS latency per voice and tokenizer")
+    parser.add_argument("--voices", nargs="*", help="provider:voice or voice names (default: all configured voices)")
+    parser.add_argument("--tokenizers", nargs="*", default=list(TOKENIZERS), choices=list(TOKENIZERS))
+    parser.add_argument("--corpus", type=Path, default=None, help="Text file (one utterance per line) or JSON list")
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per utterance")
+    parser.add_argument("--local", action="store_true", help="Start the stand-in TTS server in-process")
+    parser.add_argument("--local-url", default=os.getenv("LOCAL_TTS_URL"), help="Use a running stand-in TTS server")
+    parser.add_argument("--mock-ttfb-ms", type=float, default=150.0, help="First-byte delay of the in-process server")
+    parser.add_argument("--mock-jitter-ms", type=float, default=5.0, help="Per-chunk jitter of the in-process server")
+    parser.add_argument("--output", type=Path, default=Path("tts_bench.json"), help="Where to write the JSON results")
+    parser.add_argument("--baseline", type=Path, default=None, help="Previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs baseline, 0.2 = 20%%")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(_run(args))
+    args.output.write_text(json.dumps(report, indent=2))
+    _print_summary(report["summary"])
+    print(f"Results written to {args.output}")
+
+    failed = any(row["errors"] for row in report["summary"])
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
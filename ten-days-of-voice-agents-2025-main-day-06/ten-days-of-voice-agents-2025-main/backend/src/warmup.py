@@ -0,0 +1,178 @@
+"""
+Prewarm of the local models a session needs.
+The worker process loads Silero VAD and runs a few silent windows through it,
+creates the noise cancellation options and checks the turn detector's model
+files are on disk, all before the first job arrives. The turn detector itself
+runs in the worker's shared inference process and is only reachable from a job,
+so its dummy inference runs in the background when the entrypoint starts.
+Every step is timed, first (cold) and second (warm) inference separately, and
+so is the first turn of each session, cold for the process's first session and
+warm after that.
+
+VAD_BATCHING=1 batches VAD across sessions (see vad_batcher.py). That needs the
+sessions in one process, so it also runs jobs as threads instead of one process
+per job: a crash or a blocked event loop then takes down every session in the
+worker, and they all share one GIL. Off by default.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+from livekit.agents import JobExecutorType, JobProcess, WorkerOptions, llm, metrics
+from livekit.plugins import noise_cancellation, silero
+
+from vad_batcher import BatchedVAD
+
+logger = logging.getLogger("agent")
+
+# Silent VAD windows run through the model in prewarm
+VAD_WARMUP_WINDOWS = 8
+
+
+class StartupTimings:
+    """Milliseconds per component and phase (load, first_inference, warm_inference)"""
+
+    def __init__(self) -> None:
+        self._timings: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, component: str, phase: str, seconds: float) -> None:
+        with self._lock:
+            self._timings.setdefault(component, {})[phase] = round(seconds * 1000, 1)
+
+    @contextmanager
+    def measure(self, component: str, phase: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(component, phase, time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {component: dict(phases) for component, phases in self._timings.items()}
+
+
+# Singleton instance, one report per worker process
+startup_timings = StartupTimings()
+
+
+class FirstTurnTimer:
+    """First end-of-utterance, LLM and TTS latencies of a session, filed under first_turn_cold or first_turn_warm"""
+
+    _sessions = 0
+    _sessions_lock = threading.Lock()
+
+    def __init__(self, timings: StartupTimings = startup_timings) -> None:
+        with FirstTurnTimer._sessions_lock:
+            FirstTurnTimer._sessions += 1
+            first_session = FirstTurnTimer._sessions == 1
+        self.timings = timings
+        self.component = "first_turn_cold" if first_session else "first_turn_warm"
+        self._seen: set = set()
+
+    def collect(self, turn_metrics: Any) -> None:
+        for metrics_type, phase, attr in (
+            (metrics.EOUMetrics, "end_of_utterance", "end_of_utterance_delay"),
+            (metrics.LLMMetrics, "llm_ttft", "ttft"),
+            (metrics.TTSMetrics, "tts_ttfb", "ttfb"),
+        ):
+            value = getattr(turn_metrics, attr, -1) if isinstance(turn_metrics, metrics_type) else -1
+            if value >= 0 and phase not in self._seen:
+                self._seen.add(phase)
+                self.timings.record(self.component, phase, value)
+
+
+def vad_batching() -> bool:
+    return os.getenv("VAD_BATCHING", "0") == "1"
+
+
+def job_executor_type() -> JobExecutorType:
+    """Threads when VAD batching is on, so sessions share the process and its batcher. livekit's default otherwise."""
+    return JobExecutorType.THREAD if vad_batching() else WorkerOptions.job_executor_type
+
+
+# Thread jobs each run prewarm, they all get this one VAD so their streams land in one batcher
+_batched_vad: Optional[BatchedVAD] = None
+_batched_vad_lock = threading.Lock()
+
+
+def load_vad(**kwargs: Any) -> silero.VAD:
+    global _batched_vad
+    if vad_batching():
+        with _batched_vad_lock:
+            if _batched_vad is None:
+                _batched_vad = _load_vad(BatchedVAD, **kwargs)
+            return _batched_vad
+    return _load_vad(silero.VAD, **kwargs)
+
+
+def _load_vad(vad_class: type, **kwargs: Any) -> silero.VAD:
+    with startup_timings.measure("vad", "load"):
+        vad = vad_class.load(**kwargs)
+
+    # Streams share the ONNX session, the first run on it pays for allocation and graph setup
+    from livekit.plugins.silero.onnx_model import OnnxModel
+
+    model = OnnxModel(onnx_session=vad._onnx_session, sample_rate=vad._opts.sample_rate)
+    window = np.zeros(model.window_size_samples, dtype=np.float32)
+    with startup_timings.measure("vad", "first_inference"):
+        model(window)
+    start = time.perf_counter()
+    for _ in range(VAD_WARMUP_WINDOWS - 1):
+        model(window)
+    startup_timings.record("vad", "warm_inference", (time.perf_counter() - start) / max(1, VAD_WARMUP_WINDOWS - 1))
+    return vad
+
+
+def load_noise_cancellation() -> Any:
+    """BVC options, the model itself lives in the native RTC library and loads with the first audio stream"""
+    with startup_timings.measure("noise_cancellation", "load"):
+        return noise_cancellation.BVC()
+
+
+def check_turn_detector(model_type: str = "multilingual") -> bool:
+    """The turn detector only reads local files once a job starts, fail here instead of on the first turn"""
+    from livekit.plugins.turn_detector.base import _download_from_hf_hub
+    from livekit.plugins.turn_detector.models import (
+        HG_MODEL,
+        MODEL_REVISIONS,
+        ONNX_FILENAME,
+    )
+
+    try:
+        with startup_timings.measure("turn_detector", "files"):
+            revision = MODEL_REVISIONS[model_type]
+            _download_from_hf_hub(HG_MODEL, "languages.json", revision=revision, local_files_only=True)
+            _download_from_hf_hub(HG_MODEL, ONNX_FILENAME, subfolder="onnx", revision=revision, local_files_only=True)
+        return True
+    except Exception as e:
+        logger.error(f"Turn detector model files are missing, run `python src/agent.py download-files`: {e}")
+        return False
+
+
+def prewarm_models(proc: JobProcess) -> None:
+    """Load and warm VAD and noise cancellation into proc.userdata, check the turn detector"""
+    proc.userdata["vad"] = load_vad()
+    proc.userdata["noise_cancellation"] = load_noise_cancellation()
+    check_turn_detector()
+    proc.userdata["startup_timings"] = startup_timings
+    logger.info(f"Prewarm timings: {startup_timings.stats()}")
+
+
+async def warm_turn_detector(turn_detector: Any, timeout: Optional[float] = 5.0) -> None:
+    """Two dummy end-of-turn predictions, so the user's first turn doesn't pay for the cold one"""
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="assistant", content="Hi! How can I help you today?")
+    chat_ctx.add_message(role="user", content="hello")
+    try:
+        for phase in ("first_inference", "warm_inference"):
+            with startup_timings.measure("turn_detector", phase):
+                await turn_detector.predict_end_of_turn(chat_ctx, timeout=timeout)
+        logger.info(f"Turn detector warm: {startup_timings.stats().get('turn_detector')}")
+    except Exception as e:
+        logger.error(f"Error warming up turn detector: {e}")
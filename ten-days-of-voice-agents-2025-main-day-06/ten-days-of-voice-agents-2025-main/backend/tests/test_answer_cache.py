@@ -0,0 +1,117 @@
+import sys
+from pathlib import Path
+
+from livekit.agents import llm
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from answer_cache import (
+    AnswerCache,
+    current_turn,
+    grounded_answer,
+    is_cacheable_question,
+)
+from faq_index import Document
+
+
+def test_rephrased_question_hits_within_scope():
+    cache = AnswerCache()
+    assert cache.store("digest-a", "What does Jio do?", "Jio is our digital services arm.", ttft=1.5)
+
+    hit = cache.lookup("digest-a", "Tell me about Jio")
+    assert hit is not None
+    assert hit.answer == "Jio is our digital services arm."
+    assert hit.score == 1.0
+    assert 0 < hit.saved <= 1.5
+
+    # Another tenant's content never answers
+    assert cache.lookup("digest-b", "What does Jio do?") is None
+    # A different question about the same thing is not close enough
+    assert cache.lookup("digest-a", "Jio pricing for enterprise") is None
+
+    stats = cache.stats()
+    assert stats["lookups"] == 3
+    assert stats["hits"] == 1
+    assert stats["saved_ms"] > 0
+
+
+def test_fuzzy_match_above_threshold():
+    cache = AnswerCache(threshold=0.8)
+    cache.store("d", "What are your retail verticals and brands?", "Retail covers grocery, fashion and electronics.", ttft=1.0)
+    assert cache.lookup("d", "retail vertical brands") is not None
+    assert cache.lookup("d", "retail") is None
+
+
+def test_context_dependent_questions_are_not_cached():
+    assert not is_cacheable_question("How much does that cost?")
+    assert not is_cacheable_question("Is it available in Pune?")
+    assert is_cacheable_question("What is the pricing?")
+
+    cache = AnswerCache()
+    assert not cache.store("d", "What about them?", "Some answer", ttft=1.0)
+    assert cache.lookup("d", "What about them?") is None
+
+
+def test_ttl_and_lru_eviction():
+    cache = AnswerCache(max_entries=2, ttl=60)
+    cache.store("d", "Jio services", "a", ttft=1.0)
+    cache.store("d", "retail brands", "b", ttft=1.0)
+    cache.lookup("d", "Jio services")  # Jio is now most recently used
+    cache.store("d", "green energy", "c", ttft=1.0)
+    assert cache.lookup("d", "retail brands") is None
+    assert cache.lookup("d", "Jio services").answer == "a"
+    assert cache.stats()["evictions"] == 1
+
+    expiring = AnswerCache(ttl=0)
+    expiring.store("d", "Jio services", "a", ttft=1.0)
+    assert expiring.lookup("d", "Jio services") is None
+
+
+def test_current_turn_reports_tools_since_last_question():
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="assistant", content="Namaste!")
+    chat_ctx.add_message(role="user", content="What does Jio do?")
+    assert current_turn(chat_ctx.items) == ("What does Jio do?", [])
+
+    chat_ctx.items.append(llm.FunctionCall(call_id="1", name="lookup_faq", arguments='{"query": "Jio"}'))
+    chat_ctx.items.append(llm.FunctionCallOutput(call_id="1", name="lookup_faq", output="Jio is...", is_error=False))
+    assert current_turn(chat_ctx.items) == ("What does Jio do?", ["lookup_faq"])
+
+    assert current_turn(llm.ChatContext.empty().items) == (None, [])
+
+
+def test_only_the_knowledge_base_answer_is_cached():
+    vision = Document("faq", "What is Reliance's vision?", "Q: What is Reliance's vision?\nA: To be a global leader in sustainable energy and digital services.")
+    store = Document("faq", "Do you have an online store?", "Q: Do you have an online store?\nA: Yes, JioMart delivers groceries.")
+    spoken = (
+        "Great question, Rahul! Our vision is to be a global leader in sustainable energy and digital services. "
+        "By the way, which company are you with?"
+    )
+
+    answer = grounded_answer([store, vision], spoken)
+    # The caller's name and the follow-up question never reach the cache
+    assert answer == "To be a global leader in sustainable energy and digital services."
+    assert grounded_answer([store], spoken) is None
+    # Turns that weren't built from the knowledge base are not cached at all
+    assert grounded_answer([vision], "Sure Rahul, what's your email?") is None
+
+
+def test_vertical_and_company_answers_are_cached():
+    jio = Document(
+        "vertical",
+        "Digital Services (Jio)",
+        "Digital Services (Jio): World-class digital services, 5G connectivity, and digital ecosystem. Companies: Jio Platforms, Reliance Jio Infocomm.",
+    )
+    spoken = (
+        "Sure Rahul! Jio runs our world-class digital services, with 5G connectivity and a digital ecosystem, "
+        "through Jio Platforms and Reliance Jio Infocomm."
+    )
+    assert grounded_answer([jio], spoken) == jio.text
+    assert grounded_answer([jio], "Happy to help, what's your role?") is None
+
+
+def test_questions_with_contact_details_are_not_cached():
+    assert not is_cacheable_question("My email is rahul@example.com, what is Jio?")
+    assert not is_cacheable_question("Call me on 98765 43210 about Jio")
+    assert is_cacheable_question("What is Jio 5G?")
@@ -0,0 +1,163 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from livekit.agents import tts, utils
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from audio_cache import AudioCache, CachedTTS, StaticLines, cache_key
+
+SAMPLE_RATE = 16000
+
+
+class FakeTTS(tts.TTS):
+    """Non-streaming TTS producing 100ms of audio per character"""
+
+    def __init__(self):
+        super().__init__(capabilities=tts.TTSCapabilities(streaming=False), sample_rate=SAMPLE_RATE, num_channels=1)
+        self.requests = []
+
+    @property
+    def provider(self) -> str:
+        return "fake"
+
+    def synthesize(self, text, *, conn_options=None):
+        self.requests.append(text)
+        return FakeStream(tts=self, input_text=text, conn_options=conn_options or tts.tts.DEFAULT_API_CONNECT_OPTIONS)
+
+
+class FakeStream(tts.ChunkedStream):
+    async def _run(self, output_emitter):
+        output_emitter.initialize(request_id=utils.shortuuid(), sample_rate=SAMPLE_RATE, num_channels=1, mime_type="audio/pcm")
+        output_emitter.push(bytes([len(self.input_text) % 256, 0]) * (SAMPLE_RATE // 10) * len(self.input_text))
+
+
+def test_cache_key_normalizes_whitespace():
+    assert cache_key("p", "v", None, 16000, "Hello   there ") == cache_key("p", "v", None, 16000, "Hello there")
+    assert cache_key("p", "v", None, 16000, "Hello") != cache_key("p", "other", None, 16000, "Hello")
+
+
+def test_put_get_and_lru_eviction(tmp_path):
+    cache = AudioCache(tmp_path, max_bytes=10_000)
+    pcm = b"\x01\x00" * 2000
+
+    cache.put("a" * 64, pcm, SAMPLE_RATE, 1)
+    cache.put("b" * 64, pcm, SAMPLE_RATE, 1)
+    assert cache.get("a" * 64, SAMPLE_RATE, 1) == pcm
+    assert cache.get("a" * 64, 24000, 1) is None
+
+    # Over the cap, the least recently played entry goes first
+    cache.put("c" * 64, pcm, SAMPLE_RATE, 1)
+    stats = cache.stats()
+    assert stats["evictions"] >= 1
+    assert stats["bytes"] <= 10_000
+    assert cache.get("c" * 64, SAMPLE_RATE, 1) == pcm
+
+
+@pytest.mark.asyncio
+async def test_cached_tts_replays_from_disk(tmp_path):
+    wrapped = FakeTTS()
+    cached = CachedTTS(wrapped, AudioCache(tmp_path), voice="fake-voice", static_lines=StaticLines(["Namaste! Welcome."]))
+    labels = []
+    cached.on("metrics_collected", lambda m: labels.append(m.label))
+
+    first = await cached.synthesize("Namaste! Welcome.").collect()
+    second = await cached.synthesize("Namaste!  Welcome.").collect()
+
+    assert wrapped.requests == ["Namaste! Welcome."]
+    assert bytes(first.data) == bytes(second.data)
+    assert labels.count("audio_cache.miss") == 1
+    assert labels.count("audio_cache.hit") == 1
+    assert cached.cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_stream_caches_per_sentence(tmp_path):
+    wrapped = FakeTTS()
+    greeting = StaticLines(["Welcome to Reliance Group. We'd love to hear from you."])
+    cached = CachedTTS(wrapped, AudioCache(tmp_path), voice="fake-voice", static_lines=greeting)
+
+    async def speak(text):
+        frames = []
+        async with cached.stream() as stream:
+            stream.push_text(text)
+            stream.end_input()
+            async for ev in stream:
+                frames.append(ev.frame)
+        return frames
+
+    await speak("Welcome to Reliance Group. What is your name?")
+    await speak("Welcome to Reliance Group. Which vertical interests you?")
+
+    # The shared greeting sentence only went to the provider once
+    assert wrapped.requests.count("Welcome to Reliance Group.") == 1
+    assert len(wrapped.requests) == 3
+
+
+def test_static_lines_match_whole_words():
+    lines = StaticLines(["Loops repeat a block of code. What is a loop?"])
+    assert "What is a loop?" in lines
+    assert "Loops repeat a  block of code." in lines
+    assert "loop?" not in StaticLines(["What is a for-loop?"])
+    assert "Ram." not in StaticLines(["Welcome to the program."])
+
+
+@pytest.mark.asyncio
+async def test_llm_speech_is_not_written_to_disk(tmp_path):
+    wrapped = FakeTTS()
+    cache = AudioCache(tmp_path)
+    cached = CachedTTS(wrapped, cache, voice="fake-voice", static_lines=StaticLines(["Welcome to Reliance Group."]))
+
+    await cached.synthesize("Welcome to Reliance Group.").collect()
+    await cached.synthesize("Thanks Priya, I have priya@example.com.").collect()
+
+    assert cache.contains(cached.key_for("Welcome to Reliance Group."))
+    assert not cache.contains(cached.key_for("Thanks Priya, I have priya@example.com."))
+    # Without static lines nothing is written at all
+    uncached = CachedTTS(wrapped, AudioCache(tmp_path / "none"), voice="fake-voice")
+    await uncached.synthesize("Welcome to Reliance Group.").collect()
+    assert uncached.cache.stats()["bytes"] == 0
+
+
+class SlowTTS(FakeTTS):
+    """Takes 50ms per sentence, records when each one started and finished"""
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def synthesize(self, text, *, conn_options=None):
+        self.requests.append(text)
+        return SlowStream(tts=self, input_text=text, conn_options=conn_options or tts.tts.DEFAULT_API_CONNECT_OPTIONS)
+
+
+class SlowStream(FakeStream):
+    async def _run(self, output_emitter):
+        self._tts.events.append(("start", self.input_text.strip()))
+        await asyncio.sleep(0.05)
+        await super()._run(output_emitter)
+        self._tts.events.append(("end", self.input_text.strip()))
+
+
+@pytest.mark.asyncio
+async def test_next_sentence_is_synthesized_while_one_plays(tmp_path):
+    wrapped = SlowTTS()
+    cached = CachedTTS(wrapped, AudioCache(tmp_path), voice="fake-voice")
+    sentences = ["First sentence is here.", "Second sentence is here.", "Third sentence is here."]
+
+    async with cached.stream() as stream:
+        stream.push_text(" ".join(sentences))
+        stream.end_input()
+        frames = [ev.frame async for ev in stream]
+
+    # The second sentence started before the first one was done, the third waited for a slot
+    assert wrapped.events.index(("start", sentences[1])) < wrapped.events.index(("end", sentences[0]))
+    assert wrapped.events.index(("start", sentences[2])) > wrapped.events.index(("end", sentences[0]))
+    # Audio still comes out in sentence order
+    markers = [sample for sample in b"".join(bytes(frame.data) for frame in frames)[::2] if sample]
+    runs = [marker for i, marker in enumerate(markers) if i == 0 or markers[i - 1] != marker]
+    assert runs == [len(text) % 256 for text in wrapped.requests]
+    assert [text.strip() for text in wrapped.requests] == sentences
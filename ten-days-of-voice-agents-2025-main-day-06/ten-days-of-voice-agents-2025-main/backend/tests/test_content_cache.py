@@ -0,0 +1,72 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from content_cache import ContentCache
+
+
+def _write(path: Path, data, mtime_ns: int) -> None:
+    with open(path, "w") as f:
+        json.dump(data, f)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_content_is_shared_and_read_only(tmp_path):
+    path = tmp_path / "content.json"
+    _write(path, {"faqs": [{"question": "Q", "answer": "A"}]}, 1_000_000_000)
+
+    cache = ContentCache(check_interval=0)
+    first = cache.get(path)
+    assert cache.get(path) is first
+    assert cache.loads == 1
+
+    assert first.get("faqs")[0]["answer"] == "A"
+    assert json.loads(json.dumps(first)) == {"faqs": [{"question": "Q", "answer": "A"}]}
+    with pytest.raises(TypeError):
+        first["faqs"] = []
+    with pytest.raises(AttributeError):
+        first["faqs"].append({})
+
+
+def test_reloads_only_when_file_changes(tmp_path):
+    path = tmp_path / "content.json"
+    _write(path, {"version": 1}, 1_000_000_000)
+    cache = ContentCache(check_interval=0)
+    first = cache.get(path)
+
+    # Touched but identical: same object, no re-parse
+    _write(path, {"version": 1}, 2_000_000_000)
+    assert cache.get(path) is first
+    assert cache.loads == 1
+
+    _write(path, {"version": 2}, 3_000_000_000)
+    assert cache.get(path)["version"] == 2
+    assert cache.loads == 2
+
+
+def test_keeps_last_good_version_on_broken_edit(tmp_path):
+    path = tmp_path / "content.json"
+    _write(path, {"version": 1}, 1_000_000_000)
+    cache = ContentCache(check_interval=0)
+    cache.get(path)
+
+    with open(path, "w") as f:
+        f.write('{"version": ')
+    assert cache.get(path)["version"] == 1
+
+
+def test_check_interval_throttles_stat_calls(tmp_path):
+    path = tmp_path / "content.json"
+    _write(path, {"version": 1}, 1_000_000_000)
+    cache = ContentCache(check_interval=3600)
+    cache.get(path)
+
+    _write(path, {"version": 2}, 2_000_000_000)
+    # Within the interval the cached copy is served without touching the file
+    assert cache.get(path)["version"] == 1
@@ -0,0 +1,74 @@
+import json
+import sys
+from pathlib import Path
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from faq_index import VerticalSpotter, build_faq_index, get_faq_index, tokenize
+
+CONTENT_PATH = Path(__file__).resolve().parent.parent.parent / "shared-data" / "reliance_content.json"
+
+
+def load_content():
+    with open(CONTENT_PATH, "r") as f:
+        return json.load(f)
+
+
+def test_tokenize_drops_stopwords_and_stems():
+    assert tokenize("What are the Connections?") == ["connection"]
+
+
+def test_singular_and_plural_share_a_stem():
+    for singular, plural in [
+        ("service", "services"), ("price", "prices"), ("database", "databases"),
+        ("class", "classes"), ("business", "businesses"), ("search", "searches"),
+        ("company", "companies"), ("connection", "connections"),
+    ]:
+        assert tokenize(singular) == tokenize(plural), (singular, plural)
+    # Not plurals, nothing to strip
+    assert tokenize("status analysis") == ["status", "analysis"]
+
+
+def test_faq_question_ranks_first():
+    index = build_faq_index(load_content())
+    results = index.search("what is your vision", k=3)
+    assert results
+    top = results[0][1]
+    assert top.kind == "faq"
+    assert "vision" in top.title.lower()
+
+
+def test_group_company_finds_vertical():
+    index = build_faq_index(load_content())
+    results = index.search("JioCinema streaming")
+    assert results[0][1].kind == "vertical"
+    assert results[0][1].title == "Media & Entertainment"
+
+
+def test_unknown_query_returns_nothing():
+    index = build_faq_index(load_content())
+    assert index.search("zzyzx quux") == []
+
+
+def test_index_is_shared_per_digest():
+    content = load_content()
+    assert get_faq_index("abc", content) is get_faq_index("abc", content)
+    assert get_faq_index("abc", content) is not get_faq_index("def", content)
+
+
+def test_scales_to_large_knowledge_base():
+    content = {
+        "faqs": [{"question": f"What is product {i}?", "answer": f"Product {i} is item{i}."} for i in range(5000)]
+    }
+    index = build_faq_index(content)
+    results = index.search("item4321")
+    assert results[0][1].title == "What is product 4321?"
+
+
+def test_vertical_spotter():
+    spotter = VerticalSpotter(load_content())
+    assert spotter.spot("so um tell me about Jio") == "Digital Services (Jio)"
+    assert spotter.spot("what does JioMart sell") == "Retail"
+    assert spotter.spot("your new energy business") == "New Energy"
+    assert spotter.spot("hello there") is None
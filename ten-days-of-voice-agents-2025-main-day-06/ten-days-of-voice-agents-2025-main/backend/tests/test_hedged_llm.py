@@ -0,0 +1,96 @@
+import sys
+from pathlib import Path
+
+import pytest
+from livekit.agents import APIConnectionError, function_tool, llm
+from livekit.plugins import openai
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from hedged_llm import HedgedLLM
+from local_llm import start_server
+
+
+@function_tool
+async def lookup_faq(query: str) -> str:
+    """Look up company facts"""
+    return "Jio is our telecom arm."
+
+
+def _model(url: str, name: str, **extra_body) -> openai.LLM:
+    return openai.LLM(model=name, base_url=url, api_key="local", extra_body=extra_body or None)
+
+
+async def _turn(model: llm.LLM, text: str, tools=None):
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="user", content=text)
+    content, tool_calls = "", []
+    async with model.chat(chat_ctx=chat_ctx, tools=tools or []) as stream:
+        async for chunk in stream:
+            if chunk.delta:
+                content += chunk.delta.content or ""
+                tool_calls.extend(chunk.delta.tool_calls)
+    return content, tool_calls
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_answers_alone():
+    runner, url = await start_server()
+    try:
+        hedged = HedgedLLM(_model(url, "primary"), _model(url, "secondary"), deadline=1.0)
+        content, _ = await _turn(hedged, "Hello")
+        assert content == "You said: Hello"
+        stats = hedged.stats()
+        assert stats["hedged"] == 0
+        assert stats["primary"]["wins"] == 1
+    finally:
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged():
+    runner, url = await start_server()
+    try:
+        hedged = HedgedLLM(_model(url, "primary", ttfb_ms=2000), _model(url, "secondary"), deadline=0.1)
+        metrics = []
+        hedged.on("metrics_collected", metrics.append)
+        content, _ = await _turn(hedged, "Hello")
+        assert content == "You said: Hello"
+        stats = hedged.stats()
+        assert stats["hedged"] == 1
+        assert stats["secondary"]["wins"] == 1
+        assert stats["primary"]["wins"] == 0
+        # Only the winner streamed, so only the winner reports a completed turn
+        assert [m.metadata.model_name for m in metrics] == ["secondary"]
+    finally:
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_come_from_a_single_model():
+    runner, url = await start_server()
+    try:
+        hedged = HedgedLLM(_model(url, "primary", ttfb_ms=2000), _model(url, "secondary"), deadline=0.1)
+        content, tool_calls = await _turn(hedged, "What does Jio do?", tools=[lookup_faq])
+        assert content == ""
+        assert [call.name for call in tool_calls] == ["lookup_faq"]
+        assert tool_calls[0].arguments == '{"query": "What does Jio do?"}'
+    finally:
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_failing_primary_hedges_immediately_and_both_failing_raises():
+    runner, url = await start_server()
+    try:
+        hedged = HedgedLLM(_model(url, "primary", fail=True), _model(url, "secondary"), deadline=5.0)
+        content, _ = await _turn(hedged, "Hello")
+        assert content == "You said: Hello"
+        assert hedged.stats()["secondary"]["wins"] == 1
+
+        broken = HedgedLLM(_model(url, "primary", fail=True), _model(url, "secondary", fail=True), deadline=5.0)
+        with pytest.raises(APIConnectionError):
+            await _turn(broken, "Hello")
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,139 @@
+import sys
+from pathlib import Path
+
+import aiohttp
+import pytest
+from livekit.agents import APIConnectOptions
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from hedged_tts import HedgedTTS, LatencyHistogram
+from local_tts import LocalTTS, start_server, synthesize_pcm
+
+NO_RETRY = APIConnectOptions(max_retry=0, timeout=5)
+
+
+def test_histogram_buckets_and_percentiles():
+    histogram = LatencyHistogram()
+    for ms in [40, 90, 120, 150, 180, 210, 250, 280, 400, 2500]:
+        histogram.record(ms / 1000)
+    stats = histogram.stats()
+    assert stats["count"] == 10
+    assert stats["buckets"]["<=50ms"] == 1
+    assert stats["buckets"]["<=200ms"] == 3
+    assert stats["buckets"]["<=3000ms"] == 1
+    assert stats["p50_ms"] == 210.0
+    assert stats["p95_ms"] == 2500.0
+
+
+def test_deadline_follows_primary_p95():
+    primary = LocalTTS(base_url="http://unused", voice="a", http_session=object())
+    secondary = LocalTTS(base_url="http://unused", voice="b", http_session=object())
+    hedged = HedgedTTS(primary, secondary, initial_deadline=0.8, min_deadline=0.25, max_deadline=2.0, min_samples=5)
+    assert hedged.deadline() == 0.8
+
+    for _ in range(20):
+        hedged.latency["primary"].record(0.4)
+    assert hedged.deadline() == pytest.approx(0.4)
+
+    # Old samples age out of the window
+    for _ in range(200):
+        hedged.latency["primary"].record(0.01)
+    assert hedged.deadline() == 0.25
+
+
+def test_rejects_mismatched_sample_rates():
+    with pytest.raises(ValueError):
+        HedgedTTS(
+            LocalTTS(base_url="http://unused", sample_rate=24000, http_session=object()),
+            LocalTTS(base_url="http://unused", sample_rate=16000, http_session=object()),
+        )
+
+
+async def _collect(hedged: HedgedTTS, text: str) -> bytes:
+    """PCM of the whole utterance, the last frame is padded with silence"""
+    frames = await hedged.synthesize(text, conn_options=NO_RETRY).collect()
+    return frames.data.tobytes()
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    runner, url = await start_server()
+    try:
+        async with aiohttp.ClientSession() as session:
+            hedged = HedgedTTS(
+                LocalTTS(base_url=url, voice="primary", http_session=session),
+                LocalTTS(base_url=url, voice="secondary", http_session=session),
+                initial_deadline=1.0,
+            )
+            audio = await _collect(hedged, "Hello there.")
+            assert audio.startswith(synthesize_pcm("Hello there.", "primary"))
+            assert hedged.stats()["hedged"] == 0
+            assert hedged.stats()["primary"]["count"] == 1
+    finally:
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_secondary_plays():
+    runner, url = await start_server()
+    try:
+        async with aiohttp.ClientSession() as session:
+            hedged = HedgedTTS(
+                LocalTTS(base_url=url, voice="primary", http_session=session, ttfb_ms=1500),
+                LocalTTS(base_url=url, voice="secondary", http_session=session, ttfb_ms=0),
+                initial_deadline=0.1,
+                min_deadline=0.05,
+            )
+            audio = await _collect(hedged, "Hello there.")
+            assert audio.startswith(synthesize_pcm("Hello there.", "secondary"))
+            stats = hedged.stats()
+            assert stats["hedged"] == 1
+            assert stats["secondary_wins"] == 1
+            # The cancelled primary still counts, at least as slow as the deadline
+            assert stats["primary"]["count"] == 1
+            assert stats["primary"]["p50_ms"] >= 100
+    finally:
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_failed_primary_falls_over_immediately():
+    runner, url = await start_server()
+    try:
+        async with aiohttp.ClientSession() as session:
+            hedged = HedgedTTS(
+                LocalTTS(base_url=f"{url}/missing", voice="primary", http_session=session),
+                LocalTTS(base_url=url, voice="secondary", http_session=session),
+                initial_deadline=2.0,
+            )
+            audio = await _collect(hedged, "Hi.")
+            assert audio.startswith(synthesize_pcm("Hi.", "secondary"))
+            assert hedged.stats()["primary_failures"] == 1
+    finally:
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_stream_hedges_each_sentence():
+    runner, url = await start_server()
+    try:
+        async with aiohttp.ClientSession() as session:
+            hedged = HedgedTTS(
+                LocalTTS(base_url=url, voice="primary", http_session=session, ttfb_ms=1500),
+                LocalTTS(base_url=url, voice="secondary", http_session=session),
+                initial_deadline=0.1,
+                min_deadline=0.05,
+            )
+            async with hedged.stream(conn_options=NO_RETRY) as stream:
+                stream.push_text("First sentence here. And a second one.")
+                stream.end_input()
+                audio = b"".join([ev.frame.data.tobytes() async for ev in stream])
+            assert hedged.stats()["requests"] == 2
+            assert hedged.stats()["secondary_wins"] == 2
+            expected = synthesize_pcm("First sentence here. ", "secondary") + synthesize_pcm("And a second one.", "secondary")
+            # Each sentence's last frame is padded with silence
+            assert len(expected) <= len(audio) < len(expected) + 2 * 24000 * 2 * 0.1
+    finally:
+        await runner.cleanup()
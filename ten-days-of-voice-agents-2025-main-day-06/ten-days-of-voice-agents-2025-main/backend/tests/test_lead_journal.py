@@ -0,0 +1,103 @@
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from lead_journal import LeadJournal
+
+
+def _lead(i: int) -> dict:
+    return {
+        "timestamp": f"2025-11-26T16:42:{i:02d}",
+        "name": f"Lead {i}",
+        "company": "Blendtec",
+        "email": f"lead{i}@example.com",
+    }
+
+
+def test_append_and_read(tmp_path):
+    journal = LeadJournal(tmp_path / "leads.jsonl")
+    journal.append(_lead(1))
+    journal.append_many([_lead(2), _lead(3)])
+
+    leads = journal.read_all()
+    assert [lead["name"] for lead in leads] == ["Lead 1", "Lead 2", "Lead 3"]
+
+    # The journal is line oriented, one lead per line
+    lines = (tmp_path / "leads.jsonl").read_text().splitlines()
+    assert len(lines) == 3
+    journal.close()
+
+
+def test_compact_rebuilds_snapshot(tmp_path):
+    journal = LeadJournal(tmp_path / "leads.jsonl")
+    journal.append(_lead(1))
+    journal.append(_lead(2))
+    assert journal.compact() == 2
+
+    with open(tmp_path / "leads.json", "r") as f:
+        snapshot = json.load(f)
+    assert [lead["email"] for lead in snapshot] == ["lead1@example.com", "lead2@example.com"]
+    journal.close()
+
+
+def test_concurrent_compactors_never_share_a_temp_file(tmp_path):
+    # One journal per worker process, all on the same files
+    journals = [LeadJournal(tmp_path / "leads.jsonl") for _ in range(4)]
+    journals[0].append_many([_lead(i) for i in range(50)])
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        counts = list(pool.map(lambda journal: [journal.compact() for _ in range(10)], journals))
+
+    assert counts == [[50] * 10] * 4
+    with open(tmp_path / "leads.json", "r") as f:
+        assert len(json.load(f)) == 50
+    assert list(tmp_path.glob("*.tmp")) == []
+    for journal in journals:
+        journal.close()
+
+
+def test_migrates_legacy_array(tmp_path):
+    with open(tmp_path / "leads.json", "w") as f:
+        json.dump([_lead(1), _lead(2)], f, indent=2)
+
+    journal = LeadJournal(tmp_path / "leads.jsonl")
+    journal.append(_lead(3))
+    assert [lead["name"] for lead in journal.read_all()] == ["Lead 1", "Lead 2", "Lead 3"]
+
+    # Migration only happens once, the snapshot is derived from the journal afterwards
+    assert LeadJournal(tmp_path / "leads.jsonl").migrate_legacy() == 0
+    journal.close()
+    with open(tmp_path / "leads.json", "r") as f:
+        assert len(json.load(f)) == 3
+
+
+def test_skips_torn_trailing_line(tmp_path):
+    journal = LeadJournal(tmp_path / "leads.jsonl")
+    journal.append(_lead(1))
+    journal.close()
+
+    with open(tmp_path / "leads.jsonl", "a") as f:
+        f.write('{"name": "Lead 2", "comp')
+
+    assert [lead["name"] for lead in LeadJournal(tmp_path / "leads.jsonl").read_all()] == ["Lead 1"]
+
+
+def test_file_is_closed_after_close_and_failed_writes(tmp_path):
+    journal = LeadJournal(tmp_path / "leads.jsonl")
+    journal.append(_lead(1))
+    f = journal._file
+    journal.close()
+    assert f.closed and journal._file is None
+
+    if not Path("/dev/full").exists():
+        pytest.skip("needs /dev/full to fail a write")
+    full = LeadJournal(Path("/dev/full"), snapshot_path=tmp_path / "full.json")
+    with pytest.raises(OSError):
+        full.append(_lead(2))
+    assert full._file is None
@@ -0,0 +1,126 @@
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from lead_journal import LeadJournal
+from lead_store import SQLiteLeadStore, create_lead_store
+
+
+def _lead(name: str, company: str, email: str, timestamp: str) -> dict:
+    return {
+        "timestamp": timestamp,
+        "name": name,
+        "company": company,
+        "email": email,
+        "role": "Founder",
+        "interest": "Digital Services (Jio)",
+        "timeline": "Soon",
+    }
+
+
+def test_upsert_by_email(tmp_path):
+    store = SQLiteLeadStore(tmp_path / "leads.db")
+    store.append(_lead("Priya", "Blendtec", "Priya@Example.com", "2025-11-26T10:00:00"))
+    store.append(_lead("Priya Jha", "Blendtec", "priya@example.com ", "2025-11-27T10:00:00"))
+
+    assert store.count() == 1
+    lead = store.get_by_email("priya@example.com")
+    assert lead["name"] == "Priya Jha"
+    assert lead["timestamp"] == "2025-11-27T10:00:00"
+    store.close()
+
+
+def test_leads_for_company_since(tmp_path):
+    store = SQLiteLeadStore(tmp_path / "leads.db")
+    store.append_many([
+        _lead("A", "Blendtec", "a@example.com", "2025-11-01T09:00:00"),
+        _lead("B", "blendtec", "b@example.com", "2025-11-20T09:00:00"),
+        _lead("C", "Tata", "c@example.com", "2025-11-21T09:00:00"),
+    ])
+
+    assert [lead["name"] for lead in store.leads_for_company("Blendtec")] == ["A", "B"]
+    assert [lead["name"] for lead in store.leads_for_company("BLENDTEC", since="2025-11-10")] == ["B"]
+
+    # The company lookup is served by the index, not a table scan
+    plan = store._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM leads WHERE company = ? COLLATE NOCASE AND timestamp >= ?",
+        ("Blendtec", "2025-11-10"),
+    ).fetchall()
+    assert any("idx_leads_company_timestamp" in row[-1] for row in plan)
+    store.close()
+
+
+def test_concurrent_writers_do_not_lose_leads(tmp_path):
+    db_path = tmp_path / "leads.db"
+    SQLiteLeadStore(db_path).close()
+
+    def worker(worker_id: int):
+        # Separate connections, like separate job processes
+        store = SQLiteLeadStore(db_path)
+        for i in range(25):
+            store.append(_lead(f"W{worker_id}-{i}", "Blendtec", f"w{worker_id}-{i}@example.com", "2025-11-26T10:00:00"))
+        store.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert SQLiteLeadStore(db_path).count() == 100
+
+
+def test_migrates_legacy_array(tmp_path):
+    with open(tmp_path / "leads.json", "w") as f:
+        json.dump([_lead("A", "Blendtec", "a@example.com", "2025-11-01T09:00:00")], f)
+
+    store = create_lead_store(tmp_path, backend="sqlite")
+    assert isinstance(store, SQLiteLeadStore)
+    assert store.get_by_email("a@example.com")["name"] == "A"
+
+
+def test_backend_selection(tmp_path):
+    assert isinstance(create_lead_store(tmp_path, backend="journal"), LeadJournal)
+    with pytest.raises(ValueError):
+        create_lead_store(tmp_path, backend="csv")
+
+
+def test_same_email_is_a_separate_lead_per_tenant(tmp_path):
+    store = SQLiteLeadStore(tmp_path / "leads.db")
+    store.append({**_lead("Priya", "Blendtec", "priya@example.com", "2025-11-26T10:00:00"), "tenant": "reliance"})
+    store.append({**_lead("Priya Jha", "Blendtec", "priya@example.com", "2025-11-27T10:00:00"), "tenant": "tata"})
+
+    assert store.count() == 2
+    assert store.get_by_email("priya@example.com", tenant="reliance")["name"] == "Priya"
+    assert store.get_by_email("priya@example.com", tenant="tata")["name"] == "Priya Jha"
+    store.close()
+
+
+def test_migrates_email_keyed_database(tmp_path):
+    import sqlite3
+
+    db_path = tmp_path / "leads.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(
+        """
+        CREATE TABLE leads (
+            id INTEGER PRIMARY KEY, email TEXT UNIQUE, name TEXT, company TEXT, role TEXT,
+            interest TEXT, timeline TEXT, timestamp TEXT NOT NULL
+        );
+        CREATE INDEX idx_leads_timestamp ON leads (timestamp);
+        INSERT INTO leads (email, name, company, timestamp) VALUES ('old@example.com', 'Old', 'Acme', '2025-11-01');
+        """
+    )
+    conn.close()
+
+    store = SQLiteLeadStore(db_path)
+    assert store.get_by_email("old@example.com")["name"] == "Old"
+    store.append({**_lead("Old", "Acme", "old@example.com", "2025-11-02T10:00:00"), "tenant": "tata"})
+    assert store.count() == 2
+    store.close()
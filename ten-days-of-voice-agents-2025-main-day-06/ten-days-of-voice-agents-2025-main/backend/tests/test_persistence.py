@@ -0,0 +1,92 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from persistence import (
+    PersistenceQueue,
+    get_persistence_queue,
+    release_persistence_queue,
+)
+
+
+def test_submit_returns_before_commit():
+    release = threading.Event()
+    committed = []
+
+    def slow_sink(records):
+        release.wait(5)
+        committed.extend(records)
+
+    persistence_queue = PersistenceQueue(slow_sink, name="test")
+    start = time.perf_counter()
+    persistence_queue.submit({"id": 1})
+    assert time.perf_counter() - start < 0.1
+    assert committed == []
+
+    release.set()
+    assert persistence_queue.flush(timeout=5)
+    assert committed == [{"id": 1}]
+    persistence_queue.close()
+
+
+def test_group_commit_and_metrics():
+    batches = []
+    gate = threading.Event()
+
+    def sink(records):
+        gate.wait(5)
+        batches.append(list(records))
+
+    persistence_queue = PersistenceQueue(sink, name="test", batch_window=0.05)
+    for i in range(10):
+        persistence_queue.submit({"id": i})
+    gate.set()
+    assert persistence_queue.flush(timeout=5)
+
+    assert [r["id"] for batch in batches for r in batch] == list(range(10))
+    # Records that queued up behind the first commit go out together
+    assert len(batches) < 10
+
+    metrics = persistence_queue.metrics()
+    assert metrics["queue_depth"] == 0
+    assert metrics["pending"] == 0
+    assert metrics["processed"] == 10
+    assert metrics["commits"] == len(batches)
+    assert metrics["commit_latency_max_ms"] >= metrics["commit_latency_p50_ms"] > 0
+    persistence_queue.close()
+
+
+def test_failed_commits_are_retried():
+    attempts = []
+
+    def flaky_sink(records):
+        attempts.append(records)
+        if len(attempts) == 1:
+            raise OSError("disk full")
+
+    persistence_queue = PersistenceQueue(flaky_sink, name="test")
+    persistence_queue.submit({"id": 1})
+    assert persistence_queue.flush(timeout=5)
+
+    assert len(attempts) == 2
+    assert persistence_queue.metrics()["failed"] == 0
+    persistence_queue.close()
+
+
+def test_released_queue_stops_its_writer():
+    committed = []
+    persistence_queue = get_persistence_queue("session:test", committed.extend)
+    persistence_queue.submit({"id": 1})
+    assert persistence_queue.flush(timeout=5)
+    writer = persistence_queue._thread
+
+    release_persistence_queue(persistence_queue, timeout=5)
+    assert not writer.is_alive()
+    assert committed == [{"id": 1}]
+    # The next session under the same name gets a fresh queue
+    assert get_persistence_queue("session:test", committed.extend) is not persistence_queue
+
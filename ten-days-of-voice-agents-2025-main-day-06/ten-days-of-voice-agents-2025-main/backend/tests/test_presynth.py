@@ -0,0 +1,62 @@
+import sys
+from pathlib import Path
+
+import aiohttp
+import pytest
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from audio_cache import AudioCache, CachedTTS
+from local_tts import LocalTTS, start_server
+from presynth import VOICES, collect_utterances, main, presynthesize
+from tenant_registry import greeting_for
+
+SHARED_DATA_DIR = Path(__file__).resolve().parent.parent.parent / "shared-data"
+
+
+def test_collects_static_lines_from_shared_data():
+    utterances = collect_utterances(SHARED_DATA_DIR)
+    assert greeting_for("Reliance Group") in utterances
+    assert greeting_for("Tata Group") in utterances
+    # The tutor's curriculum is rendered into the tutor's image, leads aren't spoken verbatim
+    assert "What is a variable and how do you create one in Python?" not in utterances
+    assert all("@" not in text for text in utterances)
+
+
+def test_strict_run_fails_without_content(tmp_path):
+    # Like a Docker build whose context is missing shared-data
+    args = ["--shared-data", str(tmp_path / "missing"), "--cache-dir", str(tmp_path / "cache"), "--local-url", "http://127.0.0.1:9"]
+    assert main(args) == 0
+    assert main(args + ["--strict"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_presynthesis_warms_the_cache(tmp_path):
+    runner, url = await start_server()
+    try:
+        cache = AudioCache(tmp_path)
+        stats = await presynthesize(cache, SHARED_DATA_DIR, concurrency=3, local_url=url)
+        assert stats["voices"] == len(VOICES)
+        assert stats["failed"] == 0
+        assert stats["synthesized"] == stats["sentences"] > 0
+
+        # A second run has nothing left to do
+        again = await presynthesize(cache, SHARED_DATA_DIR, local_url=url)
+        assert again["synthesized"] == 0
+        assert again["cached"] == stats["sentences"]
+
+        # At runtime the greeting now plays from disk
+        async with aiohttp.ClientSession() as session:
+            provider = LocalTTS(base_url=url, voice="aura-helios-en", http_session=session)
+            cached = CachedTTS(provider, cache, voice="aura-helios-en")
+            labels = []
+            cached.on("metrics_collected", lambda m: labels.append(m.label))
+            async with cached.stream() as stream:
+                stream.push_text(greeting_for("Reliance Group"))
+                stream.end_input()
+                frames = [ev.frame async for ev in stream]
+            assert frames
+            assert labels and set(labels) == {"audio_cache.hit"}
+    finally:
+        await runner.cleanup()
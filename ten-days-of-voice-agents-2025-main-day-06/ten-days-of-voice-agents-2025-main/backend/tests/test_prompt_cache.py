@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from prompt_cache import PromptCache
+
+
+def test_same_key_returns_same_object():
+    cache = PromptCache()
+    renders = []
+
+    def render():
+        renders.append(1)
+        return "".join(["You are ", "an SDR"])
+
+    first = cache.get_or_render(("digest", "sdr", None, None), render)
+    second = cache.get_or_render(("digest", "sdr", None, None), render)
+
+    assert first is second
+    assert len(renders) == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1}
+
+
+def test_content_change_renders_again():
+    cache = PromptCache()
+    old = cache.get_or_render(("v1", "sdr", None, None), lambda: "old prompt")
+    new = cache.get_or_render(("v2", "sdr", None, None), lambda: "new prompt")
+    assert (old, new) == ("old prompt", "new prompt")
+    assert cache.hit_rate == 0.0
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = PromptCache(max_entries=2)
+    cache.get_or_render(("a",), lambda: "a")
+    cache.get_or_render(("b",), lambda: "b")
+    cache.get_or_render(("a",), lambda: "a")
+    cache.get_or_render(("c",), lambda: "c")
+
+    assert cache.stats()["entries"] == 2
+    cache.get_or_render(("b",), lambda: "b again")
+    assert cache.misses == 4
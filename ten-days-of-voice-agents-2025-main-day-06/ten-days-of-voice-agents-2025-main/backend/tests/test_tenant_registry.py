@@ -0,0 +1,60 @@
+import json
+import sys
+from pathlib import Path
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from content_cache import ContentCache
+from tenant_registry import TenantRegistry, tenant_id_for
+
+SHARED_DATA_DIR = Path(__file__).resolve().parent.parent.parent / "shared-data"
+
+
+def make_registry():
+    registry = TenantRegistry(SHARED_DATA_DIR, content_cache=ContentCache(), default_tenant="reliance")
+    registry.discover()
+    return registry
+
+
+def test_tenant_ids_from_file_names():
+    assert tenant_id_for(Path("reliance_content.json")) == "reliance"
+    assert tenant_id_for(Path("day5_tata_content.json")) == "tata"
+
+
+def test_discovers_only_sdr_content():
+    registry = make_registry()
+    # The tutor curriculum is a list, not an SDR knowledge base
+    assert sorted(registry.tenant_ids) == ["reliance", "tata"]
+    assert registry.get("tata").name == "Tata Group"
+
+
+def test_content_is_parsed_once():
+    cache = ContentCache(check_interval=60)
+    registry = TenantRegistry(SHARED_DATA_DIR, content_cache=cache)
+    registry.discover()
+    loads = cache.loads
+    registry.discover()
+    assert cache.loads == loads
+
+
+def test_resolve_from_metadata():
+    registry = make_registry()
+    assert registry.resolve(json.dumps({"tenant": "tata"})).tenant_id == "tata"
+    assert registry.resolve("", json.dumps({"company": "Tata Group"})).tenant_id == "tata"
+    assert registry.resolve("tata").tenant_id == "tata"
+    # Dispatch metadata comes first
+    assert registry.resolve("reliance", "tata").tenant_id == "reliance"
+
+
+def test_unknown_tenant_falls_back_to_default():
+    registry = make_registry()
+    assert registry.resolve(None, "").tenant_id == "reliance"
+    assert registry.resolve(json.dumps({"tenant": "acme"})).tenant_id == "reliance"
+    assert registry.resolve(json.dumps({"other": 1})).tenant_id == "reliance"
+
+
+def test_non_string_tenant_metadata_falls_back():
+    registry = make_registry()
+    assert registry.resolve(json.dumps({"tenant": 5})).tenant_id == "reliance"
+    assert registry.resolve(json.dumps(["tata"])).tenant_id == "reliance"
@@ -0,0 +1,69 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from local_tts import start_server
+from tts_bench import compare, load_corpus, main, run_benchmark, select_voices
+
+
+def test_load_corpus_formats(tmp_path):
+    text_file = tmp_path / "corpus.txt"
+    text_file.write_text("Hello there.\n\n  Second line.  \n")
+    assert load_corpus(text_file) == ["Hello there.", "Second line."]
+
+    json_file = tmp_path / "corpus.json"
+    json_file.write_text(json.dumps(["One.", " ", "Two."]))
+    assert load_corpus(json_file) == ["One.", "Two."]
+    assert load_corpus(None)
+
+
+def test_select_voices_dedupes_and_filters():
+    voices = select_voices(None)
+    assert len({(v.provider, v.voice, v.style) for v in voices}) == len(voices)
+    assert [v.voice for v in select_voices(["deepgram:aura-helios-en"])] == ["aura-helios-en"]
+    assert [v.voice for v in select_voices(["en-US-ken"])] == ["en-US-ken"]
+
+
+@pytest.mark.asyncio
+async def test_benchmark_against_local_server():
+    runner, url = await start_server(ttfb_ms=50, jitter_ms=2)
+    try:
+        report = await run_benchmark(
+            select_voices(["en-US-matthew"]),
+            ["blingfire", "basic_min1"],
+            ["Hi!", "Okay. Got it. Thanks for the help today."],
+            local_url=url,
+        )
+    finally:
+        await runner.cleanup()
+
+    assert len(report["results"]) == 4
+    assert all("error" not in row for row in report["results"])
+    for row in report["results"]:
+        assert row["ttfb_ms"] >= 50
+        assert row["audio_s"] > 0
+        assert row["rtf"] > 0
+    assert {row["tokenizer"] for row in report["summary"]} == {"blingfire", "basic_min1"}
+    json.dumps(report)
+
+
+def test_compare_flags_regressions():
+    baseline = {"summary": [{"voice": "v", "tokenizer": "t", "ttfb_p50_ms": 200.0, "rtf_mean": 0.4}]}
+    same = {"summary": [{"voice": "v", "tokenizer": "t", "ttfb_p50_ms": 220.0, "rtf_mean": 0.4}]}
+    slower = {"summary": [{"voice": "v", "tokenizer": "t", "ttfb_p50_ms": 300.0, "rtf_mean": 0.4}]}
+    assert compare(same, baseline, tolerance=0.2) == []
+    assert compare(slower, baseline, tolerance=0.2) == ["v / t: ttfb_p50_ms 200.0 -> 300.0"]
+
+
+def test_cli_writes_results(tmp_path):
+    output = tmp_path / "bench.json"
+    code = main(["--local", "--voices", "aura-helios-en", "--tokenizers", "basic", "--mock-ttfb-ms", "0", "--output", str(output)])
+    assert code == 0
+    report = json.loads(output.read_text())
+    assert report["meta"]["voices"] == ["deepgram:aura-helios-en"]
+    assert report["summary"][0]["runs"] == len(load_corpus(None))
@@ -0,0 +1,72 @@
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+from livekit import rtc
+from livekit.plugins.silero import onnx_model
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from vad_batcher import BatchedOnnxModel, BatchedVAD, VADBatcher
+
+
+@pytest.fixture(scope="module")
+def session():
+    return onnx_model.new_inference_session(True)
+
+
+def test_batched_results_match_per_stream_inference(session):
+    batcher = VADBatcher(session, 16000, max_batch=8, max_wait=0.01)
+    rng = np.random.default_rng(1)
+    streams = [(rng.standard_normal((20, 512)) * 0.2).astype(np.float32) for _ in range(6)]
+    results = [None] * len(streams)
+
+    def run(index):
+        model = BatchedOnnxModel(batcher)
+        results[index] = [model(window) for window in streams[index]]
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(streams))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.close()
+
+    for audio, batched in zip(streams, results):
+        reference = onnx_model.OnnxModel(onnx_session=session, sample_rate=16000)
+        assert batched == pytest.approx([reference(window) for window in audio], abs=1e-5)
+
+    stats = batcher.stats()
+    assert stats["windows"] == 6 * 20
+    # Concurrent streams shared ONNX calls
+    assert stats["max_batch"] > 1
+    assert stats["batches"] < stats["windows"]
+
+
+def test_lone_stream_does_not_wait_for_a_batch(session):
+    batcher = VADBatcher(session, 16000, max_batch=32, max_wait=0.5)
+    model = BatchedOnnxModel(batcher)
+    for _ in range(3):
+        model(np.zeros(512, dtype=np.float32))
+    batcher.close()
+    # With one active stream a batch of one is already complete
+    assert batcher.stats()["decision_p95_ms"] < 100
+
+
+@pytest.mark.asyncio
+async def test_batched_vad_streams_audio():
+    vad = BatchedVAD.load()
+    stream = vad.stream()
+    silence = rtc.AudioFrame(b"\x00\x00" * 1600, sample_rate=16000, num_channels=1, samples_per_channel=1600)
+    for _ in range(10):
+        stream.push_frame(silence)
+    stream.end_input()
+    events = [event async for event in stream]
+    await stream.aclose()
+
+    assert events
+    assert vad.batcher.stats()["windows"] > 0
+    vad.batcher.close()
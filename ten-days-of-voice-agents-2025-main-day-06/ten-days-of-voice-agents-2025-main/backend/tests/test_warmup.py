@@ -0,0 +1,81 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from livekit.agents import JobExecutorType, WorkerOptions, metrics
+
+# Add backend/src to python path
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from vad_batcher import BatchedVAD
+from warmup import (
+    FirstTurnTimer,
+    StartupTimings,
+    job_executor_type,
+    load_vad,
+    prewarm_models,
+    startup_timings,
+    warm_turn_detector,
+)
+
+
+def test_prewarm_loads_and_times_local_models():
+    proc = SimpleNamespace(userdata={})
+    prewarm_models(proc)
+
+    assert proc.userdata["vad"] is not None
+    assert proc.userdata["noise_cancellation"] is not None
+    vad = startup_timings.stats()["vad"]
+    assert {"load", "first_inference", "warm_inference"} <= set(vad)
+    # Whether or not its files are downloaded, the turn detector check is reported
+    assert "files" in startup_timings.stats()["turn_detector"]
+
+
+def test_vad_batching_is_opt_in_and_shares_one_vad(monkeypatch):
+    monkeypatch.delenv("VAD_BATCHING", raising=False)
+    assert not isinstance(load_vad(), BatchedVAD)
+    assert job_executor_type() == WorkerOptions.job_executor_type
+
+    # Batching needs every session in one process: jobs run as threads and share one batcher
+    monkeypatch.setenv("VAD_BATCHING", "1")
+    assert job_executor_type() == JobExecutorType.THREAD
+    vad = load_vad()
+    assert isinstance(vad, BatchedVAD)
+    assert load_vad() is vad
+
+
+class FakeTurnDetector:
+    def __init__(self, delays):
+        self.delays = list(delays)
+
+    async def predict_end_of_turn(self, chat_ctx, timeout=None):
+        await asyncio.sleep(self.delays.pop(0))
+        return 0.9
+
+
+@pytest.mark.asyncio
+async def test_turn_detector_cold_and_warm_inference():
+    await warm_turn_detector(FakeTurnDetector([0.05, 0.0]))
+    timings = startup_timings.stats()["turn_detector"]
+    assert timings["first_inference"] >= 50
+    assert timings["warm_inference"] < timings["first_inference"]
+
+
+def test_first_turn_timer_splits_cold_and_warm_sessions():
+    timings = StartupTimings()
+    cold = FirstTurnTimer(timings)
+    warm = FirstTurnTimer(timings)
+    assert cold.component != warm.component
+    assert warm.component == "first_turn_warm"
+
+    def eou(delay):
+        return metrics.EOUMetrics(
+            timestamp=0, end_of_utterance_delay=delay, transcription_delay=0, on_user_turn_completed_delay=0
+        )
+
+    warm.collect(eou(0.2))
+    warm.collect(eou(0.9))  # Only the first turn counts
+    warm.collect(object())
+    assert timings.stats()["first_turn_warm"] == {"end_of_utterance": 200.0}